@@ -19,6 +19,7 @@ if "bpy" in locals():
     imp.reload(pencil4_compositing)
     imp.reload(pencil4_render_images)
     imp.reload(PencilLineMergeGroup)
+    imp.reload(PencilLineQuality)
     imp.reload(Translation)
     imp.reload(merge_helper)
     imp.reload(pencil4_viewport)
@@ -29,6 +30,7 @@ else:
     from . import pencil4_render_images
     from . import pencil4_viewport
     from .node_tree import PencilLineMergeGroup
+    from .node_tree import PencilLineQuality
     from .i18n import Translation
     from .merge_helper import merge_helper
     from . import pencil4_preferences
@@ -54,6 +56,7 @@ def register():
     pencil4_handler.append()
     pencil4_compositing.register_menu()
     PencilLineMergeGroup.register_props()
+    PencilLineQuality.register_props()
     pencil4_render_images.register_props()
     merge_helper.register_menu()
     pencil4_viewport.register_props()
@@ -90,6 +93,7 @@ def unregister():
     pencil4_viewport.unregister_props()
     merge_helper.unregister_menu()
     pencil4_render_images.unregister_props()
+    PencilLineQuality.unregister_props()
     PencilLineMergeGroup.unregister_props()
     pencil4_compositing.unregister_menu()
     pencil4_handler.remove()
@@ -0,0 +1,385 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# Blender・ネイティブモジュールを使用せずに、ライン描画の Python 側の処理時間を計測する
+#
+# 使い方:
+#   python3 benchmarks/bench_python_layer.py [--objects 200] [--lines 2] [--line-sets 4] [--overrides 16] [--repeat 10]
+#                                            [--case <name>] [--json <path>] [--baseline <path>] [--tolerance 0.25]
+#
+# --baseline を指定すると、以前に --json で出力した結果と中央値を比較し、許容範囲を超えて遅くなった項目があれば終了コード 1 を返す
+# 計測値は代替の bpy 上での値であり、Blender 上での処理時間とは一致しない (変更前後の比較に使用すること)
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+
+import harness
+import standin_bpy
+import synthetic_scene
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_python_layer")
+    parser.add_argument("--objects", type=int, default=200, help="number of objects (N)")
+    parser.add_argument("--lines", type=int, default=2, help="number of Line nodes")
+    parser.add_argument("--line-sets", type=int, default=4, help="number of Line Set nodes per Line node (M)")
+    parser.add_argument("--overrides", type=int, default=16, help="number of attribute overrides (K)")
+    parser.add_argument("--materials", type=int, default=16, help="number of materials")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=10, help="number of measurements per case")
+    parser.add_argument("--case", action="append", default=None, help="run only the cases whose name contains this text")
+    parser.add_argument("--json", default=None, help="write the results to this file")
+    parser.add_argument("--baseline", default=None, help="compare with the results written by --json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio against the baseline")
+    parser.add_argument("--blender-version", default="4.2.0", help="bpy.app.version reported by the stand-in")
+    return parser.parse_args(argv)
+
+
+class Bench:
+    def __init__(self, addon, scene: synthetic_scene.SyntheticScene):
+        self.addon = addon
+        self.scene = scene
+        self.depsgraph = scene.depsgraph()
+        render = scene.scene.render
+        self.size = (render.resolution_x * render.resolution_percentage // 100,
+                     render.resolution_y * render.resolution_percentage // 100)
+        self.session = None
+        self.quad_view = None
+
+    def cases(self):
+        # (名前, 各計測の前に実行する処理, 計測する処理)
+        PencilNodeTree = self.addon.PencilNodeTree
+        AttrOverride = self.addon.AttrOverride
+        return [
+            ("enumerate_images_from_compositor_nodes", None, self.enumerate_images),
+            ("generate_cpp_nodes/cold", PencilNodeTree.clear_cpp_nodes_cache, self.generate_cpp_nodes),
+            ("generate_cpp_nodes/invalidated", PencilNodeTree.invalidate_cpp_nodes_cache, self.generate_cpp_nodes),
+            ("generate_cpp_nodes/cached", None, self.generate_cpp_nodes),
+            ("copy_props/plan", None, lambda: self.copy_all_props(self.addon.cpp_ulits.copy_props)),
+            ("copy_props/dynamic", None, lambda: self.copy_all_props(self.addon.cpp_ulits.copy_props_dynamic)),
+            ("get_overrided_attr/cold", AttrOverride.invalidate_override_index, self.get_all_overrided_attrs),
+            ("get_overrided_attr/warm", None, self.get_all_overrided_attrs),
+            ("draw_line/new_session", self.new_session, self.draw_line),
+            ("draw_line/same_session", self.cleanup_frame, self.draw_line),
+            ("draw_line/frame_step", self.step_frame, self.draw_line),
+            ("draw_line/frame_step_geometry", lambda: self.step_frame(geometry=True), self.draw_line),
+            ("draw_line_for_viewport", None, self.draw_line_for_viewport),
+            ("draw_line_for_viewport/quad_view", self.addon.render_session.SceneExtraction.invalidate, self.draw_line_for_quad_view),
+        ]
+
+    # 計測対象
+    def enumerate_images(self):
+        self.addon.render_images.enumerate_images_from_compositor_nodes(self.scene.view_layer, self.size)
+
+    def generate_cpp_nodes(self):
+        self.addon.PencilNodeTree.generate_cpp_nodes(self.depsgraph)
+
+    def copy_all_props(self, copy_props):
+        node_dict = self.new_cpp_nodes()
+        for py_node, cpp_node in node_dict.items():
+            copy_props(py_node, cpp_node, node_dict, depsgraph=self.depsgraph)
+        return node_dict
+
+    def get_all_overrided_attrs(self):
+        get_overrided_attr = self.addon.AttrOverride.get_overrided_attr
+        for node, prop_names in self.override_targets:
+            for prop_name in prop_names:
+                get_overrided_attr(node, prop_name, depsgraph=self.depsgraph)
+
+    def draw_line(self):
+        return self.session.draw_line(self.depsgraph)
+
+    def draw_line_for_viewport(self):
+        if self.session is None:
+            self.new_session()
+        space, region_3d = synthetic_scene.viewport(self.scene)
+        return self.session.draw_line_for_viewport(self.depsgraph, self.size[0], self.size[1], space, region_3d)
+
+    def draw_line_for_quad_view(self):
+        # 四分割表示: 抽出結果を共有する4つのセッションで、視点の異なるリージョンを描画する
+        if self.quad_view is None:
+            extraction = self.addon.render_session.SceneExtraction()
+            self.quad_view = [self.addon.render_session.Pencil4RenderSession(extraction) for _ in range(4)]
+        space, region_3d = synthetic_scene.viewport(self.scene)
+        view_matrix = region_3d.view_matrix
+        for i, session in enumerate(self.quad_view):
+            session.cleanup_frame(self.depsgraph)
+            region_3d.view_matrix = standin_bpy.Matrix.Translation((i * 0.5, 0.0, 0.0)) @ view_matrix
+            session.draw_line_for_viewport(self.depsgraph, self.size[0] // 2, self.size[1] // 2, space, region_3d)
+
+    # 計測の前処理
+    def new_session(self):
+        self.addon.PencilNodeTree.clear_cpp_nodes_cache()
+        self.addon.AttrOverride.invalidate_override_index()
+        self.session = self.addon.render_session.Pencil4RenderSession()
+        self.depsgraph = self.scene.depsgraph()
+
+    def cleanup_frame(self):
+        if self.session is None:
+            self.new_session()
+        self.session.cleanup_frame(self.depsgraph)
+
+    def step_frame(self, geometry: bool = False):
+        # 1割のオブジェクトを移動し、depsgraph の更新通知と同じ経路でキャッシュを破棄する
+        # geometry: ジオメトリの更新も通知する (アニメーションするモディファイアなど)
+        self.cleanup_frame()
+        scene = self.scene.scene
+        scene.frame_current += 1
+        self.depsgraph.clear_updates()
+        for obj in self.scene.objects[scene.frame_current % 10::10]:
+            obj.matrix_world = standin_bpy.Matrix.Translation(obj.matrix_world.translation + standin_bpy.Vector((0.0, 0.0, 0.01)))
+            self.depsgraph.tag_update(obj, geometry=geometry)
+        self.addon.render_session.SceneExtraction.invalidate()
+        self.session.on_frame_change(self.addon.render_session.ObjectUpdates(self.depsgraph))
+        self.addon.PencilNodeTree.on_depsgraph_update(self.depsgraph)
+        self.addon.render_session.MergeGroupIndex.on_depsgraph_update(self.depsgraph)
+
+    # 補助
+    def new_cpp_nodes(self) -> dict:
+        native = self.addon.native
+        cpp_types = {
+            "LineNode": native.line_node,
+            "LineSetNode": native.line_set_node,
+            "BrushSettingsNode": native.brush_settings_node,
+            "BrushDetailNode": native.brush_detail_node,
+            "ReductionSettingsNode": native.reduction_settings_node,
+            "TextureMapNode": native.texture_map_node,
+        }
+        return {x: cpp_types[x.__class__.__name__]() for x in self.scene.tree.nodes if x.__class__.__name__ in cpp_types}
+
+    @property
+    def override_targets(self):
+        targets = getattr(self, "_override_targets", None)
+        if targets is None:
+            targets = [(node, [x for x in dir(cpp_node) if not x.startswith("_")]) for node, cpp_node in self.new_cpp_nodes().items()]
+            self._override_targets = targets
+        return targets
+
+
+def transferred_values(cpp_node) -> dict:
+    ret = {}
+    for prop_name in (x for x in dir(cpp_node) if not x.startswith("_")):
+        value = getattr(cpp_node, prop_name)
+        if isinstance(value, standin_bpy.bpy_prop_collection):
+            # 動的な転送では、空のコレクションはそのまま代入される (C++側では空の配列として受け取る)
+            value = list(value)
+        if isinstance(value, (list, tuple)):
+            # C++側では list と tuple はどちらも配列として受け取るため、区別しない
+            ret[prop_name] = [id(x) if isinstance(x, standin_native_struct()) else x for x in value]
+        elif isinstance(value, standin_native_struct()):
+            ret[prop_name] = True
+        else:
+            ret[prop_name] = value
+    return ret
+
+
+def standin_native_struct():
+    import standin_native
+    return standin_native._CppStruct
+
+
+def run_checks(bench: Bench) -> list[str]:
+    # 計測結果が意味を持つことの確認 (転送手順による結果の一致・描画に渡されるインスタンスの存在)
+    errors = []
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        plan_nodes = bench.copy_all_props(bench.addon.cpp_ulits.copy_props)
+        dynamic_nodes = bench.copy_all_props(bench.addon.cpp_ulits.copy_props_dynamic)
+    for line in output.getvalue().splitlines():
+        if line.startswith("Not transferred"):
+            errors.append(line)
+    plan_by_name = {x.name: transferred_values(v) for x, v in plan_nodes.items()}
+    for x, v in dynamic_nodes.items():
+        plan = plan_by_name[x.name]
+        dynamic = transferred_values(v)
+        for key in plan:
+            # 子ノードの参照は生成したインスタンスが異なるため、個数のみを比較する
+            a, b = plan[key], dynamic[key]
+            if isinstance(a, list) and len(a) > 0 and isinstance(a[0], int) and not isinstance(a[0], bool):
+                a, b = len(a), len(b)
+            if a != b:
+                errors.append(f"copy_props mismatch: {x.name}.{key} plan={plan[key]!r:.80} dynamic={dynamic[key]!r:.80}")
+
+    recorder = bench.addon.native.recorder
+    bench.new_session()
+    ret = bench.draw_line()
+    if ret != bench.addon.native.draw_ret.success:
+        errors.append(f"draw_line returned {ret!r}")
+    elif recorder.last_draw.get("render_instances", 0) == 0:
+        errors.append("draw_line passed no render instances to the native module")
+    errors.extend(check_node_edit_redraw(bench))
+    errors.extend(check_tessellation_release(bench))
+    errors.extend(check_transform_reuse(bench))
+    return errors
+
+
+def check_node_edit_redraw(bench: Bench) -> list[str]:
+    # ノードのプロパティの編集 (UI からの変更はメッセージバスで通知される) でビューポートの描画結果を再利用しないこと
+    errors = []
+    manager = bench.addon.module("pencil4_viewport").ViewportLineRenderManager
+    PencilNodeTree = bench.addon.PencilNodeTree
+    brush = next(x for x in bench.scene.tree.nodes if type(x).__name__ == "BrushSettingsNode")
+    PencilNodeTree.generate_cpp_nodes(bench.depsgraph)
+    key = manager.calc_result_key(())
+    if manager.calc_result_key(()) != key:
+        errors.append("viewport result key changed without any edit")
+    size = brush.size
+    brush.size = size + 1.0
+    bench.addon.bpy.msgbus.publish_rna(key=(brush, "size"))
+    if manager.calc_result_key(()) == key:
+        errors.append("viewport result key unchanged after editing a node property")
+    (line_nodes, _) = PencilNodeTree.generate_cpp_nodes(bench.depsgraph)
+    line_sets = [x for x in itertools.chain.from_iterable(x.line_sets for x in line_nodes) if x is not None]
+    sizes = {getattr(x, name).size for x in line_sets for name in dir(x)
+             if name.endswith("brush_settings") and getattr(x, name) is not None}
+    if size + 1.0 not in sizes:
+        errors.append("generate_cpp_nodes returned the cached nodes after editing a node property")
+    brush.size = size
+    bench.addon.bpy.msgbus.publish_rna(key=(brush, "size"))
+    return errors
+
+
+def check_tessellation_release(bench: Bench) -> list[str]:
+    # 描画しなくなったオブジェクトのメッシュ化の結果をフレームの終了時に解放し、
+    # 抽出を共有する他のセッションがネイティブモジュールのオブジェクトのキャッシュを使用しないこと
+    errors = []
+    render_session = bench.addon.render_session
+    recorder = bench.addon.native.recorder
+    depsgraph = bench.depsgraph
+    curve = next(x for x in bench.scene.objects if x.type == "CURVE")
+    extraction = render_session.SceneExtraction()
+    sessions = [render_session.Pencil4RenderSession(extraction) for _ in range(2)]
+    bench.addon.preferences.reuse_render_geometry = True
+    try:
+        for session in sessions:
+            session.draw_line(depsgraph)
+            session.cleanup_frame(depsgraph)
+        (count, _) = extraction.get_tessellation_stats()
+        curve.hide_render = True
+        sessions[0].draw_line(depsgraph)
+        sessions[0].cleanup_frame(depsgraph)
+        if extraction.get_tessellation_stats()[0] != count - 1:
+            errors.append("cleanup_frame did not release the mesh of a hidden curve")
+        curve.hide_render = False
+        sessions[1].draw_line(depsgraph)
+        if recorder.last_draw.get("objects_cache_valid", False):
+            errors.append("objects cache was reused after a shared session released a mesh")
+        for session in sessions:
+            session.cleanup_all(depsgraph)
+        release_count = extraction.release_count
+        extraction.clear(depsgraph)
+        if extraction.release_count == release_count:
+            errors.append("SceneExtraction.clear did not release the tessellated meshes")
+    finally:
+        curve.hide_render = False
+        bench.addon.preferences.reuse_render_geometry = False
+    return errors
+
+
+def check_transform_reuse(bench: Bench) -> list[str]:
+    # 移動のみのフレームではネイティブモジュールのオブジェクトのキャッシュを使用し、ジオメトリの更新では使用しないこと
+    errors = []
+    recorder = bench.addon.native.recorder
+    bench.addon.preferences.reuse_render_geometry = True
+    try:
+        bench.new_session()
+        bench.draw_line()
+        bench.step_frame()
+        bench.draw_line()
+        if not recorder.last_draw.get("objects_cache_valid", False):
+            errors.append("objects cache was not reused after a transform-only frame change")
+        bench.step_frame(geometry=True)
+        bench.draw_line()
+        if recorder.last_draw.get("objects_cache_valid", False):
+            errors.append("objects cache was reused after a geometry update")
+    finally:
+        bench.addon.preferences.reuse_render_geometry = False
+        bench.new_session()
+    return errors
+
+
+def measure(setup, func, repeat: int) -> list[float]:
+    # 初回は計測に含めない (転送計画の構築などの一度きりの処理を除外する)
+    if setup is not None:
+        setup()
+    func()
+    ret = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        ret.append(time.perf_counter() - start)
+    return ret
+
+
+def summarize(times: list[float]) -> dict:
+    return {
+        "min_ms": min(times) * 1000.0,
+        "median_ms": statistics.median(times) * 1000.0,
+        "mean_ms": statistics.fmean(times) * 1000.0,
+        "max_ms": max(times) * 1000.0,
+        "repeat": len(times),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    # 中央値が基準値の (1 + tolerance) 倍を超えた項目を返す (ごく短い処理の揺らぎは無視する)
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base["median_ms"] * (1.0 + tolerance) + 0.05
+        if result["median_ms"] > limit:
+            regressions.append(f"{name}: {result['median_ms']:.3f} ms > {limit:.3f} ms (baseline {base['median_ms']:.3f} ms)")
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    addon = harness.load_addon(tuple(int(x) for x in args.blender_version.split(".")))
+    spec = synthetic_scene.SceneSpec(objects=args.objects, lines=args.lines, line_sets=args.line_sets,
+                                     overrides=args.overrides, materials=args.materials, seed=args.seed)
+    bench = Bench(addon, synthetic_scene.build_scene(addon, spec))
+    print(f"scene: objects={spec.objects} lines={spec.lines} line_sets/line={spec.line_sets} overrides={spec.overrides} "
+          f"nodes={len(bench.scene.tree.nodes)} python={platform.python_version()}")
+
+    errors = run_checks(bench)
+    for error in errors:
+        print(f"CHECK FAILED: {error}")
+    last_draw = addon.native.recorder.last_draw
+    print("draw: " + ", ".join(f"{k}={v}" for k, v in last_draw.items()))
+
+    results = {}
+    print(f"{'case':<40} {'min':>10} {'median':>10} {'mean':>10}")
+    for name, setup, func in bench.cases():
+        if args.case is not None and not any(x in name for x in args.case):
+            continue
+        results[name] = summarize(measure(setup, func, args.repeat))
+        r = results[name]
+        print(f"{name:<40} {r['min_ms']:>8.3f}ms {r['median_ms']:>8.3f}ms {r['mean_ms']:>8.3f}ms")
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"spec": spec.to_dict(), "python": platform.python_version(), "results": results}, f, indent=2)
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for x in regressions:
+            print(f"REGRESSION: {x}")
+
+    return 1 if len(errors) > 0 or len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# 代替のネイティブモジュール (standin_native) が、実際のネイティブモジュール・アドオンの転送計画と食い違っていないかを確認する
+#
+# 使い方:
+#   python3 benchmarks/check_standin.py
+#       代替の bpy 上で、全てのノードのプロパティが転送計画で転送でき、draw_options にアドオンが使用する属性があることを確認する
+#       レンダリングで draw_options を指定しない描画と、一時的に作成した draw_options の描画の結果が一致することを確認する
+#   blender -b --factory-startup --python benchmarks/check_standin.py -- [--addon <module>]
+#       実際のネイティブモジュールと、代替のモジュールのプロパティの名前・転送計画の種類・draw_options の初期値を比較する
+#       draw_options の初期値が、draw_options を指定しない描画で使用される値と一致することを確認する
+#
+# 食い違いがあれば内容を出力し、終了コード 1 を返す
+
+import argparse
+import importlib
+import os
+import re
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import standin_native
+
+# draw_options を指定しない描画 (レンダリング) で使用される値
+# レンダリングでオブジェクトのキャッシュを使用するフレームは、draw_options を一時的に作成して線の太さの基準のみを設定するため、
+# その他の属性の初期値がこれらの値と一致している必要がある
+RENDER_DRAW_OPTIONS = {
+    "timeout": 0.0,
+    "line_scale": 1.0,
+    "linesize_absolute_scale": 1.0,
+}
+
+# C++側のノードの型名 -> (Python側のモジュール, クラス名)
+NODE_CLASSES = {
+    "line_node": ("node_tree.nodes.LineNode", "LineNode"),
+    "line_set_node": ("node_tree.nodes.LineSetNode", "LineSetNode"),
+    "brush_settings_node": ("node_tree.nodes.BrushSettingsNode", "BrushSettingsNode"),
+    "brush_detail_node": ("node_tree.nodes.BrushDetailNode", "BrushDetailNode"),
+    "reduction_settings_node": ("node_tree.nodes.ReductionSettingsNode", "ReductionSettingsNode"),
+    "texture_map_node": ("node_tree.nodes.TextureMapNode", "TextureMapNode"),
+    "line_functions_node": ("node_tree.nodes.LineFunctionsNode", "LineFunctionsContainerNode"),
+    "line_render_element": ("pencil4_render_images", "RenderElement"),
+    "vector_output": ("pencil4_render_images", "VectorOutput"),
+}
+
+
+def public_names(instance) -> set[str]:
+    return {x for x in dir(instance) if not x.startswith("_") and not callable(getattr(instance, x))}
+
+
+def value_kind(value) -> tuple:
+    # 転送計画の手順の選択に影響する、初期値の型と配列の長さ
+    value_type = type(value)
+    if value_type.__name__.startswith("pcl4_enum_"):
+        return ("enum",)
+    if value_type is list:
+        return ("list", len(value))
+    return (value_type.__name__,)
+
+
+def used_draw_options_attributes() -> set[str]:
+    # アドオンのソースコードで draw_options に設定している属性
+    ret = set()
+    pattern = re.compile(r"draw_options?\.([a-z_]+)")
+    for root, dirs, files in os.walk(ADDON_DIR):
+        dirs[:] = [x for x in dirs if x not in ("benchmarks", "__pycache__")]
+        for name in (x for x in files if x.endswith(".py")):
+            with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                ret.update(pattern.findall(f.read()))
+    return ret
+
+
+# 代替の bpy
+def check_standin() -> list[str]:
+    import harness
+    import synthetic_scene
+    import bench_python_layer
+
+    addon = harness.load_addon()
+    errors = []
+
+    draw_options = addon.native.draw_options()
+    for name in sorted(used_draw_options_attributes() - public_names(draw_options)):
+        errors.append(f"draw_options.{name}: used by the add-on but missing in the stand-in")
+
+    bench = bench_python_layer.Bench(addon, synthetic_scene.build_scene(addon, synthetic_scene.SceneSpec(objects=10)))
+    errors.extend(bench_python_layer.run_checks(bench))
+    errors.extend(check_temporary_draw_options(addon, bench))
+    for py_node, cpp_node in bench.new_cpp_nodes().items():
+        plan = addon.cpp_ulits.get_transfer_plan(py_node, type(cpp_node))
+        if not plan.cacheable:
+            errors.append(f"{type(py_node).__name__}: the stand-in properties need dynamic transfer")
+    return errors
+
+
+def check_temporary_draw_options(addon, bench) -> list[str]:
+    # オブジェクトのキャッシュを使用しないフレーム (draw_options なし) と使用するフレーム (一時的な draw_options) の描画の比較
+    errors = []
+    recorder = addon.native.recorder
+    addon.preferences.reuse_render_geometry = True
+    try:
+        bench.new_session()
+        bench.draw_line()
+        without_options = dict(recorder.last_draw)
+        bench.cleanup_frame()
+        bench.draw_line()
+        with_options = dict(recorder.last_draw)
+    finally:
+        addon.preferences.reuse_render_geometry = False
+        bench.new_session()
+    if not with_options.get("objects_cache_valid", False):
+        errors.append("render draw_line did not reuse the objects cache with temporary draw_options")
+    for name in sorted(set(without_options) | set(with_options)):
+        if name != "objects_cache_valid" and without_options.get(name) != with_options.get(name):
+            errors.append(f"render draw_line {name}: without draw_options {without_options.get(name)!r} / "
+                          f"temporary draw_options {with_options.get(name)!r}")
+    draw_options = addon.native.draw_options()
+    for name, value in RENDER_DRAW_OPTIONS.items():
+        if getattr(draw_options, name) != value:
+            errors.append(f"draw_options.{name}: initial value {getattr(draw_options, name)!r} / render {value!r}")
+    return errors
+
+
+# Blender
+def find_addon(module_name: str) -> str:
+    import addon_utils
+    if module_name is None:
+        for mod in addon_utils.modules():
+            if getattr(mod, "bl_info", {}).get("name") == "PSOFT Pencil+ 4 Line":
+                module_name = mod.__name__
+                break
+    if module_name is None:
+        raise RuntimeError("Add-on 'PSOFT Pencil+ 4 Line' not found")
+    addon_utils.enable(module_name, default_set=False)
+    return module_name
+
+
+def check_native(module_name: str) -> list[str]:
+    addon = find_addon(module_name)
+    native = importlib.import_module(addon + ".pencil4_render_session").pencil4line_for_blender
+    standin = standin_native.create_module("standin", os.path.join(ADDON_DIR, "bin"))
+    standin_native.bind_schemas(standin, {k: getattr(importlib.import_module(f"{addon}.{m}"), c) for k, (m, c) in NODE_CLASSES.items()})
+    errors = []
+
+    for type_name in NODE_CLASSES:
+        real = getattr(native, type_name)()
+        fake = getattr(standin, type_name)()
+        real_names = public_names(real)
+        fake_names = public_names(fake)
+        for name in sorted(real_names - fake_names):
+            errors.append(f"{type_name}.{name}: missing in the stand-in")
+        for name in sorted(fake_names - real_names):
+            errors.append(f"{type_name}.{name}: not in the native module")
+        for name in sorted(real_names & fake_names):
+            real_kind = value_kind(getattr(real, name))
+            fake_kind = value_kind(getattr(fake, name))
+            if real_kind != fake_kind:
+                errors.append(f"{type_name}.{name}: native {real_kind} / stand-in {fake_kind}")
+
+    real = native.draw_options()
+    fake = standin.draw_options()
+    for name in sorted(public_names(real) | public_names(fake)):
+        real_value = getattr(real, name, "<missing>")
+        fake_value = getattr(fake, name, "<missing>")
+        if real_value != fake_value:
+            errors.append(f"draw_options.{name}: native {real_value!r} / stand-in {fake_value!r}")
+    for name, value in RENDER_DRAW_OPTIONS.items():
+        if getattr(real, name, "<missing>") != value:
+            errors.append(f"draw_options.{name}: native initial value {getattr(real, name, '<missing>')!r} / render {value!r}")
+    return errors
+
+
+def main() -> int:
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(prog="check_standin")
+    parser.add_argument("--addon", default=None, help="module name of the add-on (Blender only)")
+    args = parser.parse_args(argv)
+
+    try:
+        import bpy
+        in_blender = True
+    except ImportError:
+        in_blender = False
+    errors = check_native(args.addon) if in_blender else check_standin()
+    for error in errors:
+        print(f"MISMATCH: {error}")
+    print(f"{'native' if in_blender else 'stand-in'}: {len(errors)} mismatch(es)")
+    return 1 if len(errors) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
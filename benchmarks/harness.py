@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# 代替の bpy とネイティブモジュールを使用して、Blender の外でアドオンのモジュールを読み込む
+#
+# アドオンのパッケージの __init__.py (クラスの登録・ハンドラの追加) は実行せず、
+# ライン描画の前処理に必要なモジュールの import と、プロパティの登録のみを行う
+
+import importlib
+import os
+import sys
+import types
+
+import standin_bpy
+import standin_native
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "pencil4line_standin"
+
+
+class Addon:
+    def __init__(self, package_name: str):
+        self.package_name = package_name
+        self.bpy = sys.modules["bpy"]
+        self.native = None
+        self.render_session = None
+        self.render_images = None
+        self.cpp_ulits = None
+        self.AttrOverride = None
+        self.PencilNodeTree = None
+        self.node_modules = {}
+        self.preferences = None
+
+    def module(self, name: str) -> types.ModuleType:
+        return importlib.import_module(f"{self.package_name}.{name}")
+
+
+__addon = None
+
+def load_addon(blender_version: tuple = (4, 2, 0)) -> Addon:
+    global __addon
+    if __addon is not None:
+        return __addon
+    if sys.version_info[:2] not in ((3, 9), (3, 10), (3, 11)):
+        # アドオンはこれらのバージョン向けのネイティブモジュールのみを import する
+        raise RuntimeError(f"Python {sys.version_info.major}.{sys.version_info.minor} is not supported (3.9 - 3.11)")
+
+    standin_bpy.install(blender_version)
+
+    # パッケージの __init__.py を実行せずに、サブモジュールを import できるようにする
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [ADDON_DIR]
+    package.__package__ = PACKAGE_NAME
+    sys.modules[PACKAGE_NAME] = package
+
+    addon = Addon(PACKAGE_NAME)
+    addon.native = standin_native.install(PACKAGE_NAME, os.path.join(ADDON_DIR, "bin"))
+    addon.render_session = addon.module("pencil4_render_session")
+    addon.render_images = addon.module("pencil4_render_images")
+    addon.cpp_ulits = addon.module("misc.cpp_ulits")
+    addon.AttrOverride = addon.module("node_tree.misc.AttrOverride")
+    addon.PencilNodeTree = addon.module("node_tree.PencilNodeTree").PencilNodeTree
+    for name in ("LineNode", "LineSetNode", "BrushSettingsNode", "BrushDetailNode", "ReductionSettingsNode",
+                 "TextureMapNode", "LineFunctionsNode"):
+        addon.node_modules[name] = addon.module("node_tree.nodes." + name)
+
+    # アドオンの register() で行うプロパティの登録 (メニューの登録などは行わない)
+    bpy = addon.bpy
+    PencilNodeMixin = addon.module("node_tree.nodes.PencilNodeMixin").PencilNodeMixin
+    PencilNodeMixin.target_node_tree_type = addon.PencilNodeTree.bl_idname
+    PencilNodeMixin.on_nodes_changed = staticmethod(addon.PencilNodeTree.on_nodes_changed)
+    addon.PencilNodeTree.subscribe_node_changes()
+    LineFunctionsContainerNode = addon.node_modules["LineFunctionsNode"].LineFunctionsContainerNode
+    bpy.types.Material.pcl4_line_functions = bpy.props.PointerProperty(type=bpy.types.Material,
+        poll=lambda self, x: LineFunctionsContainerNode.get_line_functions_node(x))
+    addon.module("node_tree.PencilLineMergeGroup").register_props()
+    addon.module("node_tree.PencilLineQuality").register_props()
+    addon.render_images.register_props()
+    preferences_module = addon.module("pencil4_preferences")
+    addon.preferences = preferences_module.PCL4_Preferences()
+    standin_bpy._context.preferences.addons.add(PACKAGE_NAME, addon.preferences)
+
+    nodes = addon.node_modules
+    standin_native.bind_schemas(addon.native, {
+        "line_node": nodes["LineNode"].LineNode,
+        "line_set_node": nodes["LineSetNode"].LineSetNode,
+        "brush_settings_node": nodes["BrushSettingsNode"].BrushSettingsNode,
+        "brush_detail_node": nodes["BrushDetailNode"].BrushDetailNode,
+        "reduction_settings_node": nodes["ReductionSettingsNode"].ReductionSettingsNode,
+        "texture_map_node": nodes["TextureMapNode"].TextureMapNode,
+        "line_functions_node": nodes["LineFunctionsNode"].LineFunctionsContainerNode,
+        "line_render_element": addon.render_images.RenderElement,
+        "vector_output": addon.render_images.VectorOutput,
+    })
+
+    # commitHash.txt との照合によりネイティブモジュールを有効とする
+    addon.render_session.register()
+    __addon = addon
+    return addon
@@ -0,0 +1,1496 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# Blender を使用せずにアドオンの Python 側の処理を計測するための bpy の代替実装
+#
+# ライン描画の前処理(ノードの転送・アトリビュートオーバーライド・描画用インスタンスの生成)で参照する範囲のみを実装している
+# UI・オペレーター・GPU描画は対象外であり、これらのクラスは定義できるだけの空のクラスとして扱う
+#
+# install() で sys.modules に bpy / mathutils などを登録してから、アドオンのモジュールを import すること
+
+import itertools
+import math
+import os
+import sys
+import types
+
+
+# mathutils
+#################################################
+
+class Vector:
+    __slots__ = ("_v",)
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._v = [float(x) for x in values]
+
+    def __len__(self):
+        return len(self._v)
+
+    def __iter__(self):
+        return iter(self._v)
+
+    def __getitem__(self, index):
+        return self._v[index]
+
+    def __setitem__(self, index, value):
+        self._v[index] = value
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and self._v == other._v
+
+    def __repr__(self):
+        return f"Vector({tuple(self._v)})"
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self._v, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self._v, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self._v)
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self._v, other))
+
+    @property
+    def length(self):
+        return math.sqrt(self.dot(self._v))
+
+    def normalized(self):
+        length = self.length
+        return Vector(a / length for a in self._v) if length > 0.0 else self.copy()
+
+    def copy(self):
+        return Vector(self._v)
+
+    def __get_xyz(self):
+        return Vector(self._v[:3])
+
+    def __set_xyz(self, value):
+        self._v[0:3] = [float(x) for x in value]
+
+    xyz = property(__get_xyz, __set_xyz)
+    x = property(lambda self: self._v[0], lambda self, v: self._v.__setitem__(0, v))
+    y = property(lambda self: self._v[1], lambda self, v: self._v.__setitem__(1, v))
+    z = property(lambda self: self._v[2], lambda self, v: self._v.__setitem__(2, v))
+
+
+class Matrix:
+    __slots__ = ("_rows",)
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+        self._rows = [Vector(x) for x in rows]
+
+    @classmethod
+    def Identity(cls, size=4):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @classmethod
+    def Translation(cls, vector):
+        ret = cls.Identity(4)
+        for i in range(3):
+            ret._rows[i][3] = float(vector[i])
+        return ret
+
+    @classmethod
+    def Diagonal(cls, vector):
+        ret = cls.Identity(4)
+        for i, x in enumerate(vector):
+            ret._rows[i][i] = float(x)
+        return ret
+
+    @classmethod
+    def Rotation(cls, angle, size, axis):
+        c = math.cos(angle)
+        s = math.sin(angle)
+        rows = {"X": [[1, 0, 0], [0, c, -s], [0, s, c]],
+                "Y": [[c, 0, s], [0, 1, 0], [-s, 0, c]],
+                "Z": [[c, -s, 0], [s, c, 0], [0, 0, 1]]}[axis]
+        ret = cls.Identity(size)
+        for i in range(3):
+            for j in range(3):
+                ret._rows[i][j] = float(rows[i][j])
+        return ret
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    def __repr__(self):
+        return "Matrix(" + ", ".join(repr(tuple(x)) for x in self._rows) + ")"
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            cols = list(zip(*other._rows))
+            return Matrix([[sum(a * b for a, b in zip(row, col)) for col in cols] for row in self._rows])
+        values = list(other)
+        if len(values) == 3:
+            values.append(1.0)
+            ret = [row.dot(values) for row in self._rows]
+            return Vector(x / ret[3] if ret[3] != 0.0 else x for x in ret[:3])
+        return Vector(row.dot(values) for row in self._rows)
+
+    def copy(self):
+        return Matrix(self._rows)
+
+    def transposed(self):
+        return Matrix(zip(*self._rows))
+
+    def transpose(self):
+        self._rows = [Vector(x) for x in zip(*self._rows)]
+
+    def inverted(self):
+        # ガウス・ジョルダン法
+        n = len(self._rows)
+        m = [list(row) + [1.0 if i == j else 0.0 for j in range(n)] for i, row in enumerate(self._rows)]
+        for col in range(n):
+            pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+            if abs(m[pivot][col]) < 1e-12:
+                raise ValueError("Matrix.inverted(): matrix does not have an inverse")
+            m[col], m[pivot] = m[pivot], m[col]
+            scale = m[col][col]
+            m[col] = [x / scale for x in m[col]]
+            for r in range(n):
+                if r != col and m[r][col] != 0.0:
+                    factor = m[r][col]
+                    m[r] = [a - factor * b for a, b in zip(m[r], m[col])]
+        return Matrix(row[n:] for row in m)
+
+    @property
+    def translation(self):
+        return Vector(row[3] for row in self._rows[:3])
+
+
+# bpy.props
+#################################################
+
+class _PropertySpec:
+    # bpy.props.*Property() の戻り値 (クラス定義時に RNA のプロパティへ変換する)
+    def __init__(self, rna_type: str, is_array: bool, kwargs: dict):
+        self.rna_type = rna_type
+        self.is_array = is_array
+        self.kwargs = kwargs
+
+
+def _property_function(rna_type: str, is_array: bool = False):
+    def func(**kwargs):
+        return _PropertySpec(rna_type, is_array, kwargs)
+    return func
+
+
+class _EnumItem:
+    _collection_key = "identifier"
+
+    def __init__(self, identifier, name, description, value):
+        self.identifier = identifier
+        self.name = name
+        self.description = description
+        self.value = value
+
+
+class bpy_prop_collection:
+    def __init__(self, items=None):
+        self._items = list(items) if items is not None else []
+
+    @staticmethod
+    def _key_of(item):
+        return getattr(item, getattr(item, "_collection_key", "name"), None)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            ret = self.get(key)
+            if ret is None:
+                raise KeyError(f"bpy_prop_collection[key]: key \"{key}\" not found")
+            return ret
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return key in self._items
+
+    def get(self, key, default=None):
+        return next((x for x in self._items if self._key_of(x) == key), default)
+
+    def find(self, key) -> int:
+        return next((i for i, x in enumerate(self._items) if self._key_of(x) == key), -1)
+
+    def keys(self):
+        return [self._key_of(x) for x in self._items]
+
+    def values(self):
+        return list(self._items)
+
+    def items(self):
+        return [(self._key_of(x), x) for x in self._items]
+
+
+class _RnaProperty:
+    _collection_key = "identifier"
+
+    __defaults = {"BOOLEAN": False, "INT": 0, "FLOAT": 0.0, "STRING": ""}
+
+    def __init__(self, identifier: str, spec: _PropertySpec):
+        kw = spec.kwargs
+        self.identifier = identifier
+        self.name = kw.get("name", identifier)
+        self.description = kw.get("description", "")
+        self.type = spec.rna_type
+        self.subtype = kw.get("subtype", "NONE")
+        self.options = set(kw.get("options", {"ANIMATABLE"}))
+        self.is_array = spec.is_array
+        self.array_length = kw.get("size", 3) if spec.is_array else 0
+        self.hard_min = kw.get("min", 0)
+        self.hard_max = kw.get("max", 1)
+        self.soft_min = kw.get("soft_min", self.hard_min)
+        self.soft_max = kw.get("soft_max", self.hard_max)
+        self.step = kw.get("step", 3)
+        self.precision = kw.get("precision", 2)
+        self.getter = kw.get("get")
+        self.setter = kw.get("set")
+        self.update = kw.get("update")
+        self.fixed_type = kw["type"].bl_rna if "type" in kw else None
+        self.enum_items = bpy_prop_collection(self.__parse_enum_items(kw.get("items")))
+
+        if spec.is_array:
+            default = kw.get("default")
+            self.default_array = tuple(default) if default is not None else (self.__defaults[self.type],) * self.array_length
+            self.default = self.default_array[0] if len(self.default_array) > 0 else None
+        elif self.type == "ENUM":
+            first = self.enum_items[0].identifier if len(self.enum_items) > 0 else ""
+            self.default = kw.get("default", set() if "ENUM_FLAG" in self.options else first)
+        else:
+            self.default = kw.get("default", self.__defaults.get(self.type))
+
+    @staticmethod
+    def __parse_enum_items(items):
+        if items is None or callable(items):
+            return []
+        ret = []
+        for i, item in enumerate(items):
+            value = item[-1] if len(item) >= 4 else i
+            ret.append(_EnumItem(item[0], item[1], item[2], value))
+        return ret
+
+    def new_value(self):
+        if self.is_array:
+            return list(self.default_array)
+        if self.type == "POINTER":
+            cls = self.fixed_type.cls
+            return cls() if issubclass(cls, PropertyGroup) else None
+        if self.type == "COLLECTION":
+            return bpy_prop_collection_idprop(self.fixed_type.cls)
+        if self.type == "ENUM" and isinstance(self.default, set):
+            return set(self.default)
+        return self.default
+
+    def coerce(self, value):
+        if self.is_array:
+            return list(value)
+        if self.type == "BOOLEAN":
+            return bool(value)
+        if self.type == "INT":
+            return int(value)
+        if self.type == "FLOAT":
+            return float(value)
+        if self.type == "ENUM" and len(self.enum_items) > 0 and isinstance(value, str) and value not in self.enum_items:
+            raise TypeError(f"enum \"{value}\" not found in {tuple(self.enum_items.keys())}")
+        return value
+
+
+class _RnaDescriptor:
+    # RNA のプロパティへのアクセス (get/set の指定があればそれを使用し、なければインスタンス毎の値を返す)
+    __slots__ = ("rna",)
+
+    def __init__(self, rna: _RnaProperty):
+        self.rna = rna
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        rna = self.rna
+        if rna.getter is not None:
+            return rna.getter(obj)
+        values = obj._rna_values
+        try:
+            return values[rna.identifier]
+        except KeyError:
+            value = values[rna.identifier] = rna.new_value()
+            return value
+
+    def __set__(self, obj, value):
+        rna = self.rna
+        if rna.setter is not None:
+            rna.setter(obj, value)
+        else:
+            obj._rna_values[rna.identifier] = rna.coerce(value)
+
+
+class _StructRNA:
+    _collection_key = "identifier"
+    __generation = 0
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.identifier = cls.__name__
+        self.name = cls.__name__
+        self.__properties = None
+        self.__properties_generation = -1
+
+    @property
+    def bl_rna(self):
+        return self
+
+    @property
+    def properties(self) -> bpy_prop_collection:
+        # 基底クラスのプロパティを含めて列挙する (クラスへのプロパティの追加に追従する)
+        if self.__properties is None or self.__properties_generation != _StructRNA.__generation:
+            props = {}
+            for base in reversed(self.cls.__mro__):
+                for value in base.__dict__.values():
+                    if isinstance(value, _RnaDescriptor):
+                        props[value.rna.identifier] = value.rna
+            self.__properties = bpy_prop_collection(props.values())
+            self.__properties_generation = _StructRNA.__generation
+        return self.__properties
+
+    @classmethod
+    def invalidate(cls):
+        cls.__generation += 1
+
+
+_registry: dict[str, type] = {}
+
+
+class _StructMeta(type):
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+        # アノテーションで宣言したプロパティ (Mixin のものも含む) をディスクリプタに変換する
+        for base in reversed(cls.__mro__):
+            if base is not cls and isinstance(base, _StructMeta):
+                continue
+            for attr, spec in base.__dict__.get("__annotations__", {}).items():
+                if isinstance(spec, _PropertySpec):
+                    type.__setattr__(cls, attr, _RnaDescriptor(_RnaProperty(attr, spec)))
+        type.__setattr__(cls, "bl_rna", _StructRNA(cls))
+        idname = namespace.get("bl_idname")
+        if isinstance(idname, str):
+            _registry[idname] = cls
+        _StructRNA.invalidate()
+        return cls
+
+    def __setattr__(cls, name, value):
+        # bpy.types.XXX.prop = bpy.props.*Property() によるプロパティの追加
+        if isinstance(value, _PropertySpec):
+            value = _RnaDescriptor(_RnaProperty(name, value))
+            _StructRNA.invalidate()
+        super().__setattr__(name, value)
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        _StructRNA.invalidate()
+
+
+class bpy_struct(metaclass=_StructMeta):
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        self._rna_values = {}
+        self._idprops = {}
+        return self
+
+    def as_pointer(self) -> int:
+        return id(self)
+
+    def _path(self) -> str:
+        return ""
+
+    def path_from_id(self, prop_name: str = None) -> str:
+        path = self._path()
+        if prop_name is None:
+            return path
+        return path + "." + prop_name if path != "" else prop_name
+
+    def is_property_set(self, prop_name: str) -> bool:
+        return prop_name in self._rna_values
+
+    # IDプロパティ
+    def keys(self):
+        return list(self._idprops.keys())
+
+    def values(self):
+        return list(self._idprops.values())
+
+    def items(self):
+        return list(self._idprops.items())
+
+    def get(self, key, default=None):
+        return self._idprops.get(key, default)
+
+    def __getitem__(self, key):
+        return self._idprops[key]
+
+    def __setitem__(self, key, value):
+        self._idprops[key] = value
+
+    def __delitem__(self, key):
+        del self._idprops[key]
+
+    def __contains__(self, key):
+        return key in self._idprops
+
+    def id_properties_ui(self, key):
+        return types.SimpleNamespace(update=lambda **kwargs: None)
+
+    @classmethod
+    def append(cls, func):
+        pass
+
+    @classmethod
+    def prepend(cls, func):
+        pass
+
+    @classmethod
+    def remove(cls, func):
+        pass
+
+
+class bpy_prop_collection_idprop(bpy_prop_collection):
+    # CollectionProperty の値
+    def __init__(self, element_type: type):
+        super().__init__()
+        self.__element_type = element_type
+
+    def add(self):
+        item = self.__element_type()
+        self._items.append(item)
+        return item
+
+    def remove(self, index: int):
+        del self._items[index]
+
+    def clear(self):
+        self._items.clear()
+
+    def move(self, src: int, dst: int):
+        self._items.insert(dst, self._items.pop(src))
+
+
+props = types.ModuleType("bpy.props")
+props.BoolProperty = _property_function("BOOLEAN")
+props.BoolVectorProperty = _property_function("BOOLEAN", True)
+props.IntProperty = _property_function("INT")
+props.IntVectorProperty = _property_function("INT", True)
+props.FloatProperty = _property_function("FLOAT")
+props.FloatVectorProperty = _property_function("FLOAT", True)
+props.StringProperty = _property_function("STRING")
+props.EnumProperty = _property_function("ENUM")
+props.PointerProperty = _property_function("POINTER")
+props.CollectionProperty = _property_function("COLLECTION")
+props.RemoveProperty = lambda cls, attr: delattr(cls, attr)
+
+
+# bpy.types
+#################################################
+
+def _unique_name(collection, name: str) -> str:
+    # Blender と同様に、名前が重複する場合は ".001" などの接尾辞を付ける
+    names = set(x.name for x in collection)
+    if name not in names:
+        return name
+    for i in itertools.count(1):
+        candidate = f"{name}.{i:03d}"
+        if candidate not in names:
+            return candidate
+
+
+class PropertyGroup(bpy_struct):
+    name: props.StringProperty()
+
+
+class ID(bpy_struct):
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.library = None
+        self.override_library = None
+        self.use_fake_user = False
+        self.is_evaluated = False
+
+    @property
+    def name_full(self) -> str:
+        return self.name
+
+    @property
+    def original(self):
+        return self
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def update_tag(self, refresh=None):
+        pass
+
+
+class ColorManagedInputColorspaceSettings(bpy_struct):
+    name: props.EnumProperty(items=[(x, x, "") for x in ("sRGB", "Linear Rec.709", "Non-Color")], default="sRGB")
+
+
+class Image(ID):
+    def __init__(self, name: str = "", width: int = 8, height: int = 8):
+        super().__init__(name)
+        self.size = [width, height]
+        self.source = "GENERATED"
+        self.use_generated_float = False
+        self.generated_color = [0.0, 0.0, 0.0, 1.0]
+        self.colorspace_settings = ColorManagedInputColorspaceSettings()
+        self.alpha_mode = "STRAIGHT"
+        self.filepath_raw = ""
+        self.packed_file = None
+        self.__pixels = _ImagePixels(self)
+        self.reload_count = 0
+        self.update_count = 0
+
+    @property
+    def pixels(self):
+        return self.__pixels
+
+    @pixels.setter
+    def pixels(self, values):
+        self.__pixels.foreach_set(values)
+
+    def reload(self):
+        self.reload_count += 1
+
+    def update(self):
+        self.update_count += 1
+
+    def scale(self, width: int, height: int):
+        self.size = [width, height]
+
+    def filepath_from_user(self) -> str:
+        return self.filepath_raw
+
+    def pack(self):
+        pass
+
+    def unpack(self, method=None):
+        self.packed_file = None
+
+
+class _ImagePixels:
+    # Image.pixels (画素数 x 4 の浮動小数点数、値は画像の大きさの変更時に破棄する)
+    def __init__(self, image: Image):
+        self.__image = image
+        self.__size = None
+        self.__values = []
+
+    def __values_for_size(self) -> list:
+        if self.__size != tuple(self.__image.size):
+            self.__size = tuple(self.__image.size)
+            self.__values = [0.0] * (self.__size[0] * self.__size[1] * 4)
+        return self.__values
+
+    def __len__(self):
+        return len(self.__values_for_size())
+
+    def __getitem__(self, index):
+        return self.__values_for_size()[index]
+
+    def foreach_get(self, seq):
+        seq[:] = self.__values_for_size()
+
+    def foreach_set(self, seq):
+        values = self.__values_for_size()
+        if len(seq) != len(values):
+            raise ValueError("foreach_set: the sequence size does not match the image size")
+        values[:] = [float(x) for x in seq]
+
+
+class _MeshElements:
+    # Mesh の頂点・エッジ・コーナー・面 (個数と頂点座標のみを保持する)
+    def __init__(self, count: int = 0, co: list = None):
+        self.__count = count
+        self.__co = co
+
+    def __len__(self):
+        return self.__count
+
+    def foreach_get(self, attr: str, seq):
+        if attr != "co" or self.__co is None:
+            raise AttributeError(f"foreach_get: attribute \"{attr}\" not supported")
+        for i, x in enumerate(self.__co):
+            seq[i] = x
+
+
+class Mesh(ID):
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self.vertices = _MeshElements()
+        self.edges = _MeshElements()
+        self.loops = _MeshElements()
+        self.polygons = _MeshElements()
+        self.materials = _IDList()
+        self.color_attributes = bpy_prop_collection()
+        self.is_editmode = False
+
+    def from_pydata(self, vertices, edges, faces):
+        self.vertices = _MeshElements(len(vertices), [float(c) for v in vertices for c in v])
+        face_edges = set()
+        for face in faces:
+            for a, b in zip(face, face[1:] + face[:1]):
+                face_edges.add((min(a, b), max(a, b)))
+        face_edges.update((min(a, b), max(a, b)) for a, b in edges)
+        self.edges = _MeshElements(len(face_edges))
+        self.loops = _MeshElements(sum(len(x) for x in faces))
+        self.polygons = _MeshElements(len(faces))
+
+    def copy(self):
+        ret = Mesh(self.name)
+        ret.vertices, ret.edges, ret.loops, ret.polygons = self.vertices, self.edges, self.loops, self.polygons
+        ret.materials = _IDList(self.materials)
+        ret.color_attributes = bpy_prop_collection(self.color_attributes)
+        return ret
+
+
+class _IDList(bpy_prop_collection):
+    # Mesh.materials などの ID の配列
+    def append(self, item):
+        self._items.append(item)
+
+    def clear(self):
+        self._items.clear()
+
+
+class Curve(ID):
+    class Spline:
+        def __init__(self, point_count: int, material_index: int):
+            self.point_count = point_count
+            self.material_index = material_index
+
+    def __init__(self, name: str = "", type: str = "CURVE"):
+        super().__init__(name)
+        self.type = type
+        self.materials = _IDList()
+        self.splines = []
+        self.extrude = 0.0
+        self.bevel_depth = 0.0
+
+
+class Camera(ID):
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self.type = "PERSP"
+        self.lens = 50.0
+        self.sensor_width = 36.0
+        self.sensor_height = 24.0
+        self.sensor_fit = "AUTO"
+        self.ortho_scale = 6.0
+        self.clip_start = 0.1
+        self.clip_end = 1000.0
+
+
+class Material(ID):
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self.node_tree = None
+
+
+class _MaterialSlot:
+    def __init__(self, link: str, material):
+        self.link = link
+        self.material = material
+
+    @property
+    def name(self):
+        return self.material.name if self.material is not None else ""
+
+
+class Object(ID):
+    __data_types = {Mesh: "MESH", Camera: "CAMERA"}
+
+    def __init__(self, name: str = "", object_data=None):
+        super().__init__(name)
+        self.data = object_data
+        if object_data is None:
+            self.type = "EMPTY"
+        elif isinstance(object_data, Curve):
+            self.type = {"CURVE": "CURVE", "SURFACE": "SURFACE", "FONT": "FONT"}[object_data.type]
+        else:
+            self.type = self.__data_types.get(type(object_data), "MESH")
+        self.matrix_world = Matrix()
+        self.parent = None
+        self.hide_render = False
+        self.hide_viewport = False
+        self.is_holdout = False
+        self.visible_camera = True
+        self.instance_type = "NONE"
+        self.instance_collection = None
+        self.object_materials = {}
+        self.__temp_mesh = None
+        self.to_mesh_count = 0
+
+    @property
+    def material_slots(self):
+        # オブジェクトにリンクしたマテリアルがあればそれを優先する
+        materials = list(self.data.materials) if self.data is not None and hasattr(self.data, "materials") else []
+        return [_MaterialSlot("OBJECT", self.object_materials[i]) if i in self.object_materials else _MaterialSlot("DATA", x)
+                for i, x in enumerate(materials)]
+
+    def visible_get(self, view_layer=None, viewport=None) -> bool:
+        return not self.hide_viewport
+
+    def to_mesh(self, preserve_all_data_layers: bool = False, depsgraph=None):
+        # 以前に生成したメッシュは解放される (Blender の to_mesh() と同様)
+        self.to_mesh_clear()
+        self.to_mesh_count += 1
+        if self.type == "MESH":
+            self.__temp_mesh = self.data.copy()
+        elif self.type == "CURVE":
+            self.__temp_mesh = _tessellate_curve(self.data)
+        elif self.type in ("SURFACE", "FONT", "META"):
+            self.__temp_mesh = _box_mesh(self.name, 0.5, self.data.materials if self.data is not None else ())
+        return self.__temp_mesh
+
+    def to_mesh_clear(self):
+        self.__temp_mesh = None
+
+    def calc_matrix_camera(self, depsgraph, x: int = None, y: int = None, scale_x: float = 1.0, scale_y: float = 1.0) -> Matrix:
+        render = depsgraph.scene.render
+        width = (x if x is not None else render.resolution_x) * scale_x
+        height = (y if y is not None else render.resolution_y) * scale_y
+        camera: Camera = self.data
+        horizontal = camera.sensor_fit == "HORIZONTAL" or (camera.sensor_fit == "AUTO" and width >= height)
+        sensor = camera.sensor_width if camera.sensor_fit != "VERTICAL" else camera.sensor_height
+        near, far = camera.clip_start, camera.clip_end
+        if camera.type == "ORTHO":
+            half = camera.ortho_scale * 0.5
+            sx, sy = (1.0 / half, width / height / half) if horizontal else (height / width / half, 1.0 / half)
+            return Matrix(((sx, 0, 0, 0), (0, sy, 0, 0), (0, 0, -2.0 / (far - near), -(far + near) / (far - near)), (0, 0, 0, 1)))
+        focal = 2.0 * camera.lens / sensor
+        sx, sy = (focal, focal * width / height) if horizontal else (focal * height / width, focal)
+        return Matrix(((sx, 0, 0, 0), (0, sy, 0, 0), (0, 0, -(far + near) / (far - near), -2.0 * far * near / (far - near)), (0, 0, -1, 0)))
+
+
+def box_geometry(size: float):
+    # Mesh.from_pydata() に渡す立方体の頂点・エッジ・面
+    s = size
+    vertices = [(x, y, z) for x in (-s, s) for y in (-s, s) for z in (-s, s)]
+    faces = [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]]
+    return vertices, [], faces
+
+
+def _box_mesh(name: str, size: float, materials=()) -> Mesh:
+    mesh = Mesh(name)
+    mesh.from_pydata(*box_geometry(size))
+    for x in materials:
+        mesh.materials.append(x)
+    return mesh
+
+
+def _tessellate_curve(curve: Curve) -> Mesh:
+    # 押し出し・ベベルがない場合はエッジのみ、ある場合は断面を四角形として面を生成する
+    mesh = Mesh(curve.name)
+    vertices = []
+    edges = []
+    faces = []
+    extruded = curve.extrude > 0.0 or curve.bevel_depth > 0.0
+    for spline in curve.splines:
+        base = len(vertices)
+        for i in range(spline.point_count):
+            vertices.append((float(i), 0.0, 0.0))
+            if i > 0:
+                edges.append((base + i - 1, base + i))
+        if extruded:
+            faces.extend([[a, b, b, a] for a, b in edges[-(spline.point_count - 1):]] * 4)
+    mesh.from_pydata(vertices, edges, faces)
+    for x in curve.materials:
+        mesh.materials.append(x)
+    return mesh
+
+
+class _ObjectLinks(bpy_prop_collection):
+    # Collection.objects / Collection.children
+    def link(self, item):
+        if item not in self._items:
+            self._items.append(item)
+
+    def unlink(self, item):
+        self._items.remove(item)
+
+
+class Collection(ID):
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self.objects = _ObjectLinks()
+        self.children = _ObjectLinks()
+        self.hide_render = False
+        self.hide_viewport = False
+
+    @property
+    def all_objects(self):
+        ret = list(self.objects)
+        for child in self.children:
+            ret.extend(x for x in child.all_objects if x not in ret)
+        return ret
+
+
+class LayerCollection(bpy_struct):
+    def __init__(self, collection: Collection):
+        self.collection = collection
+        self.name = collection.name
+        self.exclude = False
+        self.holdout = False
+        self.indirect_only = False
+        self.__children = {}
+
+    @property
+    def children(self):
+        # コレクションの階層の変更に追従する
+        ret = []
+        for child in self.collection.children:
+            layer_collection = self.__children.get(child)
+            if layer_collection is None:
+                layer_collection = self.__children[child] = LayerCollection(child)
+            ret.append(layer_collection)
+        return bpy_prop_collection(ret)
+
+
+class ViewLayer(bpy_struct):
+    def __init__(self, scene, name: str = "ViewLayer"):
+        self.name = name
+        self.scene = scene
+        self.layer_collection = LayerCollection(scene.collection)
+        self.material_override = None
+        self.use = True
+
+    def _path(self) -> str:
+        return f"view_layers[\"{self.name}\"]"
+
+
+class RenderSettings(bpy_struct):
+    engine_items = (
+        ("BLENDER_EEVEE_NEXT", "EEVEE", "", 0),
+        ("BLENDER_WORKBENCH", "Workbench", "", 1),
+        ("CYCLES", "Cycles", "", 2),
+    )
+    engine: props.EnumProperty(items=engine_items, default="BLENDER_EEVEE_NEXT")
+
+    def __init__(self):
+        self.resolution_x = 1920
+        self.resolution_y = 1080
+        self.resolution_percentage = 100
+        self.pixel_aspect_x = 1.0
+        self.pixel_aspect_y = 1.0
+        self.filepath = os.path.join(os.path.abspath(os.sep), "tmp", "")
+        self.use_border = False
+        self.use_crop_to_border = False
+        self.use_simplify = False
+        self.border_min_x = 0.0
+        self.border_min_y = 0.0
+        self.border_max_x = 1.0
+        self.border_max_y = 1.0
+
+
+class NodeTree(ID):
+    bl_idname = "NodeTree"
+
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self.nodes = _Nodes(self)
+        self.links = _NodeLinks(self)
+        self.type = "CUSTOM"
+
+
+class Scene(ID):
+    node_tree: props.PointerProperty(type=NodeTree)
+
+    def __init__(self, name: str = ""):
+        super().__init__(name)
+        self.render = RenderSettings()
+        self.camera = None
+        self.frame_current = 1
+        self.frame_start = 1
+        self.frame_end = 250
+        self.collection = Collection("Scene Collection")
+        self.view_layers = bpy_prop_collection([ViewLayer(self)])
+        self.use_nodes = False
+
+    @property
+    def objects(self):
+        return self.collection.all_objects
+
+
+class NodeSocket(bpy_struct):
+    _collection_key = "identifier"
+
+    def __init__(self, node, name: str, identifier: str, is_output: bool):
+        self.node = node
+        self.name = name
+        self.identifier = identifier if identifier is not None else name
+        self.is_output = is_output
+        self.hide = False
+        self.enabled = True
+        self._links = []
+
+    @property
+    def links(self):
+        return tuple(self._links)
+
+    @property
+    def is_linked(self) -> bool:
+        return len(self._links) > 0
+
+
+class NodeLink(bpy_struct):
+    def __init__(self, from_socket: NodeSocket, to_socket: NodeSocket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.from_node = from_socket.node
+        self.to_node = to_socket.node
+        self.is_muted = False
+        self.is_valid = True
+        self.is_hidden = False
+
+
+class _NodeSockets(bpy_prop_collection):
+    def __init__(self, node, is_output: bool):
+        super().__init__()
+        self.__node = node
+        self.__is_output = is_output
+
+    def new(self, type: str, name: str, identifier: str = None, **kwargs):
+        cls = _registry.get(type, NodeSocket)
+        socket = cls.__new__(cls)
+        NodeSocket.__init__(socket, self.__node, name, identifier, self.__is_output)
+        socket.bl_idname = type
+        self._items.append(socket)
+        return socket
+
+    def get(self, key, default=None):
+        return next((x for x in self._items if x.identifier == key), None) or next((x for x in self._items if x.name == key), default)
+
+    def move(self, src: int, dst: int):
+        self._items.insert(dst, self._items.pop(src))
+
+    def remove(self, socket: NodeSocket):
+        tree = self.__node.id_data
+        for link in socket.links:
+            tree.links.remove(link)
+        self._items.remove(socket)
+
+
+class Node(bpy_struct):
+    def __init__(self):
+        self.id_data = None
+        self._name = ""
+        self.label = ""
+        self.location = [0.0, 0.0]
+        self.width = 140.0
+        self.mute = False
+        self.select = False
+        self.hide = False
+        self.color = [0.6, 0.6, 0.6]
+        self.use_custom_color = False
+        self.parent = None
+        self.type = "CUSTOM"
+        self.inputs = _NodeSockets(self, False)
+        self.outputs = _NodeSockets(self, True)
+
+    def __get_name(self):
+        return self._name
+
+    def __set_name(self, value: str):
+        tree = self.id_data
+        self._name = _unique_name((x for x in tree.nodes if x is not self), value) if tree is not None else value
+
+    name = property(__get_name, __set_name)
+
+    def _path(self) -> str:
+        return f"nodes[\"{self._name}\"]"
+
+
+class NodeReroute(Node):
+    bl_idname = "NodeReroute"
+
+    def __init__(self):
+        super().__init__()
+        self.type = "REROUTE"
+        self.inputs.new("NodeSocketColor", "Input")
+        self.outputs.new("NodeSocketColor", "Output")
+
+
+class CompositorNodeImage(Node):
+    bl_idname = "CompositorNodeImage"
+
+    def __init__(self):
+        super().__init__()
+        self.type = "IMAGE"
+        self.image = None
+        self.outputs.new("NodeSocketColor", "Image")
+
+
+class _CurveMapPoint:
+    def __init__(self, x: float, y: float):
+        self.location = [x, y]
+
+
+class _CurveMapPoints(list):
+    def new(self, x: float, y: float) -> _CurveMapPoint:
+        point = _CurveMapPoint(x, y)
+        self.append(point)
+        return point
+
+
+class _CurveMap:
+    def __init__(self):
+        self.points = _CurveMapPoints([_CurveMapPoint(0.0, 0.0), _CurveMapPoint(1.0, 1.0)])
+
+
+class _CurveMapping:
+    # 制御点の間は線形補間とする (Blender のカーブは滑らかに補間される)
+    def __init__(self):
+        self.curves = [_CurveMap()]
+
+    def evaluate(self, curve: _CurveMap, position: float) -> float:
+        points = sorted((x.location for x in curve.points), key=lambda x: x[0])
+        if position <= points[0][0]:
+            return points[0][1]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            if position <= x1:
+                return y0 if x1 == x0 else y0 + (y1 - y0) * (position - x0) / (x1 - x0)
+        return points[-1][1]
+
+
+class ShaderNodeFloatCurve(Node):
+    bl_idname = "ShaderNodeFloatCurve"
+
+    def __init__(self):
+        super().__init__()
+        self.type = "FLOAT_CURVE"
+        self.mapping = _CurveMapping()
+
+
+class _Nodes(bpy_prop_collection):
+    def __init__(self, tree: NodeTree):
+        super().__init__()
+        self.__tree = tree
+        self.active = None
+
+    def new(self, type: str):
+        cls = _registry.get(type)
+        if cls is None or not issubclass(cls, Node):
+            raise RuntimeError(f"Node type {type} undefined")
+        node = cls.__new__(cls)
+        Node.__init__(node)
+        if cls.__init__ is not Node.__init__:
+            cls.__init__(node)
+        node.id_data = self.__tree
+        self._items.append(node)
+        node.name = getattr(cls, "bl_label", type)
+        # Blender と同様に、ツリーに追加してから init() を呼び出す
+        if hasattr(cls, "init"):
+            node.init(_context)
+        return node
+
+    def remove(self, node: Node):
+        for socket in itertools.chain(node.inputs, node.outputs):
+            for link in socket.links:
+                self.__tree.links.remove(link)
+        self._items.remove(node)
+        if self.active is node:
+            self.active = None
+
+
+class _NodeLinks(bpy_prop_collection):
+    def __init__(self, tree: NodeTree):
+        super().__init__()
+        self.__tree = tree
+
+    def new(self, input: NodeSocket, output: NodeSocket, verify_limits: bool = True):
+        from_socket, to_socket = (input, output) if input.is_output else (output, input)
+        # 入力ソケットには1つのリンクのみ接続できる
+        for link in to_socket.links:
+            self.remove(link)
+        link = NodeLink(from_socket, to_socket)
+        from_socket._links.append(link)
+        to_socket._links.append(link)
+        self._items.append(link)
+        return link
+
+    def remove(self, link: NodeLink):
+        link.from_socket._links.remove(link)
+        link.to_socket._links.remove(link)
+        self._items.remove(link)
+        link.is_valid = False
+
+    def clear(self):
+        for link in list(self._items):
+            self.remove(link)
+
+
+class DepsgraphObjectInstance(bpy_struct):
+    def __init__(self, obj: Object, matrix_world: Matrix, is_instance: bool = False, parent: Object = None):
+        self.object = obj
+        self.matrix_world = matrix_world
+        self.is_instance = is_instance
+        self.parent = parent
+        self.instance_object = obj if is_instance else None
+        self.show_self = True
+        self.show_particles = True
+
+
+class DepsgraphUpdate(bpy_struct):
+    def __init__(self, id: ID, is_updated_geometry: bool = False, is_updated_transform: bool = False, is_updated_shading: bool = False):
+        self.id = id
+        self.is_updated_geometry = is_updated_geometry
+        self.is_updated_transform = is_updated_transform
+        self.is_updated_shading = is_updated_shading
+
+
+class Depsgraph(bpy_struct):
+    # 評価済みのデータは元のデータと同一のインスタンスとして扱う
+    def __init__(self, scene: Scene, view_layer: ViewLayer = None, mode: str = "RENDER"):
+        self.scene = scene
+        self.scene_eval = scene
+        self.view_layer = view_layer if view_layer is not None else scene.view_layers[0]
+        self.view_layer_eval = self.view_layer
+        self.mode = mode
+        self.updates = []
+
+    def id_eval_get(self, id: ID):
+        return id
+
+    def tag_update(self, id: ID, geometry: bool = False, transform: bool = True, shading: bool = False):
+        # 計測用: depsgraph の更新通知を積む
+        self.updates.append(DepsgraphUpdate(id, geometry, transform, shading))
+
+    def clear_updates(self):
+        self.updates = []
+
+    @property
+    def object_instances(self):
+        for obj in self.__visible_objects():
+            yield DepsgraphObjectInstance(obj, obj.matrix_world)
+            if obj.type == "EMPTY" and obj.instance_type == "COLLECTION" and obj.instance_collection is not None:
+                for child in obj.instance_collection.all_objects:
+                    yield DepsgraphObjectInstance(child, obj.matrix_world @ child.matrix_world, True, obj)
+
+    def __visible_objects(self):
+        visited = set()
+        def walk(layer_collection: LayerCollection):
+            if layer_collection.exclude or layer_collection.collection.hide_render:
+                return
+            for obj in layer_collection.collection.objects:
+                if obj not in visited and not obj.hide_render:
+                    visited.add(obj)
+                    yield obj
+            for child in layer_collection.children:
+                yield from walk(child)
+        return walk(self.view_layer.layer_collection)
+
+
+class AddonPreferences(bpy_struct):
+    pass
+
+
+class WindowManager(ID):
+    def __init__(self, name: str = "WinMan"):
+        super().__init__(name)
+        self.clipboard = ""
+
+
+class SpaceView3D(bpy_struct):
+    def __init__(self):
+        self.type = "VIEW_3D"
+        self.shading = types.SimpleNamespace(type="SOLID")
+        self.camera = None
+        self.clip_start = 0.01
+        self.clip_end = 1000.0
+        self.local_view = None
+        self.use_local_collections = False
+        self.region_3d = RegionView3D()
+
+
+class RegionView3D(bpy_struct):
+    def __init__(self):
+        self.view_perspective = "PERSP"
+        self.is_perspective = True
+        self.view_matrix = Matrix()
+        self.window_matrix = Matrix()
+
+
+# UI・オペレーターなど、アドオンが継承するだけのクラスは参照された時点で生成する
+_types_module = types.ModuleType("bpy.types")
+for _cls in (bpy_struct, bpy_prop_collection, bpy_prop_collection_idprop, PropertyGroup, ID, ColorManagedInputColorspaceSettings, Image, Mesh, Curve, Camera,
+             Material, Object, Collection, LayerCollection, ViewLayer, RenderSettings, NodeTree, Scene, NodeSocket,
+             NodeLink, Node, NodeReroute, CompositorNodeImage, ShaderNodeFloatCurve, DepsgraphObjectInstance, DepsgraphUpdate, Depsgraph,
+             AddonPreferences, WindowManager, SpaceView3D, RegionView3D):
+    setattr(_types_module, _cls.__name__, _cls)
+_types_module.Struct = bpy_struct
+_types_module.ShaderNodeTree = type("ShaderNodeTree", (NodeTree,), {"bl_idname": "ShaderNodeTree"})
+_types_module.CompositorNodeTree = type("CompositorNodeTree", (NodeTree,), {"bl_idname": "CompositorNodeTree"})
+
+def _types_getattr(name: str):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    cls = _StructMeta(name, (bpy_struct,), {"__module__": "bpy.types"})
+    setattr(_types_module, name, cls)
+    return cls
+
+_types_module.__getattr__ = _types_getattr
+
+
+# bpy.data / bpy.context
+#################################################
+
+class _IDCollection(bpy_prop_collection):
+    def __init__(self, factory):
+        super().__init__()
+        self.__factory = factory
+
+    def new(self, name: str, *args, **kwargs):
+        item = self.__factory(*args, **kwargs)
+        item.name = _unique_name(self._items, name)
+        self._items.append(item)
+        return item
+
+    def remove(self, item, do_unlink: bool = True):
+        self._items.remove(item)
+
+    def clear(self):
+        self._items.clear()
+
+
+def _new_node_tree(type: str):
+    cls = _registry.get(type, NodeTree)
+    tree = cls.__new__(cls)
+    NodeTree.__init__(tree)
+    tree.bl_idname = type
+    return tree
+
+
+class BlendData:
+    def __init__(self):
+        self.filepath = ""
+        self.objects = _IDCollection(lambda object_data=None: Object("", object_data))
+        self.meshes = _IDCollection(lambda: Mesh())
+        self.curves = _IDCollection(lambda type="CURVE": Curve("", type))
+        self.cameras = _IDCollection(lambda: Camera())
+        self.materials = _IDCollection(lambda: Material())
+        self.images = _IDCollection(lambda width=8, height=8, **kwargs: Image("", width, height))
+        self.collections = _IDCollection(lambda: Collection())
+        self.scenes = _IDCollection(lambda: Scene())
+        self.node_groups = _IDCollection(_new_node_tree)
+        self.window_managers = _IDCollection(lambda: WindowManager())
+        self.screens = bpy_prop_collection()
+        self.workspaces = bpy_prop_collection()
+
+
+class _Addon:
+    def __init__(self, module: str, preferences):
+        self.module = module
+        self.preferences = preferences
+
+
+class _Preferences:
+    def __init__(self):
+        self.addons = _AddonCollection()
+
+
+class _AddonCollection(bpy_prop_collection):
+    def __getitem__(self, key):
+        ret = self.get(key)
+        if ret is None:
+            raise KeyError(key)
+        return ret
+
+    def get(self, key, default=None):
+        return next((x for x in self._items if x.module == key), default)
+
+    def add(self, module: str, preferences) -> _Addon:
+        addon = _Addon(module, preferences)
+        self._items.append(addon)
+        return addon
+
+
+class Context:
+    def __init__(self):
+        self.scene = None
+        self.preferences = _Preferences()
+        self.window_manager = None
+        self.space_data = None
+        self.screen = None
+        self.area = None
+        self.region = None
+        self.__view_layer = None
+
+    def __get_view_layer(self):
+        if self.__view_layer is not None:
+            return self.__view_layer
+        return self.scene.view_layers[0] if self.scene is not None else None
+
+    def __set_view_layer(self, value):
+        self.__view_layer = value
+
+    view_layer = property(__get_view_layer, __set_view_layer)
+
+    def evaluated_depsgraph_get(self) -> Depsgraph:
+        return Depsgraph(self.scene, self.view_layer, "VIEWPORT")
+
+
+_context = Context()
+
+
+# モジュールの登録
+#################################################
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    for key, value in attrs.items():
+        setattr(module, key, value)
+    return module
+
+
+def _unsupported(name: str):
+    def func(*args, **kwargs):
+        raise NotImplementedError(f"{name} is not supported by the stand-in bpy")
+    return func
+
+
+class _MessageBus:
+    # bpy.msgbus (型をキーとした購読のみ)
+    # Blender は UI からのプロパティの変更で通知するため、代替では publish_rna() の呼び出しで直ちに通知する
+    def __init__(self):
+        self.__subscriptions = []
+
+    def subscribe_rna(self, key, owner, args, notify, options=set()):
+        self.__subscriptions.append((key, owner, args, notify))
+
+    def clear_by_owner(self, owner):
+        self.__subscriptions = [x for x in self.__subscriptions if x[1] is not owner]
+
+    def publish_rna(self, key):
+        instance = key[0] if isinstance(key, tuple) else key
+        for subscribed_key, _, args, notify in list(self.__subscriptions):
+            if isinstance(subscribed_key, type) and isinstance(instance, subscribed_key):
+                notify(*args)
+
+
+class _Ops:
+    # bpy.ops.xxx.yyy() は呼び出されたら例外とする
+    def __init__(self, path: str = "bpy.ops"):
+        self.__path = path
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Ops(self.__path + "." + name)
+
+    def __call__(self, *args, **kwargs):
+        raise NotImplementedError(f"{self.__path} is not supported by the stand-in bpy")
+
+    def poll(self, *args, **kwargs):
+        return False
+
+
+def install(version: tuple = (4, 2, 0)):
+    # sys.modules に bpy などの代替モジュールを登録する (既に登録済みの場合は何もしない)
+    if isinstance(sys.modules.get("bpy"), types.ModuleType) and getattr(sys.modules["bpy"], "is_standin", False):
+        return sys.modules["bpy"]
+
+    handler_names = ("depsgraph_update_pre", "depsgraph_update_post", "frame_change_pre", "frame_change_post",
+                     "load_pre", "load_post", "save_pre", "save_post", "undo_pre", "undo_post", "redo_pre", "redo_post",
+                     "render_init", "render_pre", "render_post", "render_complete", "render_cancel", "render_write")
+    handlers = _module("bpy.app.handlers", persistent=lambda func: func, **{x: [] for x in handler_names})
+    timers = _module("bpy.app.timers", register=lambda func, first_interval=0.0, persistent=False: None,
+                     unregister=lambda func: None, is_registered=lambda func: False)
+    translations = _module("bpy.app.translations", pgettext=lambda msgid, msgctxt=None: msgid,
+                           pgettext_iface=lambda msgid, msgctxt=None: msgid, pgettext_tip=lambda msgid, msgctxt=None: msgid,
+                           register=lambda name, translations: None, unregister=lambda name: None, locale="en_US")
+    app = _module("bpy.app", version=tuple(version), version_string=".".join(str(x) for x in version),
+                  background=True, handlers=handlers, timers=timers, translations=translations, binary_path="")
+    utils = _module("bpy.utils", register_class=lambda cls: None, unregister_class=lambda cls: None,
+                    user_resource=lambda *args, **kwargs: "", script_path_user=lambda: "",
+                    previews=_module("bpy.utils.previews", new=_unsupported("bpy.utils.previews.new"), remove=lambda x: None))
+    path = _module("bpy.path", abspath=lambda p, **kwargs: p[2:] if p.startswith("//") else p,
+                   basename=lambda p: os.path.basename(p[2:] if p.startswith("//") else p),
+                   ensure_ext=lambda p, ext, case_sensitive=False: p if p.endswith(ext) else p + ext)
+
+    bpy = _module("bpy", types=_types_module, props=props, app=app, utils=utils, path=path, ops=_Ops(),
+                  msgbus=_MessageBus(), data=BlendData(), context=_context, is_standin=True)
+    mathutils = _module("mathutils", Matrix=Matrix, Vector=Vector)
+    # GPU描画は対象外のため、型注釈などで参照される型のみを定義する
+    gpu_types = _module("gpu.types", **{x: type(x, (), {}) for x in ("GPUShader", "GPUTexture", "GPUOffScreen", "Buffer")})
+    gpu = _module("gpu", types=gpu_types, shader=_module("gpu.shader"), state=_module("gpu.state"),
+                  matrix=_module("gpu.matrix"), texture=_module("gpu.texture"))
+    gpu_extras = _module("gpu_extras",
+                         batch=_module("gpu_extras.batch", batch_for_shader=_unsupported("batch_for_shader")),
+                         presets=_module("gpu_extras.presets", draw_texture_2d=_unsupported("draw_texture_2d")))
+    bpy_extras = _module("bpy_extras", anim_utils=_module("bpy_extras.anim_utils"))
+
+    class NodeCategory:
+        def __init__(self, identifier, name, description="", items=None):
+            self.identifier = identifier
+            self.name = name
+            self.description = description
+            self.items = items
+
+    class NodeItem:
+        def __init__(self, nodetype, label=None, settings=None, poll=None):
+            self.nodetype = nodetype
+            self.label = label
+            self.settings = settings
+
+    nodeitems_utils = _module("nodeitems_utils", NodeCategory=NodeCategory, NodeItem=NodeItem,
+                              register_node_categories=lambda identifier, categories: None,
+                              unregister_node_categories=lambda identifier=None: None)
+
+    def rna_idprop_ui_create(item, prop, *, default, **kwargs):
+        item[prop] = default
+
+    modules = {
+        "bpy": bpy, "bpy.types": _types_module, "bpy.props": props, "bpy.app": app, "bpy.app.handlers": handlers,
+        "bpy.app.timers": timers, "bpy.app.translations": translations, "bpy.utils": utils,
+        "bpy.utils.previews": utils.previews, "bpy.path": path,
+        "mathutils": mathutils, "gpu": gpu, "gpu.types": gpu.types, "gpu.shader": gpu.shader, "gpu.state": gpu.state,
+        "gpu_extras": gpu_extras, "gpu_extras.batch": gpu_extras.batch, "gpu_extras.presets": gpu_extras.presets,
+        "blf": _module("blf"), "bpy_extras": bpy_extras, "bpy_extras.anim_utils": bpy_extras.anim_utils,
+        "nodeitems_utils": nodeitems_utils,
+        "rna_prop_ui": _module("rna_prop_ui", rna_idprop_ui_create=rna_idprop_ui_create),
+        "addon_utils": _module("addon_utils", modules=lambda *args, **kwargs: [], enable=_unsupported("addon_utils.enable")),
+    }
+    sys.modules.update(modules)
+    reset_data()
+    return bpy
+
+
+def reset_data():
+    # bpy.data と bpy.context を空の状態に戻す
+    bpy = sys.modules["bpy"]
+    bpy.data = BlendData()
+    bpy.data.window_managers.new("WinMan")
+    _context.scene = None
+    _context.view_layer = None
+    _context.window_manager = bpy.data.window_managers[0]
+    _context.space_data = None
+    return bpy.data
@@ -0,0 +1,235 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# pencil4line_for_blender (ネイティブモジュール) の代替実装
+#
+# ライン描画は行わず、呼び出し回数と描画に渡された内容の規模を記録する
+# C++側のノードのプロパティは、対応する Python 側のクラスの RNA プロパティから bind_schemas() で導出する
+# 実際のネイティブモジュールとの食い違い (プロパティの名前・型・draw_options の初期値) は check_standin.py で確認する
+
+import collections
+import enum
+import os
+import sys
+import types
+
+PLATFORM_MODULE_NAMES = tuple(f"pencil4line_for_blender_{platform}_{version}"
+                              for platform in ("win64", "mac", "linux")
+                              for version in ("39", "310", "311", "311_450", "311_500"))
+
+# カーブのプロパティをサンプリングする点の数
+CURVE_LENGTH = 256
+
+# Python側のソケット(複数接続)に対応するプロパティ
+MULTI_SOCKET_PROPERTIES = frozenset({"line_sets"})
+
+
+class draw_ret(enum.IntEnum):
+    success = 0
+    success_without_license = 1
+    timeout = 2
+    cancelled = 3
+    error_unknown = 4
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.last_draw = {}
+
+    def clear(self):
+        self.calls.clear()
+        self.last_draw = {}
+
+
+recorder = Recorder()
+
+
+class _CppStruct:
+    # dir() で列挙されるのはプロパティのみとする (C++側のクラスと同様)
+    _schema = None
+
+    def __init__(self):
+        schema = type(self)._schema
+        if schema is None:
+            raise RuntimeError(f"{type(self).__name__}: schema is not bound (call standin_native.bind_schemas())")
+        for name, factory in schema:
+            object.__setattr__(self, name, factory())
+        recorder.calls[type(self).__name__] += 1
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_") and not hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__} has no attribute '{name}'")
+        object.__setattr__(self, name, value)
+
+
+def _cpp_type(name: str) -> type:
+    return type(name, (_CppStruct,), {})
+
+
+NODE_TYPE_NAMES = ("line_node", "line_set_node", "brush_settings_node", "brush_detail_node",
+                   "reduction_settings_node", "texture_map_node", "line_functions_node",
+                   "line_render_element", "vector_output")
+
+
+def _is_transferred(rna) -> bool:
+    # UI用・保存用のプロパティはC++側に存在しない
+    name = rna.identifier
+    if name == "name" or name.endswith(("_gui", "_data_str", "_selected_index", "_expanded")):
+        return False
+    if "HIDDEN" in rna.options or "SKIP_SAVE" in rna.options:
+        return False
+    if rna.type == "POINTER":
+        return rna.fixed_type.identifier in ("Object", "Image")
+    return True
+
+
+def _default_factory(rna, enum_types: dict):
+    if rna.is_array:
+        length = rna.array_length
+        value = {"BOOLEAN": False, "INT": 0, "FLOAT": 0.0}[rna.type]
+        return lambda: [value] * length
+    if rna.type == "ENUM":
+        enum_type = enum_types.setdefault(rna.identifier, type(f"pcl4_enum_{rna.identifier}", (int,), {}))
+        return lambda: enum_type(0)
+    if rna.type == "STRING":
+        if "curve" in rna.identifier:
+            return lambda: [1.0] * CURVE_LENGTH
+        # get で接続先のソケットIDを返すプロパティはソケット
+        if rna.getter is not None and rna.default != "":
+            return list if rna.identifier in MULTI_SOCKET_PROPERTIES else (lambda: None)
+        return str
+    if rna.type in ("POINTER",):
+        return lambda: None
+    if rna.type == "COLLECTION":
+        return list
+    return {"BOOLEAN": bool, "INT": int, "FLOAT": float}[rna.type]
+
+
+def bind_schemas(module: types.ModuleType, py_classes: dict):
+    # py_classes: C++側の型名 -> 対応する Python 側のクラス
+    enum_types = {}
+    for type_name, py_class in py_classes.items():
+        cpp_type = getattr(module, type_name)
+        cpp_type._schema = tuple((rna.identifier, _default_factory(rna, enum_types))
+                                 for rna in py_class.bl_rna.properties if _is_transferred(rna))
+    if "line_functions_node" in py_classes:
+        module.line_functions_node._schema += (("_target_materials", list),)
+
+
+class interm_context:
+    def __init__(self):
+        self.draw_options = None
+        self.mesh_color_attributes_on = False
+        self.mesh_color_attributes = []
+        self.platform = ""
+        self.task_name = ""
+        self.__viewport_image_buffer = None
+
+    def cleanup_frame(self):
+        recorder.calls["cleanup_frame"] += 1
+
+    def cleanup_all(self):
+        recorder.calls["cleanup_all"] += 1
+
+    def clear_viewport_image_buffer(self):
+        self.__viewport_image_buffer = None
+
+    def get_viewport_image_buffer(self):
+        return self.__viewport_image_buffer
+
+    def __record(self, name, camera, render_instances, curve_data, line_nodes, line_function_nodes, groups, **kwargs):
+        recorder.calls[name] += 1
+        recorder.last_draw = dict(kind=name,
+                                  render_instances=len(render_instances),
+                                  meshes=len(set(x.mesh for x in render_instances)),
+                                  curve_data=len(curve_data),
+                                  line_nodes=len(line_nodes),
+                                  line_function_nodes=len(line_function_nodes),
+                                  groups=len(groups),
+                                  mesh_color_attributes=len(self.mesh_color_attributes) if self.mesh_color_attributes_on else None,
+                                  objects_cache_valid=self.draw_options.objects_cache_valid if self.draw_options is not None else False,
+                                  **kwargs)
+        return draw_ret.success
+
+    def draw(self, image, camera, render_instances, material_override, curve_data, line_nodes, line_function_nodes,
+             render_elements, vector_outputs, groups):
+        return self.__record("draw", camera, render_instances, curve_data, line_nodes, line_function_nodes, groups,
+                             render_elements=len(render_elements), vector_outputs=len(vector_outputs))
+
+    def draw_for_viewport(self, width, height, camera, render_instances, material_override, curve_data, line_nodes,
+                          line_function_nodes, groups):
+        self.__viewport_image_buffer = (width, height)
+        return self.__record("draw_for_viewport", camera, render_instances, curve_data, line_nodes, line_function_nodes, groups,
+                             width=width, height=height)
+
+
+class draw_options:
+    def __init__(self):
+        self.timeout = 0.0
+        self.line_scale = 1.0
+        self.linesize_absolute_scale = 1.0
+        self.linesize_relative_target_width = 0
+        self.linesize_relative_target_height = 0
+        self.objects_cache_valid = False
+
+
+class interm_camera:
+    def __init__(self, clip_start, clip_end, linesize_relative_type, camera_matrix, projection_matrix):
+        self.clip_start = clip_start
+        self.clip_end = clip_end
+        self.linesize_relative_type = linesize_relative_type
+        self.camera_matrix = camera_matrix
+        self.projection_matrix = projection_matrix
+        recorder.calls["interm_camera"] += 1
+
+
+class interm_render_Instance:
+    __slots__ = ("reference", "matrix", "mesh", "holdout", "object_materials")
+
+    def __init__(self, reference, matrix, mesh, holdout, object_materials):
+        self.reference = reference
+        self.matrix = matrix
+        self.mesh = mesh
+        self.holdout = holdout
+        self.object_materials = object_materials
+
+
+class interm_curve_data:
+    def __init__(self, materials, material_indices):
+        self.materials = list(materials)
+        self.material_indices = list(material_indices)
+        recorder.calls["interm_curve_data"] += 1
+
+
+def create_module(name: str, bin_dir: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__file__ = os.path.join(bin_dir, name + ".so")
+    module.draw_ret = draw_ret
+    module.interm_context = interm_context
+    module.draw_options = draw_options
+    module.interm_camera = interm_camera
+    module.interm_render_Instance = interm_render_Instance
+    module.interm_curve_data = interm_curve_data
+    for type_name in NODE_TYPE_NAMES:
+        setattr(module, type_name, _cpp_type(type_name))
+
+    commit_hash_path = os.path.join(bin_dir, "commitHash.txt")
+    def get_commit_hash():
+        with open(commit_hash_path, "r", encoding="utf-8") as file:
+            return file.read().strip()
+    module.get_commit_hash = get_commit_hash
+    module.set_blender_version = lambda major, minor, patch: recorder.calls.update(("set_blender_version",))
+    module.set_render_app_path = lambda path: recorder.calls.update(("set_render_app_path",))
+    module.simulate_esc_key_press = lambda: None
+    module.create_previews = lambda *args: (None, None, None)
+    module.recorder = recorder
+    return module
+
+
+def install(package_name: str, bin_dir: str) -> types.ModuleType:
+    # 全てのプラットフォーム・バージョンのモジュール名で同一の代替モジュールを登録する
+    module = create_module(PLATFORM_MODULE_NAMES[0], bin_dir)
+    for name in PLATFORM_MODULE_NAMES:
+        sys.modules[f"{package_name}.bin.{name}"] = module
+    return module
@@ -0,0 +1,223 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# 計測用の合成シーンの生成
+#
+# N個のオブジェクト(一部はカーブ・コレクションインスタンス)、L個のラインノード x M個のラインセット、
+# K個のアトリビュートオーバーライド(完全一致とパターン)、コンポジットノードのレンダーエレメントを生成する
+
+import math
+import random
+
+import standin_bpy
+from standin_bpy import Matrix
+
+
+class SceneSpec:
+    def __init__(self, objects: int = 200, lines: int = 2, line_sets: int = 4, overrides: int = 16,
+                 materials: int = 16, curve_ratio: float = 0.1, instanced_collections: int = 2, instances_per_collection: int = 8,
+                 merge_groups: int = 2, render_elements: int = 2, line_functions: int = 2, off_screen_ratio: float = 0.25,
+                 seed: int = 0):
+        self.objects = objects
+        self.lines = lines
+        self.line_sets = line_sets
+        self.overrides = overrides
+        self.materials = materials
+        self.curve_ratio = curve_ratio
+        self.instanced_collections = instanced_collections
+        self.instances_per_collection = instances_per_collection
+        self.merge_groups = merge_groups
+        self.render_elements = render_elements
+        self.line_functions = line_functions
+        self.off_screen_ratio = off_screen_ratio
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class SyntheticScene:
+    def __init__(self, scene, view_layer, tree, objects: list, materials: list):
+        self.scene = scene
+        self.view_layer = view_layer
+        self.tree = tree
+        self.objects = objects
+        self.materials = materials
+
+    def depsgraph(self, mode: str = "RENDER"):
+        return standin_bpy.Depsgraph(self.scene, self.view_layer, mode)
+
+
+def _look_at(location, target) -> Matrix:
+    # カメラの -Z 軸を target に向ける
+    forward = [t - l for t, l in zip(target, location)]
+    length = math.sqrt(sum(x * x for x in forward))
+    z = [-x / length for x in forward]
+    up = [0.0, 0.0, 1.0]
+    x = [up[1] * z[2] - up[2] * z[1], up[2] * z[0] - up[0] * z[2], up[0] * z[1] - up[1] * z[0]]
+    length = math.sqrt(sum(v * v for v in x))
+    x = [v / length for v in x]
+    y = [z[1] * x[2] - z[2] * x[1], z[2] * x[0] - z[0] * x[2], z[0] * x[1] - z[1] * x[0]]
+    return Matrix(((x[0], y[0], z[0], location[0]),
+                   (x[1], y[1], z[1], location[1]),
+                   (x[2], y[2], z[2], location[2]),
+                   (0.0, 0.0, 0.0, 1.0)))
+
+
+def _new_object(bpy, name: str, rng: random.Random, materials: list, is_curve: bool, off_screen: bool):
+    if is_curve:
+        curve = bpy.data.curves.new(name, type="CURVE")
+        for i in range(2):
+            curve.splines.append(standin_bpy.Curve.Spline(8, i))
+        for m in rng.sample(materials, min(2, len(materials))):
+            curve.materials.append(m)
+        obj = bpy.data.objects.new(name, curve)
+    else:
+        mesh = bpy.data.meshes.new(name)
+        mesh.from_pydata(*standin_bpy.box_geometry(rng.uniform(0.2, 1.0)))
+        for m in rng.sample(materials, min(2, len(materials))):
+            mesh.materials.append(m)
+        obj = bpy.data.objects.new(name, mesh)
+    # 画面外のオブジェクトはカメラの背後に配置する
+    distance = rng.uniform(-60.0, -30.0) if off_screen else rng.uniform(-8.0, 8.0)
+    obj.matrix_world = Matrix.Translation((rng.uniform(-8.0, 8.0), distance, rng.uniform(-4.0, 4.0)))
+    return obj
+
+
+def _build_node_tree(addon, bpy, spec: SceneSpec, rng: random.Random, objects: list, materials: list):
+    LineSetNode = addon.node_modules["LineSetNode"]
+    tree = bpy.data.node_groups.new("Pencil+ 4 Line Node Tree", "Pencil4NodeTreeType")
+    line_sets = []
+    for _ in range(spec.lines):
+        line = tree.nodes.new("Pencil4LineNodeType")
+        line.update()
+        for _ in range(spec.line_sets):
+            line_set = line.create_new_node(len(line.inputs) - 1, tree)
+            line.update()
+            line_sets.append(line_set)
+            for socket_id in (LineSetNode.V_BRUSH_SOCKET_ID, LineSetNode.H_BRUSH_SOCKET_ID):
+                brush_settings = line_set.create_new_node(line_set.find_input_socket_index(socket_id), tree)
+                brush_settings.create_new_node(0, tree)
+            line_set.v_size_reduction_on = True
+            line_set.create_new_node(line_set.find_input_socket_index(LineSetNode.V_SIZE_REDUCTION_SOCKET_ID), tree)
+
+    # ラインセットにオブジェクトとマテリアルを割り当てる (一部のオブジェクトはどのラインセットにも含まれない)
+    listed = objects[:max(1, len(objects) * 3 // 4)]
+    for i, obj in enumerate(listed):
+        line_sets[i % len(line_sets)].objects.add().content = obj
+    for i, material in enumerate(materials[:len(materials) // 2]):
+        line_sets[i % len(line_sets)].materials.add().content = material
+    return tree
+
+
+def _add_line_functions(bpy, spec: SceneSpec, materials: list, objects: list):
+    for i in range(min(spec.line_functions, len(materials))):
+        tree = bpy.data.node_groups.new(f"Line Functions {i}", "ShaderNodeTree")
+        node = tree.nodes.new("Pencil4LineFunctionsContainerNodeType")
+        node.outline_on = True
+        node.draw_hidden_lines_of_targets_objects.add().content = objects[i % len(objects)]
+        host = bpy.data.materials.new(f"Line Functions Host {i}")
+        host.node_tree = tree
+        materials[-1 - i].pcl4_line_functions = host
+
+
+def _add_overrides(spec: SceneSpec, rng: random.Random, scene, view_layer, tree):
+    # 完全一致のデータパスと正規表現のパターンを半分ずつ、シーンとビューレイヤーに追加する
+    nodes = list(tree.nodes)
+    for i in range(spec.overrides):
+        source = scene if i % 2 == 0 else view_layer
+        node = nodes[rng.randrange(len(nodes))]
+        prop = next((x for x in node.bl_rna.properties if x.type in ("FLOAT", "INT") and not x.is_array and x.getter is None), None)
+        if prop is None:
+            continue
+        value = getattr(node, prop.identifier)
+        if i % 4 < 2:
+            source[node.path_from_id(prop.identifier)] = value
+        else:
+            prefix = node.name.split(".")[0]
+            source[f"nodes\\[\"{prefix}(\\.\\d+)?\"\\]\\.{prop.identifier}"] = value
+
+
+def _add_compositor(addon, bpy, spec: SceneSpec, scene, view_layer):
+    render_images = addon.render_images
+    width = scene.render.resolution_x * scene.render.resolution_percentage // 100
+    height = scene.render.resolution_y * scene.render.resolution_percentage // 100
+    images = [render_images.get_image(view_layer)]
+    images.extend(render_images.new_element_image(view_layer) for _ in range(spec.render_elements))
+    compositor = bpy.data.node_groups.new("Compositing", "CompositorNodeTree")
+    for image in images:
+        image.scale(width, height)
+        node = compositor.nodes.new("CompositorNodeImage")
+        node.image = image
+    scene.node_tree = compositor
+
+
+def build_scene(addon, spec: SceneSpec) -> SyntheticScene:
+    bpy = addon.bpy
+    standin_bpy.reset_data()
+    addon.PencilNodeTree.clear_cpp_nodes_cache()
+    addon.AttrOverride.invalidate_override_index()
+    rng = random.Random(spec.seed)
+
+    scene = bpy.data.scenes.new("Scene")
+    view_layer = scene.view_layers[0]
+    bpy.context.scene = scene
+    scene.render.resolution_x = 1280
+    scene.render.resolution_y = 720
+
+    camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+    camera.matrix_world = _look_at((0.0, -24.0, 4.0), (0.0, 0.0, 0.0))
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+
+    materials = [bpy.data.materials.new(f"Material {i}") for i in range(max(1, spec.materials))]
+
+    objects = []
+    curve_count = int(spec.objects * spec.curve_ratio)
+    off_screen_count = int(spec.objects * spec.off_screen_ratio)
+    for i in range(spec.objects):
+        obj = _new_object(bpy, f"Object {i}", rng, materials, i < curve_count, i >= spec.objects - off_screen_count)
+        objects.append(obj)
+
+    # 一部のオブジェクトはマージグループのコレクションに配置する
+    group_collections = []
+    for i in range(spec.merge_groups):
+        collection = bpy.data.collections.new(f"Merge Group {i}")
+        collection.pcl4_line_merge_group = True
+        scene.collection.children.link(collection)
+        group_collections.append(collection)
+    for i, obj in enumerate(objects):
+        if len(group_collections) > 0 and i % 5 == 0:
+            group_collections[(i // 5) % len(group_collections)].objects.link(obj)
+        else:
+            scene.collection.objects.link(obj)
+
+    # コレクションインスタンス
+    for i in range(spec.instanced_collections):
+        source = bpy.data.collections.new(f"Instanced {i}")
+        for j in range(spec.instances_per_collection):
+            source.objects.link(_new_object(bpy, f"Instanced {i}.{j}", rng, materials, j % 4 == 0, False))
+        empty = bpy.data.objects.new(f"Instancer {i}", None)
+        empty.instance_type = "COLLECTION"
+        empty.instance_collection = source
+        empty.matrix_world = Matrix.Translation((rng.uniform(-6.0, 6.0), rng.uniform(-6.0, 6.0), 0.0))
+        scene.collection.objects.link(empty)
+
+    tree = _build_node_tree(addon, bpy, spec, rng, objects, materials)
+    _add_line_functions(bpy, spec, materials, objects)
+    _add_overrides(spec, rng, scene, view_layer, tree)
+    _add_compositor(addon, bpy, spec, scene, view_layer)
+    return SyntheticScene(scene, view_layer, tree, objects, materials)
+
+
+def viewport(scene: SyntheticScene, shading: str = "SOLID"):
+    # カメラビューの 3D ビューポート
+    space = standin_bpy.SpaceView3D()
+    space.shading.type = shading
+    space.camera = scene.scene.camera
+    region_3d = space.region_3d
+    region_3d.view_perspective = "CAMERA"
+    region_3d.view_matrix = scene.scene.camera.matrix_world.inverted()
+    render = scene.scene.render
+    region_3d.window_matrix = scene.scene.camera.calc_matrix_camera(scene.depsgraph(), render.resolution_x, render.resolution_y)
+    return space, region_3d
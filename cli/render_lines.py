@@ -0,0 +1,292 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# フレーム範囲を分割し、複数のバックグラウンドの Blender (blender -b) で並列にレンダリングする
+# 各ワーカーはそれぞれのプロセスでアドオンのレンダリングセッションを持ち、担当する連続したフレームを順にレンダリングする
+#
+# 使い方:
+#   python3 cli/render_lines.py --blender <blender> <file.blend> [--frames 1-250] [--workers 4] [--chunk-size 0]
+#                               [--retries 2] [--timeout 600] [--threads 0] [--overwrite] [--report <path>]
+#   python3 cli/render_lines.py --standin --output <dir> [--frames 1-20] ...
+#
+# 出力先に既に存在するフレームはレンダリングしない (--overwrite で無効)
+# 出力先はシーンの出力設定 (render.filepath) から求めるため、コンポジットの File Output ノードの出力は判定に含まない
+# 出力形式が動画の場合は、フレーム単位で分割できないためエラーとする
+# ワーカーの異常終了・タイムアウトでレンダリングされなかったフレームは、--retries の回数まで新しいワーカーで再試行する
+# --standin を指定すると Blender の代わりに benchmarks の代替の bpy・ネイティブモジュールで実行する (動作確認用)
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_lines_worker.py")
+MESSAGE_PREFIX = "PCL4_CLI "
+
+
+def parse_frames(text: str) -> list[int]:
+    # "1-10,15,20-30" の形式
+    frames = set()
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        first, sep, last = item.partition("-")
+        if sep and first:
+            frames.update(range(int(first), int(last) + 1))
+        else:
+            frames.add(int(item))
+    return sorted(frames)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="render_lines")
+    parser.add_argument("blend_file", nargs="?", default=None)
+    parser.add_argument("--blender", default="blender", help="path to the Blender executable")
+    parser.add_argument("--frames", default=None, help="frames to render, e.g. 1-100,120 (default: the frame range of the scene)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4), help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=0, help="frames per worker launch (0: split evenly into 2 chunks per worker)")
+    parser.add_argument("--threads", type=int, default=0, help="render threads per worker (0: cores / workers)")
+    parser.add_argument("--retries", type=int, default=2, help="number of retries of failed frames")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds without a finished frame before a worker is killed")
+    parser.add_argument("--overwrite", action="store_true", help="render frames that already exist on disk")
+    parser.add_argument("--report", default=None, help="write the per-frame results to this JSON file")
+    parser.add_argument("--standin", action="store_true", help="run the workers with the stand-in bpy and native module")
+    parser.add_argument("--output", default=None, help="output directory of the stand-in")
+    parser.add_argument("--standin-objects", type=int, default=50)
+    parser.add_argument("--standin-fail-frames", default="", help="frames on which stand-in workers exit on the first attempt")
+    args = parser.parse_args(argv)
+    if not args.standin and args.blend_file is None:
+        parser.error("blend_file is required")
+    if args.standin and args.output is None:
+        parser.error("--output is required with --standin")
+    args.workers = max(1, args.workers)
+    return args
+
+
+class Chunk:
+    def __init__(self, index: int, frames: list[int], attempt: int):
+        self.index = index
+        self.frames = frames
+        self.attempt = attempt
+
+
+class FrameResult:
+    def __init__(self, frame: int, path: str = None):
+        self.frame = frame
+        self.path = path
+        self.status = "pending"
+        self.time = None
+        self.attempts = 0
+        self.pid = None
+        self.error = None
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def split_chunks(frames: list[int], chunk_size: int) -> list[list[int]]:
+    # 連続したフレームの範囲毎に分割する (ワーカー内でのフレーム間のキャッシュを有効にするため)
+    runs = []
+    for frame in frames:
+        if len(runs) > 0 and runs[-1][-1] + 1 == frame:
+            runs[-1].append(frame)
+        else:
+            runs.append([frame])
+    return [run[i:i + chunk_size] for run in runs for i in range(0, len(run), chunk_size)]
+
+
+class Driver:
+    def __init__(self, args):
+        self.args = args
+        self.results = {}
+        self.lock = threading.Lock()
+        self.finished_count = 0
+        self.render_count = 0
+
+    def worker_command(self, worker_args: list[str]) -> list[str]:
+        args = self.args
+        if args.standin:
+            return [sys.executable, WORKER_SCRIPT, "--standin", "--output", args.output,
+                    "--standin-objects", str(args.standin_objects),
+                    "--standin-fail-frames", args.standin_fail_frames] + worker_args
+        threads = args.threads if args.threads > 0 else max(1, (os.cpu_count() or 1) // args.workers)
+        return [args.blender, "-b", args.blend_file, "-t", str(threads), "--python-exit-code", "1",
+                "--python", WORKER_SCRIPT, "--"] + worker_args
+
+    def run_worker(self, worker_args: list[str], on_message, timeout: float = None) -> tuple[int, list[str]]:
+        # ワーカーの標準出力からメッセージを読み取る
+        # timeout 秒の間にメッセージが無い場合は、ワーカーを終了させる
+        process = subprocess.Popen(self.worker_command(worker_args), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, text=True, errors="replace", bufsize=1)
+        log = collections.deque(maxlen=20)
+        timer = None
+        def restart_timer():
+            nonlocal timer
+            if timer is not None:
+                timer.cancel()
+            if timeout is not None and timeout > 0:
+                timer = threading.Timer(timeout, process.kill)
+                timer.daemon = True
+                timer.start()
+        try:
+            restart_timer()
+            for line in process.stdout:
+                if line.startswith(MESSAGE_PREFIX):
+                    try:
+                        message = json.loads(line[len(MESSAGE_PREFIX):])
+                    except ValueError:
+                        log.append(line.rstrip())
+                        continue
+                    restart_timer()
+                    on_message(message)
+                else:
+                    log.append(line.rstrip())
+            return (process.wait(), list(log))
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    def probe(self) -> list[tuple[int, str]]:
+        frames = []
+        errors = []
+        def on_message(message):
+            if message.get("type") == "probe":
+                frames.extend((int(x[0]), x[1]) for x in message["frames"])
+            elif message.get("type") == "error":
+                errors.append(message["error"])
+        worker_args = ["--probe"]
+        if self.args.frames is not None:
+            worker_args += ["--frames", ",".join(str(x) for x in parse_frames(self.args.frames))]
+        (returncode, log) = self.run_worker(worker_args, on_message)
+        if returncode != 0 or len(errors) > 0:
+            raise RuntimeError("\n".join(errors + log) or f"probe exited with {returncode}")
+        return frames
+
+    def run_chunk(self, chunk: Chunk) -> list[int]:
+        # レンダリングされなかったフレームを返す
+        done = set()
+        def on_message(message):
+            kind = message.get("type")
+            if kind == "ready":
+                with self.lock:
+                    for frame in chunk.frames:
+                        self.results[frame].pid = message.get("pid")
+            elif kind == "frame":
+                frame = int(message["frame"])
+                if frame not in self.results:
+                    return
+                with self.lock:
+                    result = self.results[frame]
+                    result.status = message["status"]
+                    result.time = message.get("time")
+                    result.path = message.get("path", result.path)
+                    if result.status == "done":
+                        done.add(frame)
+                        result.error = None
+                        self.finished_count += 1
+                        print(f"[{self.finished_count}/{self.render_count}] frame {frame}: {result.time:.2f}s (pid {result.pid})", flush=True)
+            elif kind == "error":
+                with self.lock:
+                    for frame in chunk.frames:
+                        self.results[frame].error = message["error"]
+        worker_args = ["--frames", ",".join(str(x) for x in chunk.frames), "--attempt", str(chunk.attempt)]
+        with self.lock:
+            for frame in chunk.frames:
+                self.results[frame].attempts += 1
+                self.results[frame].status = "rendering"
+        (returncode, log) = self.run_worker(worker_args, on_message, self.args.timeout)
+        failed = [x for x in chunk.frames if x not in done]
+        if len(failed) > 0:
+            with self.lock:
+                for frame in failed:
+                    result = self.results[frame]
+                    result.status = "failed"
+                    if result.error is None:
+                        result.error = f"worker exited with {returncode}" + (": " + log[-1] if len(log) > 0 else "")
+                print(f"chunk {chunk.index} (attempt {chunk.attempt + 1}): {len(failed)} frame(s) failed, exit code {returncode}", flush=True)
+                for line in log[-5:]:
+                    print(f"  {line}", flush=True)
+        return failed
+
+    def run(self) -> int:
+        args = self.args
+        start_time = time.perf_counter()
+        for frame, path in self.probe():
+            self.results[frame] = FrameResult(frame, path)
+
+        # 出力済みのフレームは省略する
+        frames = []
+        for frame, result in sorted(self.results.items()):
+            if not args.overwrite and result.path and os.path.exists(result.path):
+                result.status = "skipped"
+            else:
+                frames.append(frame)
+        self.render_count = len(frames)
+        skipped_count = len(self.results) - len(frames)
+        chunk_size = args.chunk_size if args.chunk_size > 0 else max(1, math.ceil(len(frames) / (args.workers * 2)))
+        chunks = [Chunk(i, x, 0) for i, x in enumerate(split_chunks(frames, chunk_size))]
+        print(f"frames: {len(frames)} to render, {skipped_count} already on disk, "
+              f"{len(chunks)} chunk(s) on {args.workers} worker(s)", flush=True)
+
+        # 失敗したフレームは新しいチャンクとして再試行する
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {executor.submit(self.run_chunk, x): x for x in chunks}
+            chunk_count = len(chunks)
+            while len(futures) > 0:
+                finished, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    chunk = futures.pop(future)
+                    failed = future.result()
+                    if len(failed) > 0 and chunk.attempt < args.retries:
+                        for frames in split_chunks(failed, chunk_size):
+                            retry = Chunk(chunk_count, frames, chunk.attempt + 1)
+                            chunk_count += 1
+                            futures[executor.submit(self.run_chunk, retry)] = retry
+
+        wall_time = time.perf_counter() - start_time
+        return self.summarize(wall_time, skipped_count)
+
+    def summarize(self, wall_time: float, skipped_count: int) -> int:
+        results = [x for _, x in sorted(self.results.items())]
+        done = [x for x in results if x.status == "done"]
+        failed = [x for x in results if x.status not in ("done", "skipped")]
+        render_time = sum(x.time or 0.0 for x in done)
+        print(f"done: {len(done)}, skipped: {skipped_count}, failed: {len(failed)}, "
+              f"retried: {sum(1 for x in results if x.attempts > 1)}", flush=True)
+        if len(done) > 0:
+            print(f"wall time: {wall_time:.2f}s, frame time: total {render_time:.2f}s / mean {render_time / len(done):.2f}s, "
+                  f"parallelism: {render_time / wall_time:.2f}", flush=True)
+        for result in failed:
+            print(f"FAILED: frame {result.frame} after {result.attempts} attempt(s): {result.error}", flush=True)
+
+        if self.args.report is not None:
+            with open(self.args.report, "w", encoding="utf-8") as f:
+                json.dump({"blend_file": self.args.blend_file,
+                           "workers": self.args.workers,
+                           "wall_time": wall_time,
+                           "render_time": render_time,
+                           "frames": [x.to_dict() for x in results]}, f, indent=2)
+        return 0 if len(failed) == 0 else 1
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        return Driver(args).run()
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+# render_lines.py から起動されるワーカー
+# 指定されたフレームをレンダリングし、フレーム毎の結果を標準出力に書き出す (Blender のログと区別するため、行頭に MESSAGE_PREFIX を付ける)
+#
+# 使い方:
+#   blender -b <file.blend> --python cli/render_lines_worker.py -- [--frames 1,2,3] [--probe]
+#   python3 cli/render_lines_worker.py --standin --output <dir> [--frames 1,2,3] [--probe]
+#
+# --probe: レンダリングを行わず、各フレームの出力先のパスを書き出す
+# --standin: Blender の代わりに benchmarks の代替の bpy・ネイティブモジュールと合成シーンを使用する
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGE_PREFIX = "PCL4_CLI "
+
+
+def emit(**message):
+    sys.stdout.write(MESSAGE_PREFIX + json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="render_lines_worker")
+    parser.add_argument("--frames", default=None, help="comma separated frame numbers (default: the frame range of the scene)")
+    parser.add_argument("--probe", action="store_true", help="only report the output path of each frame")
+    parser.add_argument("--attempt", type=int, default=0)
+    parser.add_argument("--standin", action="store_true", help="run with the stand-in bpy and native module")
+    parser.add_argument("--output", default=None, help="output directory of the stand-in")
+    parser.add_argument("--standin-objects", type=int, default=50)
+    parser.add_argument("--standin-fail-frames", default="", help="frames on which the stand-in worker exits on the first attempt")
+    args = parser.parse_args(argv)
+    args.frames = [int(x) for x in args.frames.split(",") if x] if args.frames else None
+    args.standin_fail_frames = {int(x) for x in args.standin_fail_frames.split(",") if x}
+    return args
+
+
+def contiguous_runs(frames: list[int]) -> list[tuple[int, int]]:
+    runs = []
+    for frame in sorted(frames):
+        if len(runs) > 0 and runs[-1][1] + 1 == frame:
+            runs[-1] = (runs[-1][0], frame)
+        else:
+            runs.append((frame, frame))
+    return runs
+
+
+# Blender
+def find_addon(bpy) -> str:
+    # このスクリプトを含むアドオンのモジュール名 (エクステンションとしてインストールした場合は bl_ext. から始まる)
+    for name in bpy.context.preferences.addons.keys():
+        module = sys.modules.get(name)
+        if module is not None and os.path.dirname(os.path.abspath(getattr(module, "__file__", "") or "")) == ADDON_DIR:
+            return name
+    import addon_utils
+    name = os.path.basename(ADDON_DIR)
+    if addon_utils.enable(name, default_set=False) is None:
+        return None
+    return name
+
+
+def run_blender(args) -> int:
+    import bpy
+    scene = bpy.context.scene
+    frames = args.frames if args.frames is not None else list(range(scene.frame_start, scene.frame_end + 1, scene.frame_step))
+    # 動画は1つのファイルに書き出すため、フレーム単位で分割・再開できない
+    if scene.render.is_movie_format:
+        emit(type="error", error="Movie output formats are not supported; set the output to an image format")
+        return 1
+    if args.probe:
+        emit(type="probe", frames=[[x, bpy.path.abspath(scene.render.frame_path(frame=x))] for x in frames])
+        return 0
+
+    addon = find_addon(bpy)
+    if addon is None:
+        emit(type="error", error="Pencil+ 4 Line add-on is not available")
+        return 1
+    emit(type="ready", addon=addon, pid=os.getpid())
+
+    # 出力の有無は render_lines.py で判定済みのため、Blender による既存のフレームの省略は行わない
+    scene.render.use_overwrite = True
+    scene.render.use_placeholder = False
+
+    # 連続したフレームはアニメーションとしてレンダリングし、アドオンのレンダリングセッションをフレーム間で使い回す
+    frame_start = {}
+    def on_render_pre(scene, *_):
+        frame_start[scene.frame_current] = time.perf_counter()
+    def on_render_write(scene, *_):
+        frame = scene.frame_current
+        emit(type="frame", frame=frame, status="done",
+             time=time.perf_counter() - frame_start.get(frame, time.perf_counter()),
+             path=bpy.path.abspath(scene.render.frame_path(frame=frame)))
+    bpy.app.handlers.render_pre.append(on_render_pre)
+    bpy.app.handlers.render_write.append(on_render_write)
+    try:
+        scene.frame_step = 1
+        for first, last in contiguous_runs(frames):
+            scene.frame_start = first
+            scene.frame_end = last
+            try:
+                bpy.ops.render.render(animation=True)
+            except RuntimeError as e:
+                emit(type="error", error=str(e))
+                return 1
+    finally:
+        bpy.app.handlers.render_pre.remove(on_render_pre)
+        bpy.app.handlers.render_write.remove(on_render_write)
+    return 0
+
+
+# 代替の bpy・ネイティブモジュール
+def standin_frame_path(output: str, frame: int) -> str:
+    return os.path.join(os.path.abspath(output), f"line_{frame:04d}.json")
+
+
+def run_standin(args) -> int:
+    if args.output is None:
+        emit(type="error", error="--output is required with --standin")
+        return 1
+    sys.path.insert(0, os.path.join(ADDON_DIR, "benchmarks"))
+    import harness
+    import standin_bpy
+    import synthetic_scene
+
+    addon = harness.load_addon()
+    scene = synthetic_scene.build_scene(addon, synthetic_scene.SceneSpec(objects=args.standin_objects))
+    frames = args.frames if args.frames is not None else list(range(scene.scene.frame_start, scene.scene.frame_end + 1))
+    if args.probe:
+        emit(type="probe", frames=[[x, standin_frame_path(args.output, x)] for x in frames])
+        return 0
+    emit(type="ready", addon=addon.package_name, pid=os.getpid())
+
+    # Blender のレンダリングと同様に、ワーカー毎に1つのレンダリングセッションで全フレームを描画する
+    render_session = addon.render_session
+    session = render_session.Pencil4RenderSession()
+    depsgraph = scene.depsgraph()
+    os.makedirs(os.path.abspath(args.output), exist_ok=True)
+    for frame in frames:
+        if frame in args.standin_fail_frames and args.attempt == 0:
+            os._exit(3)
+        start = time.perf_counter()
+
+        # フレームの変更 (pencil4_handler.on_post_frame_change と同じ経路でキャッシュを破棄する)
+        scene.scene.frame_current = frame
+        depsgraph.clear_updates()
+        for obj in scene.objects[frame % 10::10]:
+            obj.matrix_world = standin_bpy.Matrix.Translation(obj.matrix_world.translation + standin_bpy.Vector((0.0, 0.0, 0.01)))
+            depsgraph.tag_update(obj)
+        updates = render_session.ObjectUpdates(depsgraph)
+        addon.PencilNodeTree.invalidate_cpp_nodes_cache()
+        addon.AttrOverride.invalidate_override_index()
+        session.on_frame_change(updates)
+        ret = session.draw_line(depsgraph)
+        session.cleanup_frame(depsgraph)
+        render_session.SceneExtraction.invalidate()
+
+        path = standin_frame_path(args.output, frame)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"frame": frame, "draw_ret": int(ret), "draw": addon.native.recorder.last_draw}, f, default=str)
+        os.replace(path + ".tmp", path)
+        emit(type="frame", frame=frame, status="done" if int(ret) <= 1 else "failed",
+             time=time.perf_counter() - start, path=path)
+    session.cleanup_all(depsgraph)
+    return 0
+
+
+def main() -> int:
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    args = parse_args(argv)
+    return run_standin(args) if args.standin else run_blender(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
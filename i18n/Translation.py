@@ -105,6 +105,8 @@ translation_dict = {
             "オーバーサンプリング",
         (ctxt, "Offscreen Distance"):
             "画面外距離",
+        (ctxt, "Unlisted Objects as Occluders"):
+            "ラインセット外のオブジェクトを遮蔽物として扱う",
 
         # Line Set
         (ctxt, "Line Set"):
@@ -393,6 +395,30 @@ translation_dict = {
         (ctxt, "Pencil+ 4 Line Group"):
             "Pencil+ 4 ライン グループ",
 
+        # Line Quality
+        (ctxt, "Pencil+ 4 Line Quality"):
+            "Pencil+ 4 ライン品質",
+        (ctxt, "Max Over Sampling"):
+            "オーバーサンプリングの上限",
+        (ctxt, "Max Antialiasing"):
+            "アンチエイリアスの上限",
+        (ctxt, "Min Render Priority"):
+            "描画の優先度の下限",
+        (ctxt, "Final"):
+            "最終",
+        (ctxt, "Preview (Simplify)"):
+            "プレビュー (簡略化)",
+        (ctxt, "Viewport"):
+            "ビューポート",
+
+        # Line Tiles
+        (ctxt, "Pencil+ 4 Line Tiles"):
+            "Pencil+ 4 ライン タイル",
+        (ctxt, "Tiles X"):
+            "タイル X",
+        (ctxt, "Vector files are not output when rendering in tiles."):
+            "タイル分割してレンダリングする場合、ベクトルファイルは出力されません。",
+
         # Line Merge Helper
         (ctxt, "Line Merge Helper"):
             "ライン合成ヘルパー",
@@ -440,6 +466,38 @@ translation_dict = {
             "ビューポートプレビューのタイムアウト時間",
         (ctxt, "Abort Rendering when Errors Occur"):
             "エラー発生時にレンダリングを中断する",
+        (ctxt, "Skip Objects Outside the Camera View"):
+            "カメラの視野外のオブジェクトを描画対象から除外する",
+        (ctxt, "Culled Instances"):
+            "除外したインスタンス",
+        (ctxt, "Reduce Resolution while Navigating"):
+            "視点の操作中は解像度を下げる",
+        (ctxt, "Draw Time"):
+            "描画時間",
+        (ctxt, "Interactive Timeout"):
+            "操作中のタイムアウト時間",
+        (ctxt, "Timeouts"):
+            "タイムアウト回数",
+        (ctxt, "Reused Line Images"):
+            "再利用したライン描画結果",
+        (ctxt, "Record Line Rendering Statistics"):
+            "ライン描画の統計情報を記録する",
+        (ctxt, "Reuse Unchanged Geometry between Animation Frames"):
+            "アニメーションのレンダリングで変化のないジオメトリをフレーム間で再利用する",
+        (ctxt, "Skip Unchanged Frames"):
+            "変化のないフレームを省略する",
+        (ctxt, "Cache Viewport Line Frames during Playback"):
+            "再生中にビューポートのライン描画結果をキャッシュする",
+        (ctxt, "Frame Cache Memory (MB)"):
+            "フレームキャッシュのメモリ (MB)",
+        (ctxt, "Frame Cache Format"):
+            "フレームキャッシュの形式",
+        (ctxt, "Half Float"):
+            "半精度浮動小数点",
+        (ctxt, "Cache Frame Range"):
+            "フレーム範囲をキャッシュ",
+        (ctxt, "Cached Frames"):
+            "キャッシュしたフレーム",
 
         (ctxt, "If deleting or uninstalling the add-on fails,"):
             "アドオンの削除や再インストールに失敗する場合、",
@@ -5,78 +5,258 @@ import bpy
 import math
 from ..node_tree.misc.AttrOverride import get_overrided_attr
 
+
 def copy_props(py_instance, cpp_instance, instance_dict=None, context: bpy.types.Context=None, depsgraph: bpy.types.Depsgraph=None):
+    plan = get_transfer_plan(py_instance, type(cpp_instance))
+    plan.write(py_instance, cpp_instance, plan.read(py_instance, context, depsgraph), instance_dict, context, depsgraph)
+
+
+def copy_props_dynamic(py_instance, cpp_instance, instance_dict=None, context: bpy.types.Context=None, depsgraph: bpy.types.Depsgraph=None):
+    # 転送計画を使用せず、プロパティ毎に型を調べて転送する
     for prop_name in (x for x in dir(cpp_instance) if not x.startswith("_")):
-        if not hasattr(py_instance, prop_name):
-            # 該当するプロパティがPython側に存在しない (このコードパスを通るのは基本的に不具合である)
-            print(f"Not transferred: {py_instance.name}.{prop_name} - Property not found.")
-            continue
-        py_value = getattr(py_instance, prop_name)
-        py_type = type(py_value)
+        copy_prop_dynamic(py_instance, cpp_instance, prop_name, instance_dict, context, depsgraph)
+
+
+def copy_prop_dynamic(py_instance, cpp_instance, prop_name: str, instance_dict=None, context: bpy.types.Context=None, depsgraph: bpy.types.Depsgraph=None):
+    if not hasattr(py_instance, prop_name):
+        # 該当するプロパティがPython側に存在しない (このコードパスを通るのは基本的に不具合である)
+        print(f"Not transferred: {py_instance.name}.{prop_name} - Property not found.")
+        return
+    py_value = getattr(py_instance, prop_name)
+    py_type = type(py_value)
+    if context is not None or depsgraph is not None:
+        py_value = get_overrided_attr(py_instance, prop_name, context=context, depsgraph=depsgraph)
+    cpp_value = getattr(cpp_instance, prop_name)
+    cpp_type = type(cpp_value)
+
+    # primitive
+    if cpp_type in [bool, int, float]:
+        if py_instance.bl_rna.properties[prop_name].subtype == "ANGLE":
+            py_value = math.degrees(py_value)
+        elif py_instance.bl_rna.properties[prop_name].subtype == "PERCENTAGE":
+            py_value *= 0.01
+        setattr(cpp_instance, prop_name, py_value)
+    # enum
+    elif cpp_type.__name__.startswith("pcl4_enum_"):
+        enum_items = py_instance.bl_rna.properties[prop_name].enum_items
+        raw_value = next(x.value for x in enum_items if x.identifier == py_value)
+        setattr(cpp_instance, prop_name, cpp_type(raw_value))
+    # vector / color
+    elif cpp_type is list and len(cpp_value) == len(py_value):
+        setattr(cpp_instance, prop_name, py_value)
+    # curve
+    elif cpp_type is list and len(cpp_value) > 1 and py_type is str and "curve" in prop_name:
+        setattr(cpp_instance, prop_name, py_instance.evaluate_curve(py_value, len(cpp_value)))
+    # socket
+    elif cpp_type is type(None) and py_type is str:
         if context is not None or depsgraph is not None:
-            py_value = get_overrided_attr(py_instance, prop_name, context=context, depsgraph=depsgraph)
-        cpp_value = getattr(cpp_instance, prop_name)
+            py_value = py_instance.filtered_socket_id(py_instance.__class__.bl_rna.properties[prop_name].default, context=context, depsgraph=depsgraph)
+        child_node = next((x.get_connected_node(ignore_muted_link = True) for x in py_instance.inputs if x.identifier == py_value), None)
+        if instance_dict is not None and child_node is not None and child_node in instance_dict:
+            child_cpp_instance = instance_dict[child_node]
+            setattr(cpp_instance, prop_name, child_cpp_instance)
+    # socket(multi)
+    elif cpp_type is list and py_type is str:
+        if context is not None or depsgraph is not None:
+            py_value = py_instance.filtered_socket_id(py_instance.__class__.bl_rna.properties[prop_name].default, context=context, depsgraph=depsgraph)
+        if instance_dict is not None:
+            child_nodes = (x.get_connected_node(ignore_muted_link = True) for x in py_instance.inputs if x.identifier.startswith(py_value))
+            for n in child_nodes:
+                if n is None or n not in instance_dict:
+                    continue
+                child_cpp_instance = instance_dict[n]
+                cpp_value.append(child_cpp_instance)
+            setattr(cpp_instance, prop_name, cpp_value)
+    # string
+    elif cpp_type is str and py_type is str:
+        setattr(cpp_instance, prop_name, py_value)
+    # object
+    elif cpp_type is type(None) and py_type is bpy.types.Object:
+        setattr(cpp_instance, prop_name, _evaluated_object(py_value, depsgraph))
+    # objects or materials
+    elif cpp_type is list and py_type.__name__ == "bpy_prop_collection_idprop":
+        for o in py_value:
+            cpp_value.append(o.content)
+        setattr(cpp_instance, prop_name, cpp_value)
+    # image
+    elif cpp_type is type(None) and py_type is bpy.types.Image:
+        setattr(cpp_instance, prop_name, py_value)
+    # objectやtextureが代入されていないとき
+    elif cpp_type is type(None) and py_type is type(None):
+        pass
+    else:
+        # プロパティの転送条件漏れ (このコードパスを通るのは基本的に不具合である)
+        print(f"Not transferred: {prop_name} - py:{py_type} -> cpp:{cpp_type}")
+
+
+def _evaluated_object(py_value, depsgraph: bpy.types.Depsgraph):
+    if py_value is not None and depsgraph is not None:
+        eval_object = next((x.object for x in depsgraph.object_instances if x.object.original.override_library is not None and x.object.original.override_library.reference == py_value), depsgraph.id_eval_get(py_value))
+        if eval_object is not None:
+            return eval_object
+    return py_value
+
+
+# Pythonのクラス・C++のクラスの組み合わせ毎に一度だけ構築するプロパティ転送手順
+# read()で転送する値を解決し、write()でC++側のインスタンスへ書き込む
+# 動的に転送するプロパティを含まない場合(cacheable)、read()が返す値はハッシュ可能である
+class TransferPlan:
+    def __init__(self, py_instance, cpp_instance):
+        self.__readers = []
+        self.__writers = []
+        self.__socket_indices = []
+        self.cacheable = True
+        rna_properties = py_instance.bl_rna.properties
+        for prop_name in (x for x in dir(cpp_instance) if not x.startswith("_")):
+            rna = rna_properties.get(prop_name)
+            if rna is None:
+                if hasattr(py_instance, prop_name):
+                    self.__add_dynamic(prop_name)
+                else:
+                    self.__add(None, self.__missing_writer(prop_name))
+                continue
+            if not self.__add_step(prop_name, rna, getattr(cpp_instance, prop_name)):
+                self.__add_dynamic(prop_name)
+
+    def read(self, py_instance, context: bpy.types.Context=None, depsgraph: bpy.types.Depsgraph=None) -> tuple:
+        if context is not None:
+            get = lambda struct, prop_name: get_overrided_attr(struct, prop_name, context=context)
+        elif depsgraph is not None:
+            get = lambda struct, prop_name: get_overrided_attr(struct, prop_name, depsgraph=depsgraph)
+        else:
+            get = getattr
+        return tuple(reader(py_instance, get, context, depsgraph) if reader is not None else None for reader in self.__readers)
+
+    def write(self, py_instance, cpp_instance, values: tuple, instance_dict=None, context: bpy.types.Context=None, depsgraph: bpy.types.Depsgraph=None):
+        for writer, value in zip(self.__writers, values):
+            writer(py_instance, cpp_instance, value, instance_dict, context, depsgraph)
+
+    def child_nodes(self, values: tuple):
+        # read()で解決したソケットの接続先ノードを列挙する
+        for i in self.__socket_indices:
+            value = values[i]
+            if type(value) is tuple:
+                yield from (x for x in value if x is not None)
+            elif value is not None:
+                yield value
+
+    def __add(self, reader, writer):
+        self.__readers.append(reader)
+        self.__writers.append(writer)
+
+    def __add_dynamic(self, prop_name: str):
+        self.cacheable = False
+        self.__add(None, lambda py, cpp, value, instance_dict, context, depsgraph:
+                   copy_prop_dynamic(py, cpp, prop_name, instance_dict, context, depsgraph))
+
+    @staticmethod
+    def __missing_writer(prop_name: str):
+        def writer(py, cpp, value, instance_dict, context, depsgraph):
+            # 該当するプロパティがPython側に存在しない (このコードパスを通るのは基本的に不具合である)
+            print(f"Not transferred: {py.name}.{prop_name} - Property not found.")
+        return writer
+
+    def __add_step(self, prop_name: str, rna: bpy.types.Property, cpp_value) -> bool:
         cpp_type = type(cpp_value)
+        rna_type = rna.type
+
+        def set_value(py, cpp, value, instance_dict, context, depsgraph):
+            setattr(cpp, prop_name, value)
+
+        def set_value_if_not_none(py, cpp, value, instance_dict, context, depsgraph):
+            if value is not None:
+                setattr(cpp, prop_name, value)
 
         # primitive
-        if cpp_type in [bool, int, float]:
-            if py_instance.bl_rna.properties[prop_name].subtype == "ANGLE":
-                py_value = math.degrees(py_value)
-            elif py_instance.bl_rna.properties[prop_name].subtype == "PERCENTAGE":
-                py_value *= 0.01
-            setattr(cpp_instance, prop_name, py_value)
+        if cpp_type in (bool, int, float):
+            if rna.subtype == "ANGLE":
+                self.__add(lambda py, get, context, depsgraph: math.degrees(get(py, prop_name)), set_value)
+            elif rna.subtype == "PERCENTAGE":
+                self.__add(lambda py, get, context, depsgraph: get(py, prop_name) * 0.01, set_value)
+            else:
+                self.__add(lambda py, get, context, depsgraph: get(py, prop_name), set_value)
+            return True
+
         # enum
-        elif cpp_type.__name__.startswith("pcl4_enum_"):
-            enum_items = py_instance.bl_rna.properties[prop_name].enum_items
-            raw_value = next(x.value for x in enum_items if x.identifier == py_value)
-            setattr(cpp_instance, prop_name, cpp_type(raw_value))
-        # vector / color
-        elif cpp_type is list and len(cpp_value) == len(py_value):
-            setattr(cpp_instance, prop_name, py_value)
-        # curve
-        elif cpp_type is list and len(cpp_value) > 1 and py_type is str and "curve" in prop_name:
-            setattr(cpp_instance, prop_name, py_instance.evaluate_curve(py_value, len(cpp_value)))
-        # socket
-        elif cpp_type is type(None) and py_type is str:
-            if context is not None or depsgraph is not None:
-                py_value = py_instance.filtered_socket_id(py_instance.__class__.bl_rna.properties[prop_name].default, context=context, depsgraph=depsgraph)
-            child_node = next((x.get_connected_node(ignore_muted_link = True) for x in py_instance.inputs if x.identifier == py_value), None)
-            if instance_dict is not None and child_node is not None and child_node in instance_dict:
-                child_cpp_instance = instance_dict[child_node]
-                setattr(cpp_instance, prop_name, child_cpp_instance)
-        # socket(multi)
-        elif cpp_type is list and py_type is str:
-            if context is not None or depsgraph is not None:
-                py_value = py_instance.filtered_socket_id(py_instance.__class__.bl_rna.properties[prop_name].default, context=context, depsgraph=depsgraph)
-            if instance_dict is not None:
-                child_nodes = (x.get_connected_node(ignore_muted_link = True) for x in py_instance.inputs if x.identifier.startswith(py_value))
-                for n in child_nodes:
-                    if n is None or n not in instance_dict:
-                        continue
-                    child_cpp_instance = instance_dict[n]
-                    cpp_value.append(child_cpp_instance)
-                setattr(cpp_instance, prop_name, cpp_value)
+        if cpp_type.__name__.startswith("pcl4_enum_"):
+            if rna_type != "ENUM":
+                return False
+            enum_table = {x.identifier: cpp_type(x.value) for x in rna.enum_items}
+            self.__add(lambda py, get, context, depsgraph: enum_table[get(py, prop_name)], set_value)
+            return True
+
+        if cpp_type is list:
+            # vector / color
+            if rna_type in ("FLOAT", "INT", "BOOLEAN"):
+                if rna.array_length == 0 or rna.array_length != len(cpp_value):
+                    return False
+                self.__add(lambda py, get, context, depsgraph: tuple(get(py, prop_name)), set_value)
+                return True
+            # curve
+            if rna_type == "STRING" and len(cpp_value) > 1 and "curve" in prop_name:
+                length = len(cpp_value)
+                self.__add(lambda py, get, context, depsgraph: tuple(py.evaluate_curve(get(py, prop_name), length)), set_value)
+                return True
+            if len(cpp_value) > 0:
+                return False
+            # socket(multi)
+            if rna_type == "STRING":
+                socket_id = rna.default
+                def read_sockets(py, get, context, depsgraph):
+                    prefix = py.filtered_socket_id(socket_id, context=context, depsgraph=depsgraph) if context is not None or depsgraph is not None else getattr(py, prop_name)
+                    return tuple(x.get_connected_node(ignore_muted_link = True) for x in py.inputs if x.identifier.startswith(prefix))
+                def write_sockets(py, cpp, value, instance_dict, context, depsgraph):
+                    if instance_dict is not None:
+                        setattr(cpp, prop_name, [instance_dict[n] for n in value if n is not None and n in instance_dict])
+                self.__socket_indices.append(len(self.__readers))
+                self.__add(read_sockets, write_sockets)
+                return True
+            # objects or materials
+            if rna_type == "COLLECTION":
+                self.__add(lambda py, get, context, depsgraph: tuple(o.content for o in get(py, prop_name)), lambda py, cpp, value, instance_dict, context, depsgraph: setattr(cpp, prop_name, list(value)))
+                return True
+            return False
+
+        if cpp_type is type(None):
+            # socket
+            if rna_type == "STRING":
+                socket_id = rna.default
+                def read_socket(py, get, context, depsgraph):
+                    identifier = py.filtered_socket_id(socket_id, context=context, depsgraph=depsgraph) if context is not None or depsgraph is not None else getattr(py, prop_name)
+                    return next((x.get_connected_node(ignore_muted_link = True) for x in py.inputs if x.identifier == identifier), None)
+                def write_socket(py, cpp, value, instance_dict, context, depsgraph):
+                    if instance_dict is not None and value is not None and value in instance_dict:
+                        setattr(cpp, prop_name, instance_dict[value])
+                self.__socket_indices.append(len(self.__readers))
+                self.__add(read_socket, write_socket)
+                return True
+            if rna_type == "POINTER":
+                # object
+                if rna.fixed_type.identifier == "Object":
+                    self.__add(lambda py, get, context, depsgraph: _evaluated_object(get(py, prop_name), depsgraph), set_value_if_not_none)
+                    return True
+                # image
+                if rna.fixed_type.identifier == "Image":
+                    self.__add(lambda py, get, context, depsgraph: get(py, prop_name), set_value_if_not_none)
+                    return True
+            return False
+
         # string
-        elif cpp_type is str and py_type is str:
-            setattr(cpp_instance, prop_name, py_value)
-        # object
-        elif cpp_type is type(None) and py_type is bpy.types.Object:
-            if py_value is not None and depsgraph is not None:
-                eval_object = next((x.object for x in depsgraph.object_instances if x.object.original.override_library is not None and x.object.original.override_library.reference == py_value), depsgraph.id_eval_get(py_value)) 
-                if eval_object is not None:
-                    py_value = eval_object
-            setattr(cpp_instance, prop_name, py_value)
-        # objects or materials
-        elif cpp_type is list and py_type.__name__ == "bpy_prop_collection_idprop":
-            for o in py_value:
-                cpp_value.append(o.content)
-            setattr(cpp_instance, prop_name, cpp_value)
-        # image
-        elif cpp_type is type(None) and py_type is bpy.types.Image:
-            setattr(cpp_instance, prop_name, py_value)
-        # objectやtextureが代入されていないとき
-        elif cpp_type is type(None) and py_type is type(None):
-            pass
-        else:
-            # プロパティの転送条件漏れ (このコードパスを通るのは基本的に不具合である)
-            print(f"Not transferred: {prop_name} - py:{py_type} -> cpp:{cpp_type}")    
\ No newline at end of file
+        if cpp_type is str and rna_type == "STRING":
+            self.__add(lambda py, get, context, depsgraph: get(py, prop_name), set_value)
+            return True
+
+        return False
+
+
+_transfer_plans: dict[tuple[type, type], TransferPlan] = {}
+
+def get_transfer_plan(py_instance, cpp_type: type) -> TransferPlan:
+    # 転送計画は新たに生成したC++側のインスタンスから構築する
+    # C++側のプロパティの名前と型・配列の長さはクラス毎に固定であり、インスタンスの状態には依存しないため、クラスの組み合わせをキーとする
+    key = (type(py_instance), cpp_type)
+    plan = _transfer_plans.get(key)
+    if plan is None:
+        plan = TransferPlan(py_instance, cpp_type())
+        _transfer_plans[key] = plan
+    return plan
@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+if "bpy" in locals():
+    import imp
+    imp.reload(Translation)
+else:
+    from ..i18n import Translation
+
+import bpy
+
+
+# ノードの値を変更せずに、C++側のノードへ転送する値の上限・無効化を行う品質設定
+# レンダリング時は簡略化(render.use_simplify)の有無で Final / Preview を、ビューポートでは Viewport を使用する
+class LineQualityProfile(bpy.types.PropertyGroup):
+    edge_categories = ("intersection", "smooth", "material", "selected", "normal_angle", "wireframe")
+    hidden_line_props = tuple(f"h_{x}_on" for x in ("outline", "object") + edge_categories)
+
+    max_over_sampling: bpy.props.IntProperty(default=4, min=1, max=4)
+    max_antialiasing: bpy.props.FloatProperty(default=2.0, min=0.0, max=2.0, step=1.0)
+    hidden_lines: bpy.props.BoolProperty(default=True)
+    intersection: bpy.props.BoolProperty(default=True)
+    smooth: bpy.props.BoolProperty(default=True)
+    material: bpy.props.BoolProperty(default=True)
+    selected: bpy.props.BoolProperty(default=True)
+    normal_angle: bpy.props.BoolProperty(default=True)
+    wireframe: bpy.props.BoolProperty(default=True)
+    min_render_priority: bpy.props.IntProperty(default=0, min=0, max=65535)
+
+    def key(self) -> tuple:
+        return (self.max_over_sampling, self.max_antialiasing, self.hidden_lines, self.min_render_priority) +\
+            tuple(getattr(self, x) for x in self.edge_categories)
+
+    def skips_line(self, render_priority: int) -> bool:
+        return render_priority < self.min_render_priority
+
+    def apply(self, py_node, cpp_node):
+        # generate_cpp_nodes でノードの値を書き込んだ後に呼び出す
+        node_type = py_node.__class__.__name__
+        if node_type == "LineNode":
+            cpp_node.over_sampling = min(cpp_node.over_sampling, self.max_over_sampling)
+            cpp_node.antialiasing = min(cpp_node.antialiasing, self.max_antialiasing)
+        elif node_type == "LineSetNode":
+            if not self.hidden_lines:
+                for prop_name in self.hidden_line_props:
+                    setattr(cpp_node, prop_name, False)
+            for category in self.edge_categories:
+                if not getattr(self, category):
+                    setattr(cpp_node, f"v_{category}_on", False)
+                    setattr(cpp_node, f"h_{category}_on", False)
+
+    def draw(self, layout):
+        layout.prop(self, "max_over_sampling", text="Max Over Sampling", text_ctxt=Translation.ctxt)
+        layout.prop(self, "max_antialiasing", text="Max Antialiasing", text_ctxt=Translation.ctxt)
+        layout.prop(self, "min_render_priority", text="Min Render Priority", text_ctxt=Translation.ctxt)
+        layout.prop(self, "hidden_lines", text="Hidden Lines", text_ctxt=Translation.ctxt)
+        col = layout.column(heading="Edge", heading_ctxt=Translation.ctxt)
+        col.prop(self, "intersection", text="Intersection", text_ctxt=Translation.ctxt)
+        col.prop(self, "smooth", text="Smoothing Boundary", text_ctxt=Translation.ctxt)
+        col.prop(self, "material", text="Material ID Boundary", text_ctxt=Translation.ctxt)
+        col.prop(self, "selected", text="Selected Edges", text_ctxt=Translation.ctxt)
+        col.prop(self, "normal_angle", text="Normal Angle", text_ctxt=Translation.ctxt)
+        col.prop(self, "wireframe", text="Wireframe", text_ctxt=Translation.ctxt)
+
+
+class SceneLineQuality(bpy.types.PropertyGroup):
+    enabled: bpy.props.BoolProperty(default=False)
+    final: bpy.props.PointerProperty(type=LineQualityProfile)
+    preview: bpy.props.PointerProperty(type=LineQualityProfile)
+    viewport: bpy.props.PointerProperty(type=LineQualityProfile)
+
+
+def get_active_profile(depsgraph: bpy.types.Depsgraph) -> LineQualityProfile:
+    if depsgraph is None:
+        return None
+    scene = depsgraph.scene
+    quality = scene.pencil4_line_quality
+    if not quality.enabled:
+        return None
+    if depsgraph.mode == "VIEWPORT":
+        return quality.viewport
+    return quality.preview if scene.render.use_simplify else quality.final
+
+
+class PCL4_PT_LineQuality(bpy.types.Panel):
+    bl_space_type = "PROPERTIES"
+    bl_region_type = "WINDOW"
+    bl_context = "render"
+    bl_label = "Pencil+ 4 Line Quality"
+    bl_translation_context = Translation.ctxt
+    bl_options = {"DEFAULT_CLOSED"}
+    bl_order = 10000
+
+    def draw_header(self, context):
+        self.layout.prop(context.scene.pencil4_line_quality, "enabled", text="")
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        quality = context.scene.pencil4_line_quality
+        layout.enabled = quality.enabled
+
+        render_profile = "preview" if context.scene.render.use_simplify else "final"
+        for name, text in (("final", "Final"), ("preview", "Preview (Simplify)"), ("viewport", "Viewport")):
+            box = layout.box()
+            box.active = name in (render_profile, "viewport")
+            box.label(text=text, text_ctxt=Translation.ctxt)
+            getattr(quality, name).draw(box.column())
+
+
+def register_props():
+    bpy.types.Scene.pencil4_line_quality = bpy.props.PointerProperty(type=SceneLineQuality)
+
+def unregister_props():
+    del(bpy.types.Scene.pencil4_line_quality)
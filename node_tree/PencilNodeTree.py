@@ -14,6 +14,7 @@ from .misc.IDMap import ObjectIDMap
 from .misc import DataUtils
 from .misc import GuiUtils
 from .misc import AttrOverride
+from . import PencilLineQuality
 from .nodes.LineNode import LineNode
 from .nodes.LineSetNode import LineSetNode
 from .nodes.BrushSettingsNode import BrushSettingsNode
@@ -25,6 +26,50 @@ from .nodes.PencilNodeMixin import PencilNodeMixin
 from ..i18n import Translation
 
 
+# generate_cpp_nodes で生成したC++側のノードのキャッシュ
+# 評価結果(アトリビュートオーバーライドや評価済みオブジェクト)は depsgraph 毎に異なるため、depsgraph 毎に保持する
+class CppNodesCache:
+    class NodeState:
+        def __init__(self, cpp_type: type, values: tuple, children_enabled: tuple, cpp_node):
+            self.cpp_type = cpp_type
+            self.values = values
+            self.children_enabled = children_enabled
+            self.cpp_node = cpp_node
+
+    def __init__(self):
+        self.generation = -1
+        self.node_states = {}
+        self.result = None
+        self.relevance = None
+        self.quality_key = None
+
+    dependent_id_types = (bpy.types.NodeTree, bpy.types.Material, bpy.types.Collection, bpy.types.Image)
+    generation = 0
+    # ノードの編集回数 (フレームの変更などでは変化しない)
+    edit_count = 0
+    # シーン毎のアトリビュートオーバーライドの値
+    override_source_values = {}
+    __caches = {}
+    __max_caches = 4
+
+    @classmethod
+    def get(cls, depsgraph: bpy.types.Depsgraph):
+        key = depsgraph.as_pointer() if depsgraph is not None else 0
+        cache = cls.__caches.pop(key, None)
+        if cache is None:
+            cache = CppNodesCache()
+            while len(cls.__caches) >= cls.__max_caches:
+                cls.__caches.pop(next(iter(cls.__caches)))
+        cls.__caches[key] = cache
+        return cache
+
+    @classmethod
+    def clear(cls):
+        cls.__caches.clear()
+        cls.override_source_values.clear()
+        cls.generation += 1
+
+
 class PencilNodeTree(bpy.types.NodeTree):
     bl_idname = "Pencil4NodeTreeType"
     bl_label = "Pencil+ 4 Line"
@@ -64,8 +109,7 @@ class PencilNodeTree(bpy.types.NodeTree):
         return True
 
     def update(self):
-        for screen in bpy.data.screens:
-            GuiUtils.update_view3d_area(screen)
+        PencilNodeTree.on_nodes_changed()
 
         if self.first_update:
             if self.is_entity():
@@ -97,6 +141,13 @@ class PencilNodeTree(bpy.types.NodeTree):
 
     @classmethod
     def generate_cpp_nodes(cls, depsgraph: bpy.types.Depsgraph=None):
+        # ノードグラフに変更がなければ前回生成したC++側のノードをそのまま返す
+        cache = CppNodesCache.get(depsgraph)
+        quality = PencilLineQuality.get_active_profile(depsgraph)
+        quality_key = quality.key() if quality is not None else None
+        if cache.result is not None and cache.generation == CppNodesCache.generation and cache.quality_key == quality_key:
+            return (list(cache.result[0]), list(cache.result[1]))
+
         if platform.system() == "Windows":
             if sys.version_info.major == 3 and sys.version_info.minor == 9:
                 from ..bin import pencil4line_for_blender_win64_39 as cpp
@@ -134,8 +185,8 @@ class PencilNodeTree(bpy.types.NodeTree):
                 else:
                     from ..bin import pencil4line_for_blender_linux_311_500 as cpp
 
-        # C++側に渡すためのノードのインスタンスを生成
-        node_dict = {}
+        # C++側に渡すためのノードの型を決定
+        cpp_type_dict = {}
 
         # 全てのPencilNodeTree配下のノードを列挙
         for py_node in cls.__enumerate_all_nodes_for_render():
@@ -144,20 +195,24 @@ class PencilNodeTree(bpy.types.NodeTree):
             if isinstance(py_node, LineNode):
                 if not AttrOverride.get_overrided_attr(py_node, "is_active", depsgraph=depsgraph):
                     continue
-                cpp_node = cpp.line_node()
+                if quality is not None and quality.skips_line(AttrOverride.get_overrided_attr(py_node, "render_priority", depsgraph=depsgraph)):
+                    continue
+                cpp_type = cpp.line_node
             elif isinstance(py_node, LineSetNode):
                 if not AttrOverride.get_overrided_attr(py_node, "is_on", depsgraph=depsgraph):
                     continue
-                cpp_node = cpp.line_set_node()
+                cpp_type = cpp.line_set_node
             elif isinstance(py_node, BrushSettingsNode):
-                cpp_node = cpp.brush_settings_node()
+                cpp_type = cpp.brush_settings_node
             elif isinstance(py_node, BrushDetailNode):
-                cpp_node = cpp.brush_detail_node()
+                cpp_type = cpp.brush_detail_node
             elif isinstance(py_node, ReductionSettingsNode):
-                cpp_node = cpp.reduction_settings_node()
+                cpp_type = cpp.reduction_settings_node
             elif isinstance(py_node, TextureMapNode):
-                cpp_node = cpp.texture_map_node()
-            node_dict[py_node] = cpp_node
+                cpp_type = cpp.texture_map_node
+            else:
+                continue
+            cpp_type_dict[py_node] = cpp_type
 
         line_function_nodes_dict = {}
         for mat in bpy.data.materials:
@@ -165,19 +220,142 @@ class PencilNodeTree(bpy.types.NodeTree):
             if py_node:
                 if not py_node in line_function_nodes_dict:
                     line_function_nodes_dict[py_node] = []
-                    cpp_node = cpp.line_functions_node()
-                    node_dict[py_node] = cpp_node
+                    cpp_type_dict[py_node] = cpp.line_functions_node
                 line_function_nodes_dict[py_node].append(mat)
 
+        # 各ノードの転送する値を解決し、前回から値が変化していないノードはC++側のインスタンスを再利用する
+        node_states = {}
+        for py_node, cpp_type in cpp_type_dict.items():
+            plan = cpp_ulits.get_transfer_plan(py_node, cpp_type)
+            node_states[py_node] = (plan, plan.read(py_node, depsgraph=depsgraph))
+
+        # 品質設定が変わった場合は、品質設定を適用済みのC++側のインスタンスを再利用しない
+        prev_node_states = cache.node_states if cache.quality_key == quality_key else {}
+        reusable = {}
+        def is_reusable(py_node) -> bool:
+            ret = reusable.get(py_node)
+            if ret is None:
+                plan, values = node_states[py_node]
+                prev = prev_node_states.get(py_node)
+                children = tuple(plan.child_nodes(values))
+                ret = (plan.cacheable and
+                       prev is not None and
+                       prev.cpp_type is cpp_type_dict[py_node] and
+                       prev.values == values and
+                       prev.children_enabled == tuple(x in cpp_type_dict for x in children))
+                reusable[py_node] = ret
+                ret = ret and all(is_reusable(x) for x in children if x in cpp_type_dict)
+                reusable[py_node] = ret
+            return ret
+
+        node_dict = {}
+        for py_node, cpp_type in cpp_type_dict.items():
+            node_dict[py_node] = prev_node_states[py_node].cpp_node if is_reusable(py_node) else cpp_type()
+
         # 各ノードに値を詰める
-        for py_node, cpp_node in node_dict.items():
-            cpp_ulits.copy_props(py_node, cpp_node, node_dict, depsgraph=depsgraph)
+        cache.node_states = {}
+        for py_node, (plan, values) in node_states.items():
+            cpp_node = node_dict[py_node]
+            if not reusable[py_node]:
+                plan.write(py_node, cpp_node, values, node_dict, depsgraph=depsgraph)
+                if quality is not None:
+                    quality.apply(py_node, cpp_node)
+            cache.node_states[py_node] = CppNodesCache.NodeState(cpp_type_dict[py_node], values,
+                                                                 tuple(x in cpp_type_dict for x in plan.child_nodes(values)), cpp_node)
 
         for py_node, target_materials in line_function_nodes_dict.items():
             node_dict[py_node]._target_materials = target_materials
 
-        return (list(node_dict[x] for x in cls.enumerate_all_lines() if x in node_dict),
-                list(node_dict[x] for x in line_function_nodes_dict))
+        cache.result = (list(node_dict[x] for x in cls.enumerate_all_lines() if x in node_dict),
+                        list(node_dict[x] for x in line_function_nodes_dict))
+        cache.relevance = cls.__calc_line_relevance(cpp_type_dict, line_function_nodes_dict, depsgraph)
+        cache.generation = CppNodesCache.generation
+        cache.quality_key = quality_key
+        return (list(cache.result[0]), list(cache.result[1]))
+
+    @classmethod
+    def get_line_relevance(cls, depsgraph: bpy.types.Depsgraph=None):
+        # ライン描画に関係しうるオブジェクト・マテリアルの集合を返す
+        # ラインセット外のオブジェクトも遮蔽物として扱うラインがある場合は None を返す (全オブジェクトが対象)
+        cls.generate_cpp_nodes(depsgraph)
+        return CppNodesCache.get(depsgraph).relevance
+
+    @classmethod
+    def __calc_line_relevance(cls, cpp_type_dict: dict, line_function_nodes_dict: dict, depsgraph: bpy.types.Depsgraph):
+        objects = set()
+        materials = set()
+        for line in (x for x in cpp_type_dict if isinstance(x, LineNode)):
+            if AttrOverride.get_overrided_attr(line, "unlisted_objects_as_occluders", depsgraph=depsgraph):
+                return None
+            for line_set in (x.get_connected_node(ignore_muted_link = True) for x in line.inputs):
+                if line_set is None or line_set not in cpp_type_dict:
+                    continue
+                objects.update(x.content for x in line_set.objects if x.content is not None)
+                materials.update(x.content for x in line_set.materials if x.content is not None)
+        for py_node in line_function_nodes_dict:
+            for prop_name in ("draw_hidden_lines_of_targets_objects", "mask_hidden_lines_of_targets_objects"):
+                objects.update(x.content for x in getattr(py_node, prop_name) if x.content is not None)
+            for prop_name in ("draw_hidden_lines_of_targets_materials", "mask_hidden_lines_of_targets_materials"):
+                materials.update(x.content for x in getattr(py_node, prop_name) if x.content is not None)
+            materials.update(line_function_nodes_dict[py_node])
+        return (objects, materials)
+
+    @staticmethod
+    def invalidate_cpp_nodes_cache():
+        CppNodesCache.generation += 1
+
+    @staticmethod
+    def on_nodes_changed():
+        # ノードの追加・削除・接続(update)とプロパティの変更(メッセージバス・プロパティの update)で呼び出す
+        # ラインのノードツリーはシーンから参照されないため、ノードの編集は depsgraph の更新として通知されない
+        # ノード名の変更などでデータパスが変わるため、アトリビュートオーバーライドのインデックスも破棄する
+        CppNodesCache.generation += 1
+        CppNodesCache.edit_count += 1
+        AttrOverride.invalidate_override_index()
+        for screen in bpy.data.screens:
+            GuiUtils.update_view3d_area(screen)
+
+    # メッセージバスで変更を購読する型 (ノードと、ノードが保持するコレクションの要素)
+    # ファイルの読み込みで購読が解除されるため、on_load_post で再度購読する
+    msgbus_node_types = (LineNode, LineSetNode, BrushSettingsNode, BrushDetailNode, ReductionSettingsNode, TextureMapNode,
+                         LineFunctionsContainerNode, DataUtils.ObjectElement, DataUtils.MaterialElement)
+    msgbus_owner = object()
+
+    @classmethod
+    def subscribe_node_changes(cls):
+        bpy.msgbus.clear_by_owner(cls.msgbus_owner)
+        for node_type in cls.msgbus_node_types:
+            bpy.msgbus.subscribe_rna(key=node_type, owner=cls.msgbus_owner, args=(), notify=cls.on_nodes_changed)
+
+    @classmethod
+    def unsubscribe_node_changes(cls):
+        bpy.msgbus.clear_by_owner(cls.msgbus_owner)
+
+    @staticmethod
+    def get_cpp_nodes_generation() -> int:
+        return CppNodesCache.generation
+
+    @staticmethod
+    def get_nodes_edit_count() -> int:
+        return CppNodesCache.edit_count
+
+    @staticmethod
+    def clear_cpp_nodes_cache():
+        CppNodesCache.clear()
+
+    @staticmethod
+    def on_depsgraph_update(depsgraph: bpy.types.Depsgraph):
+        # ノードツリー・マテリアル(Line Functions)・コレクション・画像の変更を検出する
+        # シーンの更新は選択・移動・フレームの変更などでも通知されるため、アトリビュートオーバーライドの値が変化した場合のみ無効化する
+        invalidated = any(isinstance(x.id, CppNodesCache.dependent_id_types) for x in depsgraph.updates)
+        if any(isinstance(x.id, bpy.types.Scene) for x in depsgraph.updates):
+            scene = depsgraph.scene
+            values = AttrOverride.get_override_source_values(scene)
+            if CppNodesCache.override_source_values.get(scene.as_pointer()) != values:
+                CppNodesCache.override_source_values[scene.as_pointer()] = values
+                invalidated = True
+        if invalidated:
+            CppNodesCache.generation += 1
 
     def enumerate_lines(self):
         return sorted((x for x in self.nodes if x.__class__.__name__ == "LineNode"),
@@ -5,30 +5,119 @@ import bpy
 from rna_prop_ui import rna_idprop_ui_create 
 from typing import Tuple 
 import re
+import itertools
 from ...i18n import Translation
 
+# オーバーライド元(シーン・ビューレイヤー)のIDプロパティから構築する検索用インデックス
+# 完全一致のキーと、コンパイル済みの正規表現パターン、データパス毎の検索結果を保持する
+class OverrideIndex:
+    generation = 0
+    __indices = {}
+    __data_paths = {}
+    __data_paths_generation = -1
+    __source_keys = {}
+
+    def __init__(self, source: bpy.types.ID):
+        self.generation = OverrideIndex.generation
+        self.keys = set()
+        self.patterns = []
+        for key in source.keys():
+            self.keys.add(key)
+            try:
+                self.patterns.append((key, re.compile(key)))
+            except:
+                pass
+        self.memo = {}
+
+    def find(self, data_path: str) -> Tuple[str, bool]:
+        # 戻り値: (一致したキー, パターンによる一致かどうか)
+        if data_path in self.keys:
+            return data_path, False
+        ret = self.memo.get(data_path)
+        if ret is None:
+            ret = next(((key, True) for key, pattern in self.patterns if pattern.fullmatch(data_path)), (None, False))
+            self.memo[data_path] = ret
+        return ret
+
+    @classmethod
+    def get(cls, source: bpy.types.ID):
+        key = source.as_pointer()
+        index = cls.__indices.get(key)
+        if index is None or index.generation != cls.generation:
+            index = OverrideIndex(source)
+            cls.__indices[key] = index
+        return index
+
+    @classmethod
+    def data_path(cls, struct: bpy.types.Struct, prop_name: str) -> str:
+        if cls.__data_paths_generation != cls.generation:
+            cls.__data_paths.clear()
+            cls.__data_paths_generation = cls.generation
+        key = (struct.as_pointer(), prop_name)
+        data_path = cls.__data_paths.get(key)
+        if data_path is None:
+            data_path = struct.path_from_id(prop_name)
+            if data_path.endswith("_on_gui"):
+                data_path = data_path[:-len("_gui")]
+            cls.__data_paths[key] = data_path
+        return data_path
+
+    @classmethod
+    def invalidate(cls):
+        cls.generation += 1
+        cls.__indices.clear()
+
+    @classmethod
+    def on_depsgraph_update(cls, depsgraph: bpy.types.Depsgraph):
+        # ノードツリーの変更(ノード名の変更など)ではデータパスが変わるため、インデックスを破棄する
+        # (ラインのノードツリーの編集は depsgraph に通知されないため、PencilNodeTree.on_nodes_changed からも破棄する)
+        # シーンの更新は選択・移動などでも通知されるため、オーバーライド元のキーが変化した場合のみ破棄する
+        invalidated = False
+        for update in depsgraph.updates:
+            if isinstance(update.id, bpy.types.NodeTree):
+                invalidated = True
+            elif isinstance(update.id, bpy.types.Scene):
+                scene = depsgraph.scene
+                keys = tuple(tuple(x.keys()) for x in itertools.chain((scene,), scene.view_layers))
+                if cls.__source_keys.get(scene.as_pointer()) != keys:
+                    cls.__source_keys[scene.as_pointer()] = keys
+                    invalidated = True
+        if invalidated:
+            cls.invalidate()
+
+
+def invalidate_override_index():
+    OverrideIndex.invalidate()
+
+def on_depsgraph_update(depsgraph: bpy.types.Depsgraph):
+    OverrideIndex.on_depsgraph_update(depsgraph)
+
+def get_override_source_values(scene: bpy.types.Scene) -> tuple:
+    # オーバーライド元(シーン・ビューレイヤー)のIDプロパティの値 (オーバーライドの変更の検出用)
+    # グループ(他のアドオンの設定など)はオーバーライドの値にならないため除外する
+    def source_values(source):
+        for key, value in source.items():
+            if hasattr(value, "to_dict"):
+                continue
+            yield (key, tuple(value.to_list()) if hasattr(value, "to_list") else value)
+    return tuple((x.name,) + tuple(source_values(x)) for x in itertools.chain((scene,), scene.view_layers))
+
+
 def __overrided_attr(struct: bpy.types.Struct, prop_name: str, override_sources, default=None):
     if default is not None and not hasattr(struct, prop_name):
         return default, None, None
     value = getattr(struct, prop_name)
-    data_path = struct.path_from_id(prop_name)
-    if data_path.endswith("_on_gui"):
-        data_path = data_path[:-len("_gui")]
+    data_path = OverrideIndex.data_path(struct, prop_name)
     for source in override_sources:
         if source is None:
             continue
-        override_value = None
-        if data_path in source:
-            override_value = source[data_path]
-        else:
-            for pattern, v in source.items():
-                try:
-                    if re.fullmatch(pattern, data_path):
-                        override_value = v
-                        data_path = pattern
-                        break
-                except:
-                    pass
+        key, is_pattern = OverrideIndex.get(source).find(data_path)
+        if key is None:
+            continue
+        # インデックスの構築後にキーが削除された場合は、オーバーライドされていないものとして扱う
+        override_value = source.get(key)
+        if is_pattern:
+            data_path = key
         if override_value is not None:
             if type(override_value) == type(value):
                 return override_value, source, data_path
@@ -119,6 +208,7 @@ class AddAttributeOverrideMixin:
         if hasattr(prop, "precision"):
             ui_data.update(precision=prop.precision)
         override_src[data_path] = getattr(data, prop_name)
+        invalidate_override_index()
         return {"FINISHED"}
 
 
@@ -168,6 +258,7 @@ class PCL4_OT_RemoveAttributeOverride(AttrOverrideDataPtrMixin, bpy.types.Operat
         if data is None:
             return {"CANCELLED"}
         del data[self.prop_name]
+        invalidate_override_index()
         self.redraw(context)
         return {"FINISHED"}
 
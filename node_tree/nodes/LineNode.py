@@ -40,6 +40,7 @@ class LineNode(bpy.types.Node, PencilNodeMixin):
     antialiasing: bpy.props.FloatProperty(default=1.0, min=0.0, max=2.0, step=1.0, override={'LIBRARY_OVERRIDABLE'})
     off_screen_distance: bpy.props.FloatProperty(default=150.0, min=0.0, max=1000.0, subtype="PIXEL", override={'LIBRARY_OVERRIDABLE'})
     random_seed: bpy.props.IntProperty(default=0, min=0, max=65535, override={'LIBRARY_OVERRIDABLE'})
+    unlisted_objects_as_occluders: bpy.props.BoolProperty(default=True, override={'LIBRARY_OVERRIDABLE'})
 
     def init(self, context):
         super().init()
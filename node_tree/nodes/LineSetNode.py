@@ -50,7 +50,7 @@ class LineSetNode(bpy.types.Node, PencilNodeMixin):
         brush_settings = self.auto_create_node_and_return_when_property_on(context, socket_identifier)
         if brush_settings is not None:
             brush_settings.create_new_node(0, context.space_data.edit_tree)
-        GuiUtils.update_view3d_area(context.screen)
+        self.on_nodes_changed()
 
     node_name: bpy.props.StringProperty(get=lambda self: self.name, override={'LIBRARY_OVERRIDABLE'})
 
@@ -10,6 +10,8 @@ from ..misc import AttrOverride
 
 class PencilNodeMixin:
     target_node_tree_type: str
+    # ノードの変更の通知先 (PencilNodeTree.on_nodes_changed を register() で設定する)
+    on_nodes_changed = staticmethod(lambda: None)
     new_node_offset_x = -320
     new_node_step_x = 0
     new_node_offset_y = 0
@@ -92,7 +94,7 @@ class PencilNodeMixin:
 
     def auto_create_node_when_property_on(self, context, socket_identifier):
         self.auto_create_node_and_return_when_property_on(context, socket_identifier)
-        GuiUtils.update_view3d_area(context.screen)
+        self.on_nodes_changed()
 
     def filtered_socket_id(self, id, context=None, depsgraph=None):
         return id if AttrOverride.get_overrided_attr(self, id + "_on", default=True, context=context, depsgraph=depsgraph) and\
@@ -276,6 +276,7 @@ class PCL4_PT_line_base(PCL4_PT_line_mixin):
         layout_prop(context, col, node, "antialiasing", text="Antialiasing", slider=True, text_ctxt=Translation.ctxt)
         layout_prop(context, col, node, "off_screen_distance", text="Offscreen Distance", text_ctxt=Translation.ctxt)
         layout_prop(context, col, node, "random_seed", text="Random Seed", text_ctxt=Translation.ctxt)
+        layout_prop(context, col, node, "unlisted_objects_as_occluders", text="Unlisted Objects as Occluders", text_ctxt=Translation.ctxt)
 
 class PCL4_PT_line(PCL4_PT_line_base, bpy.types.Panel):
     bl_idname = "PCL4_PT_line_parameters"
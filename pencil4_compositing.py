@@ -413,6 +413,28 @@ class PCL4_PT_LineRenderElement(bpy.types.Panel):
                 row = col.row(align=True)
 
 
+class PCL4_PT_LineRenderTiles(bpy.types.Panel):
+    bl_space_type = "PROPERTIES"
+    bl_region_type = "WINDOW"
+    bl_context = "output"
+    bl_label = "Pencil+ 4 Line Tiles"
+    bl_translation_context = Translation.ctxt
+    bl_options = {"DEFAULT_CLOSED"}
+    bl_order = 10000
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        scene = context.scene
+
+        col = layout.column(align=True)
+        col.prop(scene, "pencil4_line_tiles_x", text="Tiles X", text_ctxt=Translation.ctxt)
+        col.prop(scene, "pencil4_line_tiles_y", text="Y", text_ctxt=Translation.ctxt)
+        if scene.pencil4_line_tiles_x > 1 or scene.pencil4_line_tiles_y > 1:
+            layout.label(text="Vector files are not output when rendering in tiles.", text_ctxt=Translation.ctxt, icon="INFO")
+
+
 def enum_property(layout, elem, property, items, text: str=""):
     row = layout.row()
     split = row.split(factor=0.4)
@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+import os
+import queue
+import shutil
+import struct
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 連番画像の書き出しをバックグラウンドのスレッドで行う
+# bpy はメインスレッド以外から使用できないため、合成済みの画素(numpy配列)を受け取り、PNGへのエンコードも自前で行う
+class FrameWriter:
+    def __init__(self, compression: int = 15, max_queued_frames: int = 4):
+        self.__queue = queue.Queue(maxsize=max_queued_frames)
+        self.__level = max(0, min(9, compression * 9 // 100))
+        self.__errors = []
+        self.__written_count = 0
+        self.__lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name="Pencil+ 4 Line Frame Writer", daemon=True)
+        self.__thread.start()
+
+    @staticmethod
+    def supports(scene) -> bool:
+        # Blender の save_render と同じ結果を書き出せる設定: 8/16bit の PNG、sRGB ディスプレイで、
+        # ビュー変換が Standard (sRGB の変換のみ) で、ルック・露出・ガンマ・カーブによる補正を行わない場合
+        settings = scene.render.image_settings
+        view_settings = scene.view_settings
+        return (np is not None and
+                settings.file_format == "PNG" and
+                settings.color_mode in ("RGB", "RGBA") and
+                settings.color_depth in ("8", "16") and
+                getattr(settings, "color_management", "FOLLOW_SCENE") == "FOLLOW_SCENE" and
+                scene.display_settings.display_device == "sRGB" and
+                view_settings.view_transform == "Standard" and
+                view_settings.look == "None" and
+                view_settings.exposure == 0.0 and
+                view_settings.gamma == 1.0 and
+                not view_settings.use_curve_mapping)
+
+    @property
+    def written_count(self) -> int:
+        with self.__lock:
+            return self.__written_count
+
+    def pop_errors(self) -> list[str]:
+        with self.__lock:
+            ret = self.__errors
+            self.__errors = []
+            return ret
+
+    def write(self, file_path: str, pixels, width: int, height: int, use_alpha: bool, depth: int):
+        # キューが一杯の場合は空くまで待つ (描画が書き出しより速い場合に、メモリの使用量が増え続けないようにする)
+        self.__queue.put((file_path, pixels, width, height, use_alpha, depth))
+
+    def link(self, source_path: str, file_path: str):
+        # 先に渡したフレームの書き出しの後に行うため、キューを経由する
+        self.__queue.put((file_path, source_path))
+
+    def close(self):
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            file_path = item[0]
+            try:
+                if len(item) == 2:
+                    link_or_copy(item[1], file_path)
+                else:
+                    (_, pixels, width, height, use_alpha, depth) = item
+                    data = encode_png(pixels, width, height, use_alpha, depth, self.__level)
+                    temp_path = file_path + ".tmp"
+                    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                    with open(temp_path, "wb") as f:
+                        f.write(data)
+                    os.replace(temp_path, file_path)
+                with self.__lock:
+                    self.__written_count += 1
+            except Exception as e:
+                with self.__lock:
+                    self.__errors.append(f"{file_path}: {e}")
+
+
+def link_or_copy(source_path: str, file_path: str):
+    # 同じ内容のフレームはハードリンクで出力し、ハードリンクを作成できないファイルシステムの場合はコピーする
+    if os.path.abspath(source_path) == os.path.abspath(file_path):
+        return
+    if os.path.lexists(file_path):
+        os.remove(file_path)
+    try:
+        os.link(source_path, file_path)
+    except OSError:
+        shutil.copyfile(source_path, file_path)
+
+
+def encode_values(pixels, width: int, height: int, use_alpha: bool, depth: int):
+    # pixels: 下の行から順に並んだ、アルファ乗算済みのシーンリニアの RGBA (画素数 x 4)
+    # Blender と同様にアルファを除算してから sRGB に変換し、上の行から順に並んだ整数値 (高さ x 幅 x チャンネル数) を返す
+    rgba = np.asarray(pixels, dtype=np.float32).reshape(height, width, 4)[::-1]
+    alpha = rgba[..., 3:4]
+    if use_alpha:
+        rgb = np.divide(rgba[..., :3], alpha, out=np.zeros_like(rgba[..., :3]), where=alpha > 0.0)
+    else:
+        rgb = rgba[..., :3]
+    rgb = np.clip(rgb, 0.0, 1.0)
+    rgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1.0 / 2.4) - 0.055)
+    channels = np.concatenate((rgb, np.clip(alpha, 0.0, 1.0)), axis=2) if use_alpha else rgb
+
+    max_value = 255 if depth == 8 else 65535
+    return np.rint(channels * max_value).astype(">u2" if depth == 16 else np.uint8)
+
+
+def matches_reference(pixels, width: int, height: int, use_alpha: bool, depth: int, reference) -> bool:
+    # reference: save_render で書き出した同じフレームを色空間の変換なしで読み込んだ画素 (下の行から順に並んだ RGBA、0～1)
+    # 丸め誤差による1段階の差のみを許容する
+    max_value = 255 if depth == 8 else 65535
+    values = encode_values(pixels, width, height, use_alpha, depth).astype(np.float32) / max_value
+    reference = np.asarray(reference, dtype=np.float32).reshape(height, width, 4)[::-1][..., :values.shape[2]]
+    return float(np.max(np.abs(values - reference), initial=0.0)) <= 1.5 / max_value
+
+
+def encode_png(pixels, width: int, height: int, use_alpha: bool, depth: int, level: int = 6) -> bytes:
+    values = encode_values(pixels, width, height, use_alpha, depth)
+    rows = values.reshape(height, -1).view(np.uint8).reshape(height, -1)
+    raw = np.concatenate((np.zeros((height, 1), dtype=np.uint8), rows), axis=1).tobytes()
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+    header = struct.pack(">IIBBBBB", width, height, depth, 6 if use_alpha else 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, level)) + chunk(b"IEND", b"")
@@ -15,6 +15,7 @@ else:
 from .pencil4_render_session import Pencil4RenderSession as RenderSession
 from .merge_helper import merge_helper
 from .node_tree import PencilNodeTree
+from .node_tree.misc import AttrOverride
 
 import threading
 import bpy
@@ -33,6 +34,8 @@ def append():
     bpy.app.handlers.load_post.append(on_load_post)
     bpy.app.handlers.depsgraph_update_pre.append(on_depsgraph_update_pre)
     bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.undo_post.append(on_undo_redo_post)
+    bpy.app.handlers.redo_post.append(on_undo_redo_post)
 
 def remove():
     bpy.app.handlers.render_pre.remove(on_pre_render)
@@ -44,6 +47,8 @@ def remove():
     bpy.app.handlers.load_post.remove(on_load_post)
     bpy.app.handlers.depsgraph_update_pre.remove(on_depsgraph_update_pre)
     bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update_post)
+    bpy.app.handlers.undo_post.remove(on_undo_redo_post)
+    bpy.app.handlers.redo_post.remove(on_undo_redo_post)
 
 def in_render_session() -> bool:
     return __session is not None
@@ -55,6 +60,7 @@ def on_pre_render(scene: bpy.types.Scene):
     if __session is None:
         with __depsgraph_update_lock:
             hide_shader_nodes_on_render()
+            AttrOverride.invalidate_override_index()
             __session = RenderSession()
             pencil4_viewport.ViewportLineRenderManager.in_render_session = True
             pencil4_render_images.correct_duplicated_output_images(scene)
@@ -70,6 +76,7 @@ def on_render_cancel(scene: bpy.types.Scene):
         __session = None
         pencil4_render_images.unpack_images(scene)
         pencil4_viewport.ViewportLineRenderManager.in_render_session = False
+        PencilNodeTree.clear_cpp_nodes_cache()
         restore_hidden_shader_nodes()
 
 @persistent
@@ -80,14 +87,21 @@ def on_render_complete(scene: bpy.types.Scene):
         __session = None
         pencil4_render_images.unpack_images(scene)
         pencil4_viewport.ViewportLineRenderManager.in_render_session = False
+        PencilNodeTree.clear_cpp_nodes_cache()
         restore_hidden_shader_nodes()
 
 @persistent
 def on_post_frame_change(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
     global __session
+    updates = pencil4_render_session.ObjectUpdates(depsgraph)
+    PencilNodeTree.invalidate_cpp_nodes_cache()
+    AttrOverride.invalidate_override_index()
     if __session is not None:
+        __session.on_frame_change(updates)
         __session.draw_line(depsgraph)
-    pencil4_viewport.ViewportLineRenderManager.invalidate_objects_cache()
+    pencil4_render_session.SceneExtraction.invalidate()
+    pencil4_viewport.ViewportLineRenderManager.notify_update()
+    pencil4_viewport.ViewportLineRenderManager.invalidate_objects(updates)
 
 @persistent
 def on_save_pre(dummy):
@@ -108,17 +122,48 @@ def on_load_post(dummy):
     merge_helper.unlink()
     PencilNodeTree.correct_curve_tree()
     PencilNodeTree.migrate_nodes()
+    PencilNodeTree.clear_cpp_nodes_cache()
+    PencilNodeTree.subscribe_node_changes()
+    AttrOverride.invalidate_override_index()
+    pencil4_render_session.MergeGroupIndex.invalidate()
+    pencil4_render_session.SceneExtraction.invalidate()
+
+@persistent
+def on_undo_redo_post(scene: bpy.types.Scene):
+    # アンドゥ・リドゥによってノードやマテリアルが再生成されるため、キャッシュしたC++側のノードを破棄する
+    PencilNodeTree.clear_cpp_nodes_cache()
+    AttrOverride.invalidate_override_index()
+    pencil4_render_session.MergeGroupIndex.invalidate()
+    pencil4_render_session.SceneExtraction.invalidate()
+    pencil4_viewport.ViewportLineRenderManager.invalidate_flipbook()
 
 @persistent
 def on_depsgraph_update_pre(scene: bpy.types.Scene):
     global __depsgraph_update_lock
     __depsgraph_update_lock.acquire()
-    pencil4_viewport.ViewportLineRenderManager.invalidate_objects_cache()
+    pencil4_render_session.SceneExtraction.invalidate()
+    pencil4_viewport.ViewportLineRenderManager.notify_update()
 
 @persistent
-def on_depsgraph_update_post(scene: bpy.types.Scene):
+def on_depsgraph_update_post(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    global __session
     global __depsgraph_update_lock
-    __depsgraph_update_lock.release()
+    try:
+        cpp_nodes_generation = PencilNodeTree.get_cpp_nodes_generation()
+        PencilNodeTree.on_depsgraph_update(depsgraph)
+        pencil4_render_session.MergeGroupIndex.on_depsgraph_update(depsgraph)
+        AttrOverride.on_depsgraph_update(depsgraph)
+        updates = pencil4_render_session.ObjectUpdates(depsgraph)
+        pencil4_viewport.ViewportLineRenderManager.invalidate_objects(updates)
+        # 選択の変更など描画結果に影響しない更新では、フレームのキャッシュを破棄しない
+        if (updates.invalidates_objects_cache() or len(updates.transform) > 0 or len(updates.others) > 0 or
+            cpp_nodes_generation != PencilNodeTree.get_cpp_nodes_generation()):
+            pencil4_viewport.ViewportLineRenderManager.invalidate_flipbook()
+        if __session is not None and updates.invalidates_objects_cache():
+            # レンダリング中の編集によるジオメトリの変更は、次のフレームでネイティブモジュールのキャッシュを使用しない
+            __session.invalidate_objects_cache()
+    finally:
+        __depsgraph_update_lock.release()
 
 # Blender 3.5 ~ 4.1 では、レンダリング中に特定のシェーダーノードを表示するとフリーズする問題がある
 # 対策として、フリーズの原因になる表示中のシェーダーノードを隠す
@@ -19,6 +19,15 @@ class PCL4_Preferences(bpy.types.AddonPreferences):
     render_app_path: bpy.props.StringProperty(default="", subtype="FILE_PATH")
     viewport_render_timeout: bpy.props.FloatProperty(default=2.0, min=0.5, max=10.0)
     abort_rendering_if_error_occur: bpy.props.BoolProperty(default=False)
+    frustum_culling: bpy.props.BoolProperty(default=False)
+    record_render_stats: bpy.props.BoolProperty(default=False)
+    reuse_render_geometry: bpy.props.BoolProperty(default=False)
+    viewport_flipbook: bpy.props.BoolProperty(default=False)
+    viewport_flipbook_memory: bpy.props.IntProperty(default=512, min=16, max=65536)
+    viewport_flipbook_format: bpy.props.EnumProperty(items=(
+        ("HALF", "Half Float", ""),
+        ("BYTE", "8-bit", ""),
+    ), default="HALF")
 
     def draw(self, context):
         layout = self.layout
@@ -26,6 +35,14 @@ class PCL4_Preferences(bpy.types.AddonPreferences):
         layout.prop(self, "render_app_path", text="PSOFT Pencil+ 4 Render App Path", text_ctxt=Translation.ctxt)
         layout.prop(self, "viewport_render_timeout", text="Viewport Preview Timeout Period", text_ctxt=Translation.ctxt)
         layout.prop(self, "abort_rendering_if_error_occur", text="Abort Rendering when Errors Occur", text_ctxt=Translation.ctxt)
+        layout.prop(self, "frustum_culling", text="Skip Objects Outside the Camera View", text_ctxt=Translation.ctxt)
+        layout.prop(self, "record_render_stats", text="Record Line Rendering Statistics", text_ctxt=Translation.ctxt)
+        layout.prop(self, "reuse_render_geometry", text="Reuse Unchanged Geometry between Animation Frames", text_ctxt=Translation.ctxt)
+        layout.prop(self, "viewport_flipbook", text="Cache Viewport Line Frames during Playback", text_ctxt=Translation.ctxt)
+        col = layout.column()
+        col.enabled = self.viewport_flipbook
+        col.prop(self, "viewport_flipbook_memory", text="Frame Cache Memory (MB)", text_ctxt=Translation.ctxt)
+        col.prop(self, "viewport_flipbook_format", text="Frame Cache Format", text_ctxt=Translation.ctxt)
 
         layout.separator()
 
@@ -234,9 +234,13 @@ class ViewLayerLineOutputs(bpy.types.PropertyGroup):
 
 def register_props():
     bpy.types.ViewLayer.pencil4_line_outputs = bpy.props.PointerProperty(type=ViewLayerLineOutputs)
+    bpy.types.Scene.pencil4_line_tiles_x = bpy.props.IntProperty(default=1, min=1, max=16)
+    bpy.types.Scene.pencil4_line_tiles_y = bpy.props.IntProperty(default=1, min=1, max=16)
 
 def unregister_props():
     del(bpy.types.ViewLayer.pencil4_line_outputs)
+    del(bpy.types.Scene.pencil4_line_tiles_x)
+    del(bpy.types.Scene.pencil4_line_tiles_y)
 
 def new_image(name:str) -> bpy.types.Image:
     image = bpy.data.images.new(name, width=8, height=8, alpha=True, float_buffer=True)
@@ -283,14 +287,61 @@ def setup_image(image: bpy.types.Image, width: int, height: int):
         image.scale(image.size[0] if width <= 0 else width, image.size[1] if height <= 0 else height)
 
 
+def get_render_border(scene: bpy.types.Scene) -> Tuple[int, int, int, int]:
+    # レンダーボーダーの範囲 (x0, y0, x1, y1): 画像の左下を原点とするピクセル座標、フレーム全体の場合は None
+    render = scene.render
+    if not render.use_border:
+        return None
+    width = render.resolution_x * render.resolution_percentage // 100
+    height = render.resolution_y * render.resolution_percentage // 100
+    border = (int(render.border_min_x * width), int(render.border_min_y * height),
+              int(render.border_max_x * width), int(render.border_max_y * height))
+    if border[2] <= border[0] or border[3] <= border[1] or border == (0, 0, width, height):
+        return None
+    return border
+
+
+def get_output_size(scene: bpy.types.Scene) -> Tuple[int, int]:
+    # ライン描画結果の画像の大きさ (ボーダーで切り抜く場合はボーダーの大きさ)
+    border = get_render_border(scene)
+    if border is not None and scene.render.use_crop_to_border:
+        return (border[2] - border[0], border[3] - border[1])
+    return (scene.render.resolution_x * scene.render.resolution_percentage // 100,
+            scene.render.resolution_y * scene.render.resolution_percentage // 100)
+
+
 def setup_images(scene: bpy.types.Scene):
-    width = scene.render.resolution_x * scene.render.resolution_percentage // 100
-    height = scene.render.resolution_y * scene.render.resolution_percentage // 100
+    width, height = get_output_size(scene)
+    uses_tiles = scene.pencil4_line_tiles_x > 1 or scene.pencil4_line_tiles_y > 1 or get_render_border(scene) is not None
     for view_layer in scene.view_layers:
         (image, element_dict) = enumerate_images_from_compositor_nodes(view_layer)
         setup_image(image, width, height)
         for i in element_dict.keys():
             setup_image(i, width, height)
+        if uses_tiles:
+            for i in itertools.chain((image,), element_dict.keys()):
+                if i is not None:
+                    get_tile_image(i)
+
+
+# タイル分割の描画で、出力画像毎に使用する作業用の画像
+# レンダリング中に bpy.data を変更しないよう、レンダリングの開始時(setup_images)に作成し、終了時(unpack_images)に削除する
+__tile_images: dict[bpy.types.Image, bpy.types.Image] = {}
+
+def get_tile_image(image: bpy.types.Image) -> bpy.types.Image:
+    tile_image = __tile_images.get(image)
+    if tile_image is None:
+        tile_image = __tile_images[image] = new_image(image.name + " Tile")
+    return tile_image
+
+
+def remove_tile_images():
+    for tile_image in __tile_images.values():
+        try:
+            bpy.data.images.remove(tile_image)
+        except ReferenceError:
+            pass
+    __tile_images.clear()
 
 
 def unpack_images(scene: bpy.types.Scene):
@@ -304,6 +355,7 @@ def unpack_images(scene: bpy.types.Scene):
         unpack_image(image)
         for i in element_dict.keys():
             unpack_image(i)
+    remove_tile_images()
 
 
 def reset_image(image: bpy.types.Image):
@@ -10,6 +10,7 @@ if "bpy" in locals():
     imp.reload(pencil4line_for_blender)
     imp.reload(pencil4_render_images)
     imp.reload(cpp_ulits)
+    imp.reload(pencil4_render_stats)
 else:
     import bpy
     if platform.system() == "Windows":
@@ -49,6 +50,7 @@ else:
             else:
                 from .bin import pencil4line_for_blender_linux_311_500 as pencil4line_for_blender
     from . import pencil4_render_images
+    from . import pencil4_render_stats
     from .misc import cpp_ulits
 
 from .node_tree import PencilNodeTree
@@ -56,8 +58,14 @@ from .node_tree.misc.DataUtils import line_object_types
 
 import bpy
 import itertools
+import math
 import os
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 _dll_valid = False
 def get_dll_valid():
     return _dll_valid
@@ -70,45 +78,583 @@ def get_render_size(depsgraph: bpy.types.Depsgraph) -> tuple[int, int]:
     height = depsgraph.scene.render.resolution_y * depsgraph.scene.render.resolution_percentage // 100
     return (width, height)
 
-class Pencil4RenderSession:
+# カーブ・テキスト・サーフェス・メタボールをメッシュ化した結果のキャッシュ
+# ジオメトリが更新されていないオブジェクトについては、前フレームでメッシュ化した結果を再利用する
+class TessellationCache:
+    class Entry:
+        def __init__(self, obj: bpy.types.Object, mesh: bpy.types.Mesh, curve_data):
+            self.eval_object_pointer = obj.as_pointer()
+            self.mesh = mesh
+            self.curve_data = curve_data
+            self.memory_size = estimate_mesh_memory(mesh)
+            self.used = True
+
+    def __init__(self):
+        self.__entries = {}
+        self.__extracted = False
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def begin_extraction(self):
+        # 次の sweep() までの抽出で get() されなかったメッシュを未使用として扱う
+        self.__extracted = True
+
+    def get(self, obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph):
+        src_object = obj.original
+        entry = self.__entries.get(src_object)
+        if entry is not None and entry.eval_object_pointer == obj.as_pointer():
+            entry.used = True
+            self.hit_count += 1
+            return entry.mesh, entry.curve_data
+
+        # to_mesh() は同じオブジェクトから以前に生成したメッシュを解放してから新たに生成する
+        self.miss_count += 1
+        self.__entries.pop(src_object, None)
+        mesh = obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+        if mesh is None:
+            return None, None
+        curve_data = None
+        if obj.type == "CURVE" and len(mesh.polygons) == 0:
+            # カーブをメッシュに変換したとき、押し出し量が0の場合だとエッジのみが生成されポリゴンは生成されない
+            # このとき、もともとのカーブに付随していたマテリアルの情報は失われてしまう
+            # ライン描画にはマテリアルの情報が必要になる場合もあるので、欠損した情報を付加する必要がある
+            curve: bpy.types.Curve = obj.data
+            curve_data = pencil4line_for_blender.interm_curve_data(curve.materials, [x.material_index for x in curve.splines])
+        self.__entries[src_object] = TessellationCache.Entry(obj, mesh, curve_data)
+        return mesh, curve_data
+
+    def sweep(self, depsgraph: bpy.types.Depsgraph) -> bool:
+        # 前回の解放以降の抽出で使用しなかったメッシュを解放する
+        # 抽出を行っていない(抽出結果を再利用した)場合は使用状況が分からないため何もしない
+        if not self.__extracted:
+            return False
+        self.__extracted = False
+        unused = {k: v for k, v in self.__entries.items() if not v.used}
+        for src_object in unused:
+            del self.__entries[src_object]
+        for entry in self.__entries.values():
+            entry.used = False
+        return self.__release(unused, depsgraph)
+
+    def invalidate(self, objects):
+        # ジオメトリが再評価されたオブジェクトのメッシュは Blender 側で既に解放されているため、参照を破棄するのみ
+        for obj in objects:
+            self.__entries.pop(obj, None)
+
+    def clear(self, depsgraph: bpy.types.Depsgraph = None) -> bool:
+        # depsgraph を指定しない場合は参照を破棄するのみ (メッシュは評価済みオブジェクトと共に Blender 側で解放される)
+        entries = self.__entries
+        self.__entries = {}
+        self.__extracted = False
+        return self.__release(entries, depsgraph)
+
+    @staticmethod
+    def __release(entries: dict, depsgraph: bpy.types.Depsgraph) -> bool:
+        # 評価済みオブジェクトが解放されている可能性があるため、depsgraph から取得し直して
+        # メッシュ化した時点と同じオブジェクトの場合のみ to_mesh_clear() を呼び出す
+        if depsgraph is None:
+            return False
+        released = False
+        for src_object, entry in entries.items():
+            try:
+                obj = src_object.evaluated_get(depsgraph)
+            except ReferenceError:
+                continue
+            if obj.as_pointer() == entry.eval_object_pointer:
+                obj.to_mesh_clear()
+                released = True
+        return released
+
+    def stats(self) -> tuple[int, int]:
+        return (len(self.__entries), sum(x.memory_size for x in self.__entries.values()))
+
+
+# Line Merge Group が設定されたコレクションと、そのコレクションに含まれるオブジェクトの対応表
+# コレクション階層を深さ優先で走査した順(子が先)に保持する
+# 同じコレクションを複数回走査しても、2回目以降は新たなグループが生成されないため、各コレクションは一度だけ走査する
+class MergeGroupIndex:
+    generation = 0
+
     def __init__(self):
+        self.__root_pointer = 0
+        self.__generation = -1
+        self.__groups = []
+
+    def get(self, root_collection: bpy.types.Collection) -> list[set[bpy.types.Object]]:
+        if self.__root_pointer != root_collection.as_pointer() or self.__generation != MergeGroupIndex.generation:
+            self.__root_pointer = root_collection.as_pointer()
+            self.__generation = MergeGroupIndex.generation
+            self.__groups = self.__build(root_collection)
+        return self.__groups
+
+    def clear(self):
+        self.__root_pointer = 0
+        self.__groups = []
+
+    @staticmethod
+    def __build(root_collection: bpy.types.Collection) -> list[set[bpy.types.Object]]:
+        groups = []
+        visited = set()
+        def collect_group(collection: bpy.types.Collection):
+            if collection is None or collection in visited:
+                return
+            visited.add(collection)
+            for child in collection.children:
+                collect_group(child)
+            for object in collection.objects:
+                if object.type == "EMPTY" and object.instance_type == "COLLECTION":
+                    collect_group(object.instance_collection)
+            if collection.pcl4_line_merge_group:
+                objects = set(x if x.override_library is None else x.override_library.reference for x in collection.all_objects)
+                if len(objects) > 0:
+                    groups.append(objects)
+        collect_group(root_collection)
+        return groups
+
+    @classmethod
+    def invalidate(cls):
+        cls.generation += 1
+
+    @staticmethod
+    def on_depsgraph_update(depsgraph: bpy.types.Depsgraph):
+        # コレクションの構成・インスタンス化するコレクションの変更を検出する
+        for update in depsgraph.updates:
+            if isinstance(update.id, bpy.types.Collection) or (isinstance(update.id, bpy.types.Object) and update.id.type == "EMPTY"):
+                MergeGroupIndex.invalidate()
+                return
+
+
+def estimate_mesh_memory(mesh: bpy.types.Mesh) -> int:
+    # 頂点座標・エッジ・コーナー・面の基本的な属性のみを概算する
+    return len(mesh.vertices) * 12 + len(mesh.edges) * 8 + len(mesh.loops) * 8 + len(mesh.polygons) * 8
+
+
+# 描画対象のインスタンスの抽出
+# 同じ depsgraph を描画する複数のビューポート(四分割表示の各リージョンなど)で共有し、
+# カメラに依存しない抽出の結果を depsgraph が更新されるまで再利用する
+class SceneExtraction:
+    generation = 0
+
+    class ObjectInfo:
+        def __init__(self, obj: bpy.types.Object) -> None:
+            src_object = obj.original
+            override_library = src_object.override_library
+            self.reference = override_library.reference if override_library is not None else src_object
+            self.mesh_infos = {}
+
+    class MeshInfo:
+        def __init__(self, obj: bpy.types.Object, mesh: bpy.types.Mesh) -> None:
+            self.object_materials = ()
+            if any(ms.link == "OBJECT" for ms in obj.material_slots):
+                self.object_materials = tuple(ms.material for ms in obj.material_slots)
+            self.materials = frozenset(ms.material.original for ms in obj.material_slots if ms.material is not None)
+            self.__mesh = mesh
+            self.__bounds = None
+
+        @property
+        def bounds(self):
+            # カリング用のローカル座標系のバウンディングボックス (必要になった時点で計算する)
+            if self.__bounds is None:
+                self.__bounds = calc_mesh_bounds(self.__mesh)
+                self.__mesh = None
+            return self.__bounds
+    class State:
+        # depsgraph 毎に保持する情報
+        def __init__(self) -> None:
+            self.object_infos = dict()
+            self.system_tessellated_objects = set()
+            self.tessellation_cache = TessellationCache()
+            self.result_key = None
+            self.result = None
+
+    class Result:
+        def __init__(self, render_instances: list, ungrouped_objects: set, mesh_color_attributes: dict, instance_bounds: list,
+                     curve_data: dict, mesh_count: int) -> None:
+            self.render_instances = render_instances
+            self.ungrouped_objects = ungrouped_objects
+            self.mesh_color_attributes = mesh_color_attributes
+            self.instance_bounds = instance_bounds
+            self.curve_data = curve_data
+            self.mesh_count = mesh_count
+            self.references = frozenset(x.reference for x in render_instances)
+
+    # ビューポート毎のオブジェクトタイプの表示設定 (visible_get(viewport=space) の判定に影響する)
+    viewport_visibility_props = ("show_object_viewport_mesh", "show_object_viewport_curve", "show_object_viewport_surf",
+                                 "show_object_viewport_meta", "show_object_viewport_font", "show_object_viewport_empty")
+
+    def __init__(self, max_depsgraphs: int = 1):
+        self.__states: dict[int, SceneExtraction.State] = {}
+        self.__max_depsgraphs = max_depsgraphs
+        # メッシュ化した結果を解放した回数 (共有するセッションのネイティブモジュールのキャッシュが解放済みのメッシュを参照しないようにする)
+        self.release_count = 0
+        self.extraction_count = 0
+        self.reuse_count = 0
+
+    @classmethod
+    def invalidate(cls):
+        # depsgraph の更新・フレームの変更毎に呼び出し、抽出結果を破棄する
+        cls.generation += 1
+
+    def clear(self, depsgraph: bpy.types.Depsgraph = None):
+        pointer = depsgraph.as_pointer() if depsgraph is not None else 0
+        for state_pointer, state in self.__states.items():
+            if state.tessellation_cache.clear(depsgraph if state_pointer == pointer else None):
+                self.release_count += 1
+        self.__states.clear()
+
+    def sweep(self, depsgraph: bpy.types.Depsgraph):
+        state = self.__states.get(depsgraph.as_pointer())
+        if state is not None and state.tessellation_cache.sweep(depsgraph):
+            self.release_count += 1
+
+    def invalidate_objects(self, objects: dict[bpy.types.Object, bool]):
+        # depsgraphで更新が通知されたオブジェクトの情報のみを破棄する
+        for state in self.__states.values():
+            for obj in objects:
+                state.object_infos.pop(obj, None)
+                state.system_tessellated_objects.discard(obj)
+            state.tessellation_cache.invalidate(obj for obj, is_updated_geometry in objects.items() if is_updated_geometry)
+            state.result = None
+
+    def get_tessellation_stats(self) -> tuple[int, int]:
+        stats = [x.tessellation_cache.stats() for x in self.__states.values()]
+        return (sum(x[0] for x in stats), sum(x[1] for x in stats))
+
+    def __get_state(self, depsgraph: bpy.types.Depsgraph) -> State:
+        # オブジェクト単位で導出できる情報は depsgraph 毎に保持し、更新が通知されたオブジェクトのみ再計算する
+        pointer = depsgraph.as_pointer()
+        state = self.__states.pop(pointer, None)
+        if state is None:
+            state = SceneExtraction.State()
+            while len(self.__states) >= self.__max_depsgraphs:
+                self.__states.pop(next(iter(self.__states))).tessellation_cache.clear()
+        self.__states[pointer] = state
+        return state
+
+    def extract(self,
+                depsgraph: bpy.types.Depsgraph,
+                space: bpy.types.SpaceView3D,
+                is_viewport: bool,
+                is_cycles: bool,
+                is_eevee_next: bool,
+                material_override: bpy.types.Material,
+                collect_bounds: bool = False,
+                relevance: tuple[set, set] = None,
+                reusable: bool = False) -> Result:
+        state = self.__get_state(depsgraph)
+
+        # Holdout設定
+        check_holdout = depsgraph.scene.render.engine != "BLENDER_WORKBENCH"
+        if is_viewport and space and space.shading.type in ["WIREFRAME", "SOLID"]:
+            check_holdout = False
+
+        # ビューポート(とタイル分割したレンダリング)の抽出結果は、depsgraph が更新されるまで同じ条件の描画で再利用する
+        result_key = None
+        if is_viewport or reusable:
+            if space is None:
+                visibility_key = None
+            elif space.local_view is not None or space.use_local_collections:
+                visibility_key = space
+            else:
+                visibility_key = tuple(getattr(space, x, True) for x in self.viewport_visibility_props)
+            result_key = (SceneExtraction.generation, PencilNodeTree.get_cpp_nodes_generation(), is_viewport,
+                          is_cycles, is_eevee_next, material_override, collect_bounds, check_holdout, visibility_key)
+            if state.result is not None and state.result_key == result_key:
+                self.reuse_count += 1
+                return state.result
+
+        state.result = self.__extract(depsgraph, state, space, is_viewport, is_cycles, is_eevee_next, material_override,
+                                      check_holdout, collect_bounds, relevance)
+        state.result_key = result_key
+        self.extraction_count += 1
+        return state.result
+
+    def __extract(self,
+                  depsgraph: bpy.types.Depsgraph,
+                  state: State,
+                  space: bpy.types.SpaceView3D,
+                  is_viewport: bool,
+                  is_cycles: bool,
+                  is_eevee_next: bool,
+                  material_override: bpy.types.Material,
+                  check_holdout: bool,
+                  collect_bounds: bool,
+                  relevance: tuple[set, set]) -> Result:
+        holdout_objects_from_collection = set()
+        if check_holdout:
+            for object in itertools.chain.from_iterable([c.collection.objects for c in flatten_hierarchy(depsgraph.view_layer_eval.layer_collection) if c.holdout]):
+                holdout_objects_from_collection.add(object)
+
+        object_infos = state.object_infos
+        system_tessellated_objects = state.system_tessellated_objects
+
+        render_instances = []
+        ungrouped_objects = set()
+        mesh_color_attributes = {}
+        instance_bounds = [] if collect_bounds else None
+        curve_data_dict = {}
+        extracted_meshes = set()
+
+        # システムによってメッシュ化されるオブジェクトは、走査の途中で判明する場合がある
+        # その場合に後から除外できるよう、メッシュ化したインスタンスを記録しておく
+        tessellated_instances = []
+        state.tessellation_cache.begin_extraction()
+
+        object_instance: bpy.types.DepsgraphObjectInstance
+        for object_instance in depsgraph.object_instances:
+            obj = object_instance.object
+            src_object = obj.original
+            obj_type = obj.type
+            if obj_type == "MESH" and src_object.type != "MESH":
+                system_tessellated_objects.add(src_object)
+
+            if not object_instance.show_self:
+                continue
+            if (is_cycles or is_eevee_next) and not obj.visible_camera:
+                continue
+            parent = object_instance.parent
+            if is_viewport:
+                if parent is not None:
+                    if not parent.visible_get(view_layer=depsgraph.view_layer_eval, viewport=space):
+                        continue
+                elif not obj.visible_get(view_layer=depsgraph.view_layer_eval, viewport=space):
+                    continue
+
+            # オブジェクトのメッシュを取得
+            mesh: bpy.types.Mesh = None
+            is_temporary_mesh = False
+            if obj_type == "MESH":
+                mesh = obj.data
+                if mesh.is_editmode:
+                    mesh = obj.to_mesh()
+                    is_temporary_mesh = True
+            elif obj_type in line_object_types:
+                if src_object in system_tessellated_objects:
+                    continue
+                if object_instance.is_instance:
+                    # インスタンスのオブジェクトは一時的なものなので、メッシュ化した結果はキャッシュしない
+                    mesh = obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+                    curve_data = None
+                    if mesh is not None and obj_type == "CURVE" and len(mesh.polygons) == 0:
+                        curve: bpy.types.Curve = obj.data
+                        curve_data = pencil4line_for_blender.interm_curve_data(curve.materials, [x.material_index for x in curve.splines])
+                else:
+                    mesh, curve_data = state.tessellation_cache.get(obj, depsgraph)
+                if mesh is None:
+                    continue
+                is_temporary_mesh = object_instance.is_instance
+                if curve_data is not None:
+                    curve_data_dict[mesh] = curve_data
+
+            if mesh is None:
+                continue
+
+            info = object_infos.get(src_object)
+            if info is None:
+                info = SceneExtraction.ObjectInfo(obj)
+                object_infos[src_object] = info
+
+            # 一時的に生成したメッシュはフレーム毎に異なるため、その情報は保持しない
+            mesh_info = None if is_temporary_mesh else info.mesh_infos.get(mesh.as_pointer())
+            if mesh_info is None:
+                mesh_info = SceneExtraction.MeshInfo(obj, mesh)
+                if not is_temporary_mesh:
+                    info.mesh_infos[mesh.as_pointer()] = mesh_info
+
+            # Holdout はインスタンス毎に異なる場合があるため、オブジェクトの情報として保持しない
+            if check_holdout:
+                holdout = obj.is_holdout or (parent if parent is not None else obj) in holdout_objects_from_collection
+            else:
+                holdout = False
+
+            # どのラインセットにも含まれず、遮蔽物としても扱わないオブジェクトは除外する
+            if relevance is not None and not holdout:
+                (relevant_objects, relevant_materials) = relevance
+                if (info.reference not in relevant_objects and src_object not in relevant_objects and
+                    relevant_materials.isdisjoint(mesh_info.materials)):
+                    continue
+
+            object_materials = mesh_info.object_materials if material_override is None else ()
+
+            if obj_type != "MESH":
+                tessellated_instances.append((len(render_instances), src_object, info.reference, mesh))
+            else:
+                ungrouped_objects.add(info.reference)
+            render_instances.append(pencil4line_for_blender.interm_render_Instance(info.reference, object_instance.matrix_world, mesh, holdout, object_materials))
+            extracted_meshes.add(mesh)
+            if instance_bounds is not None:
+                instance_bounds.append((object_instance.matrix_world.copy(), mesh_info.bounds))
+
+            # カラー属性はメッシュの再評価で作り直される場合があるため、メッシュの情報として保持せず抽出毎に取得する
+            if mesh_color_attributes is not None and mesh not in mesh_color_attributes:
+                color_attributes = getattr(mesh, "color_attributes", None)
+                if color_attributes is None:
+                    mesh_color_attributes = None
+                else:
+                    mesh_color_attributes[mesh] = list(color_attributes)
+
+        # 走査の後半でシステムによるメッシュ化が判明したオブジェクトを除外する
+        if len(tessellated_instances) > 0:
+            removed = False
+            for index, src_object, reference, mesh in tessellated_instances:
+                if src_object in system_tessellated_objects:
+                    render_instances[index] = None
+                    curve_data_dict.pop(mesh, None)
+                    if mesh_color_attributes is not None:
+                        mesh_color_attributes.pop(mesh, None)
+                    removed = True
+                else:
+                    ungrouped_objects.add(reference)
+            if removed:
+                if instance_bounds is not None:
+                    instance_bounds = [b for x, b in zip(render_instances, instance_bounds) if x is not None]
+                render_instances = [x for x in render_instances if x is not None]
+
+        return SceneExtraction.Result(render_instances, ungrouped_objects, mesh_color_attributes, instance_bounds,
+                                      curve_data_dict, len(extracted_meshes))
+
+
+class Pencil4RenderSession:
+    def __init__(self, extraction: SceneExtraction = None):
         pencil4_render_images.ViewLayerLineOutputs.correct_image_names()
         self.__interm_context = pencil4line_for_blender.interm_context()
         self.__curve_data = dict()
         self.__processed_view_layers = set()
+        # 抽出結果を他のセッションと共有する場合は、共有元が抽出の情報を管理する
+        self.__owns_extraction = extraction is None
+        self.__extraction = SceneExtraction() if extraction is None else extraction
+        self.__merge_group_index = MergeGroupIndex()
+        self.culled_instance_count = 0
+        self.total_instance_count = 0
+        self.stats_enabled = False
+        self.__extracted_mesh_count = 0
+        self.__extracted_references = frozenset()
+        self.__release_count = self.__extraction.release_count
+        # ネイティブモジュールのオブジェクトのキャッシュを次のフレームで使用できるビューレイヤー
+        self.__objects_cache_view_layer: str = None
+        self.last_stats: pencil4_render_stats.RenderStats = None
 
 
-    def cleanup_frame(self):
+    def cleanup_frame(self, depsgraph: bpy.types.Depsgraph = None):
+        # ネイティブモジュールのオブジェクトのキャッシュは破棄されない (draw_options.objects_cache_valid で再利用を指示する)
+        # depsgraph: 描画に使用した depsgraph (有効な間に呼び出す場合のみ指定し、使用しなかったメッシュ化の結果を解放する)
         self.__interm_context.cleanup_frame()
         self.__curve_data.clear()
         self.__processed_view_layers.clear()
+        if depsgraph is not None:
+            self.__extraction.sweep(depsgraph)
 
-    def cleanup_all(self):
-        self.cleanup_frame()
+    def cleanup_all(self, depsgraph: bpy.types.Depsgraph = None):
+        self.cleanup_frame(depsgraph)
 
         self.__interm_context.cleanup_all()
         self.__interm_context = None
+        if self.__owns_extraction:
+            self.__extraction.clear(depsgraph)
+        self.__merge_group_index.clear()
+        self.__objects_cache_view_layer = None
+
+    def invalidate_objects(self, objects: dict[bpy.types.Object, bool]):
+        self.__extraction.invalidate_objects(objects)
+
+    def invalidate_objects_cache(self):
+        self.__objects_cache_view_layer = None
 
+    def on_frame_change(self, updates: "ObjectUpdates"):
+        # アニメーションのレンダリングで、フレームの変更による更新が通知されたオブジェクトの情報のみを破棄する
+        # depsgraph から更新が通知されなければ、ネイティブモジュールのオブジェクトのキャッシュも再利用する
+        self.__extraction.invalidate_objects(updates.objects_to_refresh())
+        if not self.__reuses_geometry() or updates.invalidates_objects_cache():
+            self.__objects_cache_view_layer = None
 
-    def draw_line(self, depsgraph: bpy.types.Depsgraph):
+    @staticmethod
+    def __reuses_geometry() -> bool:
+        return bpy.context.preferences.addons[__package__].preferences.reuse_render_geometry
+
+    def get_tessellation_stats(self) -> tuple[int, int]:
+        return self.__extraction.get_tessellation_stats()
+
+    def __new_stats(self, depsgraph: bpy.types.Depsgraph, is_viewport: bool) -> pencil4_render_stats.RenderStats:
+        # 統計の収集は、プロパティ stats_enabled またはアドオン設定で有効にした場合のみ行う
+        if not self.stats_enabled and not bpy.context.preferences.addons[__package__].preferences.record_render_stats:
+            return None
+        return pencil4_render_stats.RenderStats(depsgraph.view_layer.name, depsgraph.scene.frame_current, is_viewport)
+
+    def __finish_stats(self, stats: pencil4_render_stats.RenderStats, ret):
+        if stats is None:
+            return
+        stats.result = ret.name if hasattr(ret, "name") else str(ret)
+        self.last_stats = stats
+        pencil4_render_stats.record(stats)
+
+
+    def draw_line(self, depsgraph: bpy.types.Depsgraph, tile_indices: list[int] = None):
+        # tile_indices: タイル分割する場合に描画するタイル (他のプロセスで描画するタイルの範囲は透明のままとなる)
         if depsgraph.view_layer.name in self.__processed_view_layers:
             return pencil4line_for_blender.draw_ret.success
         self.__processed_view_layers.add(depsgraph.view_layer.name)
         width, height = get_render_size(depsgraph)
+        border = pencil4_render_images.get_render_border(depsgraph.scene)
+        output_size = pencil4_render_images.get_output_size(depsgraph.scene)
+        stats = self.__new_stats(depsgraph, False)
 
         # コンポジットノードで使用されているPencil+ 4のImageを列挙する
         # Imageが何もなければ処理を抜ける
-        (image, element_dict) = pencil4_render_images.enumerate_images_from_compositor_nodes(depsgraph.view_layer, (width, height))
+        with pencil4_render_stats.measure(stats, "image_enumeration"):
+            (image, element_dict) = pencil4_render_images.enumerate_images_from_compositor_nodes(depsgraph.view_layer, output_size)
         if image is None and len(element_dict) == 0:
             return pencil4line_for_blender.draw_ret.success
 
+        # 前フレームからジオメトリが変化していなければ、ネイティブモジュールのオブジェクトのキャッシュを使用する
+        # キャッシュは1つのみのため、前回と異なるビューレイヤーの描画では使用しない
+        objects_cache_valid = self.__objects_cache_view_layer == depsgraph.view_layer.name
+        self.__objects_cache_view_layer = None
+        if stats is not None:
+            stats.count("objects_cache_valid", int(objects_cache_valid))
+
         # 描画
+        # 描画設定が無い場合は、キャッシュを使用するフレームのみレンダリングの既定の設定(線の太さの基準はレンダリング画像の大きさ)で一時的に作成する
         ret = pencil4line_for_blender.draw_ret.error_unknown
+        temporary_draw_options = objects_cache_valid and self.__interm_context.draw_options is None
         try:
-            ret = self.__draw_line(depsgraph, width, height, image, element_dict,
-                                   is_cycles = depsgraph.scene.render.engine == "CYCLES",
-                                   is_eevee_next = depsgraph.scene.render.engine == "BLENDER_EEVEE_NEXT")
+            tiles_x = depsgraph.scene.pencil4_line_tiles_x
+            tiles_y = depsgraph.scene.pencil4_line_tiles_y
+            if temporary_draw_options:
+                self.__interm_context.draw_options = pencil4line_for_blender.draw_options()
+                self.__interm_context.draw_options.linesize_relative_target_width = width
+                self.__interm_context.draw_options.linesize_relative_target_height = height
+            if self.__interm_context.draw_options is not None:
+                self.__interm_context.draw_options.objects_cache_valid = objects_cache_valid
+            # タイル分割の描画はベクター出力を書き出さないため、分割しないボーダーの描画は切り抜いた範囲を直接描画する
+            # (切り抜かないボーダーは出力画像の一部のみに書き込むため、ベクター出力が無い場合のみタイルの描画を用いる)
+            uses_tiles = tiles_x > 1 or tiles_y > 1 or tile_indices is not None
+            uses_border_tile = (border is not None and output_size == (width, height) and
+                                len(pencil4_render_images.enumerate_vector_outputs_from_compositor_nodes(depsgraph.view_layer)) == 0)
+            if np is not None and (uses_tiles or uses_border_tile):
+                ret = self.__draw_line_tiled(depsgraph, width, height, image, element_dict, border, tiles_x, tiles_y, tile_indices,
+                                             objects_cache_valid, stats)
+            elif border is not None and output_size != (width, height):
+                # 境界の範囲を出力画像の大きさで描画する
+                ret = self.__draw_line(depsgraph, output_size[0], output_size[1], image, element_dict,
+                                       is_cycles = depsgraph.scene.render.engine == "CYCLES",
+                                       is_eevee_next = depsgraph.scene.render.engine == "BLENDER_EEVEE_NEXT",
+                                       crop_matrix = LineTiles.calc_crop_matrix(width, height, border),
+                                       stats = stats)
+            else:
+                ret = self.__draw_line(depsgraph, width, height, image, element_dict,
+                                       is_cycles = depsgraph.scene.render.engine == "CYCLES",
+                                       is_eevee_next = depsgraph.scene.render.engine == "BLENDER_EEVEE_NEXT",
+                                       stats = stats)
+            if self.__reuses_geometry() and (ret == pencil4line_for_blender.draw_ret.success or ret == pencil4line_for_blender.draw_ret.success_without_license):
+                self.__objects_cache_view_layer = depsgraph.view_layer.name
         finally:
+            if temporary_draw_options:
+                self.__interm_context.draw_options = None
+            self.__finish_stats(stats, ret)
+            if stats is not None and bpy.context.preferences.addons[__package__].preferences.record_render_stats:
+                stats.count("render_elements", len(element_dict))
+                pencil4_render_stats.append_json_line(stats, pencil4_render_stats.get_stats_file_path(depsgraph.scene))
+
             if ret != pencil4line_for_blender.draw_ret.success and ret != pencil4line_for_blender.draw_ret.success_without_license:
                 pencil4_render_images.reset_image(image)
                 for i in element_dict.keys():
@@ -128,6 +674,75 @@ class Pencil4RenderSession:
             return ret
 
 
+    def __draw_line_tiled(self,
+                          depsgraph: bpy.types.Depsgraph,
+                          width: int,
+                          height: int,
+                          image: bpy.types.Image,
+                          element_dict: dict[bpy.types.Image, pencil4line_for_blender.line_render_element],
+                          border: tuple[int, int, int, int],
+                          tiles_x: int,
+                          tiles_y: int,
+                          tile_indices: list[int],
+                          objects_cache_valid: bool,
+                          stats: pencil4_render_stats.RenderStats) -> pencil4line_for_blender.draw_ret:
+        # 出力画像(レンダーボーダーの範囲)を分割したタイル毎に、投影行列を切り抜いてタイルの大きさの画像に描画し、重なりを除いた範囲を出力画像に書き込む
+        # ネイティブモジュールが使用するメモリはタイルの大きさで決まる
+        (line_nodes, _) = PencilNodeTree.generate_cpp_nodes(depsgraph)
+        if len(line_nodes) == 0:
+            return self.__draw_line(depsgraph, width, height, image, element_dict, stats = stats)
+        region = border if border is not None else (0, 0, width, height)
+        tiles = LineTiles(width, height, tiles_x, tiles_y, LineTiles.calc_margin(line_nodes), region)
+
+        # ボーダーで切り抜く場合、出力画像の原点はボーダーの左下となる
+        crop_to_border = border is not None and depsgraph.scene.render.use_crop_to_border
+        output_origin = (region[0], region[1]) if crop_to_border else (0, 0)
+        (output_width, output_height) = (region[2] - region[0], region[3] - region[1]) if crop_to_border else (width, height)
+        targets = [x for x in itertools.chain((image,), element_dict.keys()) if x is not None]
+        outputs = {x: np.zeros((output_height, output_width, 4), dtype=np.float32) for x in targets}
+        tile_images = {x: pencil4_render_images.get_tile_image(x) for x in targets}
+        if image is not None:
+            image = tile_images[image]
+        for x, element in element_dict.items():
+            element._image = tile_images[x]
+
+        # 線の太さの基準はタイルではなく出力画像の大きさとする (その他の描画設定はセッションの設定を引き継ぐ)
+        prev_draw_options = self.__interm_context.draw_options
+        draw_options = self.get_draw_option(new_if_none = True)
+        prev_values = (draw_options.linesize_relative_target_width, draw_options.linesize_relative_target_height, draw_options.objects_cache_valid)
+        draw_options.linesize_relative_target_width = width
+        draw_options.linesize_relative_target_height = height
+        draw_options.objects_cache_valid = objects_cache_valid
+        ret = pencil4line_for_blender.draw_ret.success
+        try:
+            for i, tile in enumerate(tiles.tiles):
+                if tile_indices is not None and i not in tile_indices:
+                    continue
+                (x0, y0, x1, y1) = tile.padded_rect
+                for tile_image in tile_images.values():
+                    pencil4_render_images.setup_image(tile_image, x1 - x0, y1 - y0)
+                # 2枚目以降のタイルは同じフレームのオブジェクトを描画するため、ネイティブモジュールのオブジェクトのキャッシュを使用する
+                ret = self.__draw_line(depsgraph, x1 - x0, y1 - y0, image, element_dict,
+                                       is_cycles = depsgraph.scene.render.engine == "CYCLES",
+                                       is_eevee_next = depsgraph.scene.render.engine == "BLENDER_EEVEE_NEXT",
+                                       crop_matrix = LineTiles.calc_crop_matrix(width, height, tile.padded_rect),
+                                       reuse_extraction = True,
+                                       write_vector_outputs = False,
+                                       stats = stats)
+                draw_options.objects_cache_valid = True
+                if ret != pencil4line_for_blender.draw_ret.success and ret != pencil4line_for_blender.draw_ret.success_without_license:
+                    return ret
+                for x, tile_image in tile_images.items():
+                    tiles.paste(outputs[x], output_origin, tile, tile_image)
+            for x, pixels in outputs.items():
+                x.pixels.foreach_set(pixels.ravel())
+                x.update()
+            return ret
+        finally:
+            (draw_options.linesize_relative_target_width, draw_options.linesize_relative_target_height, draw_options.objects_cache_valid) = prev_values
+            self.__interm_context.draw_options = prev_draw_options
+
+
     def draw_line_for_viewport(self, depsgraph: bpy.types.Depsgraph, width: int, height: int, space: bpy.types.SpaceView3D, region_3d: bpy.types.RegionView3D,
                                matrix_override = None):
         if region_3d.view_perspective == "CAMERA" and space.camera is not None and space.camera.type == "CAMERA":
@@ -150,15 +765,21 @@ class Pencil4RenderSession:
                             get_line_size_relative_type(depsgraph) if draw_option is not None and draw_option.linesize_relative_target_width > 0 else 0,
                             camera_matrix,
                             window_matrix)
-        return self.__draw_line(depsgraph, width, height, None, dict(),
+        stats = self.__new_stats(depsgraph, True)
+        ret = self.__draw_line(depsgraph, width, height, None, dict(),
+                                stats = stats,
                                 viewport_camera = interm_camera,
+                                viewport_matrices = (camera_matrix, window_matrix),
                                 space = space,
                                 is_cycles = depsgraph.scene.render.engine == "CYCLES" and space.shading.type == "RENDERED",
                                 is_eevee_next = (depsgraph.scene.render.engine == "BLENDER_EEVEE_NEXT" and (space.shading.type == "RENDERED" or space.shading.type == "MATERIAL")) or
                                                 (depsgraph.scene.render.engine == "CYCLES" and space.shading.type == "MATERIAL" and "BLENDER_EEVEE_NEXT" in bpy.types.RenderSettings.bl_rna.properties["engine"].enum_items.keys()))
+        self.__finish_stats(stats, ret)
+        return ret
 
 
     def get_viewport_image_buffer(self):
+        with pencil4_render_stats.measure(self.last_stats if self.last_stats is not None and self.last_stats.is_viewport else None, "image_readback"):
             return self.__interm_context.get_viewport_image_buffer()
 
 
@@ -169,11 +790,21 @@ class Pencil4RenderSession:
                     image: bpy.types.Image,
                     element_dict: dict[bpy.types.Image, pencil4line_for_blender.line_render_element],
                     viewport_camera: pencil4line_for_blender.interm_camera = None,
+                    viewport_matrices: tuple[Matrix, Matrix] = None,
                     space: bpy.types.SpaceView3D = None,
                     is_cycles: bool = False,
-                    is_eevee_next: bool = False) -> pencil4line_for_blender.draw_ret:
+                    is_eevee_next: bool = False,
+                    crop_matrix: Matrix = None,
+                    reuse_extraction: bool = False,
+                    write_vector_outputs: bool = True,
+                    stats: pencil4_render_stats.RenderStats = None) -> pencil4line_for_blender.draw_ret:
         # ライン描画設定が何もなければライン描画せず終了
-        (line_nodes, line_function_nodes) = PencilNodeTree.generate_cpp_nodes(depsgraph)
+        with pencil4_render_stats.measure(stats, "generate_cpp_nodes"):
+            (line_nodes, line_function_nodes) = PencilNodeTree.generate_cpp_nodes(depsgraph)
+            relevance = PencilNodeTree.get_line_relevance(depsgraph)
+        if stats is not None:
+            stats.count("line_nodes", len(line_nodes))
+            stats.count("line_function_nodes", len(line_function_nodes))
         if len(line_nodes) == 0:
             pencil4_render_images.reset_image(image)
             for i in element_dict.keys():
@@ -190,124 +821,80 @@ class Pencil4RenderSession:
         is_viewport = viewport_camera is not None
         material_override = depsgraph.view_layer_eval.material_override if depsgraph.scene.render.engine == "CYCLES" else None
 
-        # Holdout設定
-        holdout_objects_from_collection = set()
-        check_holdout = depsgraph.scene.render.engine != "BLENDER_WORKBENCH"
-        if is_viewport and space and space.shading.type in ["WIREFRAME", "SOLID"]:
-            check_holdout = False
-        if check_holdout:
-            for object in itertools.chain.from_iterable([c.collection.objects for c in flatten_hierarchy(depsgraph.view_layer_eval.layer_collection) if c.holdout]):
-                holdout_objects_from_collection.add(object)
-
         # 描画用オブジェクトのインスタンスの生成
-        render_instances = []
-        ungrouped_objects = set()
-        mesh_color_attributes = {}
+        frustum_culling = np is not None and bpy.context.preferences.addons[__package__].preferences.frustum_culling
+        with pencil4_render_stats.measure(stats, "instance_extraction"):
+            extraction = self.__extraction.extract(depsgraph, space, is_viewport, is_cycles, is_eevee_next, material_override, frustum_culling, relevance,
+                                                   reusable = reuse_extraction)
+        render_instances = extraction.render_instances
+        ungrouped_objects = set(extraction.ungrouped_objects)
+        mesh_color_attributes = extraction.mesh_color_attributes
+        instance_bounds = extraction.instance_bounds
+        self.__curve_data.update(extraction.curve_data)
+        self.__extracted_mesh_count = extraction.mesh_count
 
-        system_tessellated_objects = set()
-        object_instance: bpy.types.DepsgraphObjectInstance
-        for object_instance in depsgraph.object_instances:
-            obj = object_instance.object
-            src_object = obj.original
-            if obj.type == "MESH" and src_object.type != "MESH":
-                system_tessellated_objects.add(src_object)
-
-        for object_instance in depsgraph.object_instances:
-            if not object_instance.show_self:
-                continue
-
-            obj = object_instance.object
-            if (is_cycles or is_eevee_next) and not obj.visible_camera:
-                continue
-            if is_viewport:
-                if object_instance.parent is not None:
-                    if not object_instance.parent.visible_get(view_layer=depsgraph.view_layer_eval, viewport=space):
-                        continue
-                elif not obj.visible_get(view_layer=depsgraph.view_layer_eval, viewport=space):
-                    continue
-            src_object = obj.original
-
-            # オブジェクトのメッシュを取得
-            mesh: bpy.types.Mesh = None
-            if obj.type == "MESH":
-                mesh = obj.data
-                if mesh.is_editmode:
-                    mesh = obj.to_mesh()
-            elif obj.type in line_object_types:
-                if src_object in system_tessellated_objects:
-                    continue
-                mesh = obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
-                if mesh is None:
-                    continue
-                if obj.type == "CURVE" and len(mesh.polygons) == 0:
-                    # カーブをメッシュに変換したとき、押し出し量が0の場合だとエッジのみが生成されポリゴンは生成されない
-                    # このとき、もともとのカーブに付随していたマテリアルの情報は失われてしまう
-                    # ライン描画にはマテリアルの情報が必要になる場合もあるので、欠損した情報を付加する必要がある
-                    curve: bpy.types.Curve = obj.data
-                    self.__curve_data[mesh] = pencil4line_for_blender.interm_curve_data(curve.materials, [x.material_index for x in curve.splines])
-            
-            if mesh is not None:
-                override_library = src_object.override_library
-                src_object = override_library.reference if override_library is not None else src_object
-
-                ungrouped_objects.add(src_object)
-
-                if check_holdout:
-                    holdout = obj.is_holdout
-                    if not holdout:
-                        holdout = (object_instance.parent if object_instance.parent is not None else obj) in holdout_objects_from_collection
-                else:
-                    holdout = False
-
-                object_materials = ()
-                if material_override is None and any([ms.link == "OBJECT" for ms in obj.material_slots]):
-                    object_materials = tuple([ms.material for ms in obj.material_slots])
-                
-                render_Instance = pencil4line_for_blender.interm_render_Instance(src_object, object_instance.matrix_world, mesh, holdout, object_materials)
-                render_instances.append(render_Instance)
-
-                if mesh_color_attributes is not None and mesh not in mesh_color_attributes:
-                    attr = getattr(mesh, "color_attributes", None)
-                    if attr is None:
-                        mesh_color_attributes = None
-                    else:
-                        mesh_color_attributes[mesh] = list(attr)
+        # 描画対象のオブジェクトが前回から増減した場合は、ネイティブモジュールのオブジェクトのキャッシュを使用しない
+        # (更新の通知を無視したシーンの変更によって、表示状態が変わった場合)
+        # 抽出を共有する他のセッションがメッシュ化の結果を解放した場合も、解放済みのメッシュを参照している可能性があるため使用しない
+        draw_options = self.__interm_context.draw_options
+        if draw_options is not None and draw_options.objects_cache_valid and \
+                (extraction.references != self.__extracted_references or self.__extraction.release_count != self.__release_count):
+            draw_options.objects_cache_valid = False
+        self.__extracted_references = extraction.references
+        self.__release_count = self.__extraction.release_count
 
         # 描画用カメラ情報の生成
         interm_camera = None
         if viewport_camera is not None:
             interm_camera = viewport_camera
+            (camera_matrix, window_matrix) = viewport_matrices if viewport_matrices is not None else (None, None)
         else:
             scene_camera = depsgraph.scene_eval.camera
             projection = scene_camera.calc_matrix_camera(depsgraph,
                                 scale_x= depsgraph.scene.render.pixel_aspect_x,
                                 scale_y= depsgraph.scene.render.pixel_aspect_y)
+            if crop_matrix is not None:
+                projection = crop_matrix @ projection
+            camera_matrix = get_camera_matrix(scene_camera)
+            window_matrix = projection
             interm_camera = pencil4line_for_blender.interm_camera(scene_camera.data.clip_start,
                                 scene_camera.data.clip_end,
                                 get_line_size_relative_type(depsgraph),
-                                get_camera_matrix(scene_camera),
+                                camera_matrix,
                                 projection)
 
+        # カメラの視錐台の外にあるインスタンスを除外する
+        # ラインは画面外 off_screen_distance ピクセルまで考慮されるため、その分だけ視錐台を広げて判定する
+        self.total_instance_count = len(render_instances)
+        self.culled_instance_count = 0
+        if frustum_culling and camera_matrix is not None and len(render_instances) > 0:
+            with pencil4_render_stats.measure(stats, "frustum_culling"):
+                off_screen_distance = max(x.off_screen_distance for x in line_nodes)
+                visible = calc_frustum_visibility(instance_bounds,
+                                                  window_matrix @ camera_matrix.inverted(),
+                                                  2.0 * off_screen_distance / max(width, 1),
+                                                  2.0 * off_screen_distance / max(height, 1),
+                                                  window_matrix[3][3] == 0.0)
+                render_instances = [x for x, v in zip(render_instances, visible) if v]
+            self.culled_instance_count = self.total_instance_count - len(render_instances)
+
         # グループ設定
         groups = []
-        def collect_group(collection: bpy.types.Collection):
-            if collection is None:
-                return
-            for child in collection.children:
-                collect_group(child)
-            for object in collection.objects:
-                if object.type == "EMPTY" and object.instance_type == "COLLECTION":
-                    collect_group(object.instance_collection)
-            if collection.pcl4_line_merge_group:
-                objects = set()
-                for x in collection.all_objects:
-                    x = x if x.override_library is None else x.override_library.reference
-                    if x in ungrouped_objects:
-                        objects.add(x)
+        with pencil4_render_stats.measure(stats, "group_collection"):
+            for group_objects in self.__merge_group_index.get(depsgraph.scene.collection):
+                objects = group_objects & ungrouped_objects
                 if len(objects) > 0:
                     groups.append(list(objects))
                     ungrouped_objects.difference_update(objects)
-        collect_group(depsgraph.scene.collection)
+
+        if stats is not None:
+            stats.count("instances", len(render_instances))
+            stats.count("culled_instances", self.culled_instance_count)
+            stats.count("meshes", self.__extracted_mesh_count)
+            stats.count("merge_groups", len(groups))
+            (tessellated_count, tessellated_memory) = self.__extraction.get_tessellation_stats()
+            stats.count("tessellated_meshes", tessellated_count)
+            stats.count("tessellated_memory", tessellated_memory)
 
         # 描画
         pencil4line_for_blender.set_blender_version(bpy.app.version[0], bpy.app.version[1], bpy.app.version[2])
@@ -326,28 +913,31 @@ class Pencil4RenderSession:
         if is_viewport:
             task_name += f" : viewport"
             self.__interm_context.task_name = task_name
-            return self.__interm_context.draw_for_viewport(width, height,
-                                        interm_camera,
-                                        render_instances,
-                                        material_override,
-                                        list(self.__curve_data.items()),
-                                        line_nodes,
-                                        line_function_nodes,
-                                        groups)
+            with pencil4_render_stats.measure(stats, "native_draw"):
+                return self.__interm_context.draw_for_viewport(width, height,
+                                            interm_camera,
+                                            render_instances,
+                                            material_override,
+                                            list(self.__curve_data.items()),
+                                            line_nodes,
+                                            line_function_nodes,
+                                            groups)
         else:
             task_name += f" : {depsgraph.view_layer.name}"
             task_name += f" : frame {depsgraph.scene.frame_current}"
             self.__interm_context.task_name = task_name
-            return self.__interm_context.draw(image,
-                                        interm_camera,
-                                        render_instances,
-                                        material_override,
-                                        list(self.__curve_data.items()),
-                                        line_nodes,
-                                        line_function_nodes,
-                                        list(element_dict.values()),
-                                        pencil4_render_images.enumerate_vector_outputs_from_compositor_nodes(depsgraph.view_layer, True),
-                                        groups)
+            vector_outputs = pencil4_render_images.enumerate_vector_outputs_from_compositor_nodes(depsgraph.view_layer, True) if write_vector_outputs else []
+            with pencil4_render_stats.measure(stats, "native_draw"):
+                return self.__interm_context.draw(image,
+                                            interm_camera,
+                                            render_instances,
+                                            material_override,
+                                            list(self.__curve_data.items()),
+                                            line_nodes,
+                                            line_function_nodes,
+                                            list(element_dict.values()),
+                                            vector_outputs,
+                                            groups)
     
     def get_draw_option(self, new_if_none:bool = False):
         if new_if_none and self.__interm_context.draw_options is None:
@@ -358,6 +948,144 @@ class Pencil4RenderSession:
         self.__interm_context.draw_options = None
 
 
+def calc_mesh_bounds(mesh: bpy.types.Mesh):
+    vertex_count = len(mesh.vertices)
+    if np is None or vertex_count == 0:
+        return None
+    co = np.empty(vertex_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    return (co.min(axis=0), co.max(axis=0))
+
+
+def calc_frustum_visibility(instance_bounds: list, view_projection: Matrix, margin_x: float, margin_y: float, is_perspective: bool):
+    # 各インスタンスのバウンディングボックスの8頂点をクリップ空間へ変換し、
+    # いずれかの平面に対して全頂点が外側にあるインスタンスを不可視と判定する
+    count = len(instance_bounds)
+    visible = np.ones(count, dtype=bool)
+    indices = [i for i, (_, bounds) in enumerate(instance_bounds) if bounds is not None]
+    if len(indices) == 0:
+        return visible
+    bounds_min = np.array([instance_bounds[i][1][0] for i in indices], dtype=np.float64)
+    bounds_max = np.array([instance_bounds[i][1][1] for i in indices], dtype=np.float64)
+    matrices = np.array([instance_bounds[i][0] for i in indices], dtype=np.float64)
+
+    # (N, 8, 4) のバウンディングボックスの頂点
+    selector = np.array(list(itertools.product((0, 1), repeat=3)), dtype=bool)
+    corners = np.where(selector[np.newaxis, :, :], bounds_max[:, np.newaxis, :], bounds_min[:, np.newaxis, :])
+    corners = np.concatenate((corners, np.ones((len(indices), 8, 1))), axis=2)
+
+    clip = np.einsum("ij,njk,nmk->nmi", np.array(view_projection, dtype=np.float64), matrices, corners)
+    x, y, z, w = clip[..., 0], clip[..., 1], clip[..., 2], clip[..., 3]
+    wx = w * (1.0 + margin_x)
+    wy = w * (1.0 + margin_y)
+    outside = (np.all(x > wx, axis=1) | np.all(x < -wx, axis=1) |
+               np.all(y > wy, axis=1) | np.all(y < -wy, axis=1))
+    if is_perspective:
+        # 平行投影の場合はクリッピングを行わずに描画するため、前後の判定は透視投影の場合のみ行う
+        outside |= np.all(z < -w, axis=1) | np.all(z > w, axis=1)
+    visible[indices] = ~outside
+    return visible
+
+
+# 高解像度のレンダリングを分割して描画するためのタイル
+# region (レンダーボーダーの範囲) を分割し、各タイルは画面外のラインの考慮範囲(off_screen_distance)とブラシの太さの分だけ周囲と重ねて描画する
+class LineTiles:
+    class Tile:
+        def __init__(self, rect: tuple[int, int, int, int], padded_rect: tuple[int, int, int, int]):
+            # (x0, y0, x1, y1): 出力画像の左下を原点とするピクセル座標
+            self.rect = rect
+            self.padded_rect = padded_rect
+
+    def __init__(self, width: int, height: int, tiles_x: int, tiles_y: int, margin: int, region: tuple[int, int, int, int] = None):
+        self.width = width
+        self.height = height
+        self.tiles = []
+        (rx0, ry0, rx1, ry1) = region if region is not None else (0, 0, width, height)
+        xs = [rx0 + (rx1 - rx0) * i // tiles_x for i in range(tiles_x + 1)]
+        ys = [ry0 + (ry1 - ry0) * i // tiles_y for i in range(tiles_y + 1)]
+        for y0, y1 in zip(ys, ys[1:]):
+            for x0, x1 in zip(xs, xs[1:]):
+                if x1 > x0 and y1 > y0:
+                    self.tiles.append(LineTiles.Tile((x0, y0, x1, y1),
+                                                     (max(0, x0 - margin), max(0, y0 - margin), min(width, x1 + margin), min(height, y1 + margin))))
+
+    @staticmethod
+    def calc_margin(line_nodes: list) -> int:
+        # 描画するラインのラインセットが参照するブラシ設定のみを対象とする (C++側のノードはオーバーライド・品質設定を適用済み)
+        off_screen_distance = max(x.off_screen_distance for x in line_nodes)
+        brush_size = max((brush.size
+                          for line_set in itertools.chain.from_iterable(x.line_sets for x in line_nodes) if line_set is not None
+                          for brush in (getattr(line_set, name) for name in dir(line_set) if name.endswith("brush_settings")) if brush is not None),
+                         default=1.0)
+        return math.ceil(off_screen_distance + brush_size * 2.0)
+
+    @staticmethod
+    def calc_crop_matrix(width: int, height: int, rect: tuple[int, int, int, int]) -> Matrix:
+        # 正規化デバイス座標の rect の範囲を [-1, 1] に拡大する (投影行列の左から掛ける)
+        (x0, y0, x1, y1) = rect
+        left, right = 2.0 * x0 / width - 1.0, 2.0 * x1 / width - 1.0
+        bottom, top = 2.0 * y0 / height - 1.0, 2.0 * y1 / height - 1.0
+        return Matrix(((2.0 / (right - left), 0, 0, -(right + left) / (right - left)),
+                       (0, 2.0 / (top - bottom), 0, -(top + bottom) / (top - bottom)),
+                       (0, 0, 1, 0),
+                       (0, 0, 0, 1)))
+
+    @staticmethod
+    def paste(output, output_origin: tuple[int, int], tile: Tile, tile_image: bpy.types.Image):
+        (px0, py0, px1, py1) = tile.padded_rect
+        (x0, y0, x1, y1) = tile.rect
+        (ox, oy) = output_origin
+        pixels = np.empty((px1 - px0) * (py1 - py0) * 4, dtype=np.float32)
+        tile_image.pixels.foreach_get(pixels)
+        pixels = pixels.reshape(py1 - py0, px1 - px0, 4)
+        output[y0 - oy:y1 - oy, x0 - ox:x1 - ox] = pixels[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+
+# depsgraph.updates を変更の種類毎に分類したもの
+class ObjectUpdates:
+    # 選択の変更などで通知される、描画対象のオブジェクトに影響しない更新
+    ignored_id_types = (bpy.types.Scene, bpy.types.Screen, bpy.types.WindowManager, bpy.types.WorkSpace)
+
+    def __init__(self, depsgraph: bpy.types.Depsgraph = None):
+        self.transform = set()
+        self.geometry = set()
+        self.shading = set()
+        self.others = set()
+        self.structure_changed = False
+        if depsgraph is None:
+            return
+        for update in depsgraph.updates:
+            id = update.id
+            if isinstance(id, bpy.types.Object):
+                obj = id.original
+                if update.is_updated_geometry:
+                    self.geometry.add(obj)
+                if update.is_updated_shading:
+                    self.shading.add(obj)
+                if update.is_updated_transform:
+                    self.transform.add(obj)
+                if not (update.is_updated_geometry or update.is_updated_shading or update.is_updated_transform):
+                    self.others.add(obj)
+            elif isinstance(id, self.ignored_id_types) and not update.is_updated_geometry and not update.is_updated_shading:
+                continue
+            else:
+                self.structure_changed = True
+
+    def objects_to_refresh(self) -> dict[bpy.types.Object, bool]:
+        # 戻り値: セッション内の情報を破棄するオブジェクト -> ジオメトリが更新されたかどうか
+        # 移動のみのオブジェクトは、行列を描画毎に取得するため対象外とする
+        ret = {x: True for x in self.geometry}
+        for obj in itertools.chain(self.shading, self.others):
+            ret.setdefault(obj, False)
+        return ret
+
+    def invalidates_objects_cache(self) -> bool:
+        # ネイティブモジュールが保持するオブジェクトのキャッシュ (draw_options.objects_cache_valid) を破棄する必要があるか
+        # 移動のみのオブジェクト(カメラを含む)は、インスタンスの行列を描画毎にネイティブモジュールへ渡すため対象外とする
+        return self.structure_changed or len(self.geometry) > 0 or len(self.shading) > 0
+
+
 def get_line_size_relative_type(depsgraph: bpy.types.Depsgraph) -> int:
     camera = depsgraph.scene_eval.camera
     return ["AUTO", "HORIZONTAL", "VERTICAL"].index(camera.data.sensor_fit) if camera is not None else 0
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# The Original Code is Copyright (C) P SOFTHOUSE Co., Ltd. All rights reserved.
+
+import bpy
+import collections
+import contextlib
+import json
+import os
+import time
+
+STATS_FILE_NAME = "pencil4_line_stats.jsonl"
+
+# ライン描画1回分の処理時間(ステージ毎)と、処理対象の数の記録
+class RenderStats:
+    def __init__(self, task_name: str, frame: int, is_viewport: bool):
+        self.task_name = task_name
+        self.frame = frame
+        self.is_viewport = is_viewport
+        self.timestamp = time.time()
+        self.stages: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.result = ""
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) + (time.perf_counter() - start)
+
+    def count(self, name: str, value: int):
+        self.counts[name] = value
+
+    def total_time(self) -> float:
+        return sum(self.stages.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "task": self.task_name,
+            "frame": self.frame,
+            "viewport": self.is_viewport,
+            "timestamp": self.timestamp,
+            "result": self.result,
+            "stages_ms": {k: v * 1000.0 for k, v in self.stages.items()},
+            "total_ms": self.total_time() * 1000.0,
+            "counts": dict(self.counts),
+        }
+
+
+def measure(stats: RenderStats, stage: str):
+    return stats.measure(stage) if stats is not None else contextlib.nullcontext()
+
+
+# 直近の記録はPythonから参照できるように保持する
+__history = collections.deque(maxlen=256)
+
+def record(stats: RenderStats):
+    __history.append(stats)
+
+def get_history() -> list[RenderStats]:
+    return list(__history)
+
+def clear_history():
+    __history.clear()
+
+
+def get_stats_file_path(scene: bpy.types.Scene) -> str:
+    # レンダリング結果の出力先と同じフォルダに出力する
+    output_path = bpy.path.abspath(scene.render.filepath)
+    directory = output_path if output_path.endswith(("/", "\\")) else os.path.dirname(output_path)
+    return os.path.join(directory if directory != "" else bpy.path.abspath("//"), STATS_FILE_NAME)
+
+def append_json_line(stats: RenderStats, filepath: str) -> bool:
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "a", encoding="utf-8") as f:
+            f.write(json.dumps(stats.to_dict()) + "\n")
+        return True
+    except Exception as e:
+        print(f"Pencil+ 4 Line : Failed to write statistics to {filepath} ({e})")
+        return False
@@ -11,6 +11,7 @@ if "bpy" in locals():
     imp.reload(pencil4line_for_blender)
     imp.reload(pencil4_render_images)
     imp.reload(pencil4_render_session)
+    imp.reload(pencil4_frame_writer)
     imp.reload(gpu_utils)
     imp.reload(Translation)
     __is_reloaded = True
@@ -54,12 +55,22 @@ else:
                 from .bin import pencil4line_for_blender_linux_311_500 as pencil4line_for_blender
     from . import pencil4_render_images
     from . import pencil4_render_session
+    from . import pencil4_frame_writer
     from .misc import gpu_utils
     from .i18n import Translation
 
 from .pencil4_render_session import Pencil4RenderSession as RenderSession
+from .pencil4_render_stats import RenderStats, record as record_render_stats
+from .node_tree import PencilNodeTree
 
+import array
+import collections
+import hashlib
 import itertools
+import os
+import statistics
+import struct
+import time
 from typing import Tuple
 from typing import Iterable
 import bpy
@@ -71,6 +82,11 @@ from enum import IntEnum
 from mathutils import Matrix
 from bpy_extras import anim_utils
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class ViewportLineRenderSettings(bpy.types.PropertyGroup):
     rendering_target_items = (
         ("WHOLE_VIEWPORT", "Whole Viewport", "", 0),
@@ -82,6 +98,7 @@ class ViewportLineRenderSettings(bpy.types.PropertyGroup):
     background_color: bpy.props.FloatVectorProperty(subtype="COLOR", size=4, min=0.0, max=1.0, default=[1.0, 1.0, 1.0, 1.0])
     camera_view_range: bpy.props.EnumProperty(items=rendering_target_items, default="WHOLE_VIEWPORT")
     camera_view_scale: bpy.props.BoolProperty(default=False)
+    progressive_resolution: bpy.props.BoolProperty(default=False)
     enalbe_background_color_for_render: bpy.props.BoolProperty(default=False)
     background_color_for_render: bpy.props.FloatVectorProperty(subtype="COLOR", size=4, min=0.0, max=1.0, default=[1.0, 1.0, 1.0, 1.0])
 
@@ -93,7 +110,9 @@ class ViewportLineRenderManager:
     in_render_session = False
 
     __settings_dict = {}
-    __timeout2_interval = 0.500
+    __update_count = 0
+    # 同じ depsgraph を描画する全てのリージョンで、描画対象のインスタンスの抽出結果を共有する
+    __scene_extraction = pencil4_render_session.SceneExtraction(max_depsgraphs=4)
 
     class RenderMode(IntEnum):
         Initialize = 0
@@ -108,6 +127,221 @@ class ViewportLineRenderManager:
             self.handle = None
             self.handle_2d = None
             self.render_session_dict = {}
+            self.gpu_resources_dict = {}
+            self.result_cache_dict = {}
+            self.result_cache_hits = 0
+            self.result_cache_misses = 0
+
+        def get_result_cache(self, region_3d: bpy.types.RegionView3D):
+            ret = self.result_cache_dict.get(region_3d)
+            if ret is None:
+                ret = ViewportLineRenderManager.ResultCache()
+                self.result_cache_dict[region_3d] = ret
+            return ret
+
+        def get_gpu_resources(self, region_3d: bpy.types.RegionView3D):
+            ret = self.gpu_resources_dict.get(region_3d)
+            if ret is None:
+                ret = ViewportLineRenderManager.GPUResources()
+                self.gpu_resources_dict[region_3d] = ret
+            return ret
+
+    class GPUResources:
+        # リージョン毎に再描画をまたいで保持するGPUリソース
+        # GPUTexture の内容は Python から書き換えられないため、新しい描画結果が渡された場合のみテクスチャを生成する
+        # 転送用のバッファはサイズが変わった場合のみ確保し直す
+        def __init__(self) -> None:
+            self.size = (0, 0)
+            self.buffer = None
+            self.texture = None
+
+        def get_texture(self, width: int, height: int, pixels = None) -> gpu.types.GPUTexture:
+            if pixels is None:
+                return self.texture if self.size == (width, height) else None
+            if np is not None and isinstance(pixels, np.ndarray):
+                # numpy の配列(フレームのキャッシュ)は要素毎に代入せず、配列から直接バッファを生成する
+                self.buffer = gpu.types.Buffer("FLOAT", width * height * 4, pixels)
+                self.size = (width, height)
+                self.texture = gpu.types.GPUTexture((width, height), data=self.buffer)
+                return self.texture
+            if self.buffer is None or self.size != (width, height):
+                self.buffer = gpu.types.Buffer("FLOAT", width * height * 4)
+                self.size = (width, height)
+                self.texture = None
+            self.buffer[:] = pixels
+            self.texture = gpu.types.GPUTexture((width, height), data=self.buffer)
+            return self.texture
+
+    class Flipbook:
+        # フレーム毎のライン描画結果のキャッシュ (再生中・フレーム範囲のキャッシュの操作で作成し、タイムラインの移動時に再利用する)
+        # 描画結果は半精度浮動小数点または8bitに変換して保持し、メモリの上限を超えた場合は最も古く参照されたフレームから破棄する
+        # シーンが変更された場合は全てのフレームを破棄する
+        def __init__(self) -> None:
+            self.__entries = collections.OrderedDict()
+            self.__memory_size = 0
+            self.__nodes_edit_count = 0
+            self.filling = False
+
+        @property
+        def frame_count(self) -> int:
+            return len(self.__entries)
+
+        @property
+        def memory_size(self) -> int:
+            return self.__memory_size
+
+        def clear(self):
+            self.__entries.clear()
+            self.__memory_size = 0
+
+        def validate(self, nodes_edit_count: int):
+            # ノードの編集は depsgraph の更新として通知されないため、編集回数が変わった場合に全てのフレームを破棄する
+            if self.__nodes_edit_count != nodes_edit_count:
+                self.__nodes_edit_count = nodes_edit_count
+                self.clear()
+
+        def get(self, key: tuple):
+            data = self.__entries.get(key)
+            if data is None:
+                return None
+            self.__entries.move_to_end(key)
+            if data.dtype == np.uint8:
+                return data.astype(np.float32) * np.float32(1.0 / 255.0)
+            return data.astype(np.float32)
+
+        def put(self, key: tuple, pixels, memory_budget: int, data_format: str):
+            pixels = np.asarray(pixels, dtype=np.float32)
+            if data_format == "BYTE":
+                data = np.rint(np.clip(pixels, 0.0, 1.0) * 255.0).astype(np.uint8)
+            else:
+                data = pixels.astype(np.float16)
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.__memory_size -= old.nbytes
+            self.__entries[key] = data
+            self.__memory_size += data.nbytes
+            while self.__memory_size > memory_budget and len(self.__entries) > 0:
+                (_, old) = self.__entries.popitem(last=False)
+                self.__memory_size -= old.nbytes
+
+    __flipbook = Flipbook()
+
+    class TimeoutScheduler:
+        # リージョン・シーン毎の描画時間の履歴から、操作中のタイムアウト時間と再試行までの待機時間を決める
+        history_length = 16
+        min_timeout = 0.100
+        max_timeout = 0.200
+        min_retry_interval = 0.250
+        max_retry_interval = 2.000
+        max_backoff_interval = 60.0
+
+        def __init__(self) -> None:
+            self.__histories = {}
+            self.__scene_key = None
+            self.last_draw_time = None
+            self.timeout_count = 0
+            self.backoff_count = 0
+
+        def set_scene(self, scene: bpy.types.Scene):
+            self.__scene_key = scene.name_full
+
+        @property
+        def history(self) -> collections.deque:
+            history = self.__histories.get(self.__scene_key)
+            if history is None:
+                history = collections.deque(maxlen=self.history_length)
+                self.__histories[self.__scene_key] = history
+            return history
+
+        def record(self, draw_time: float, succeeded: bool):
+            # タイムアウトした描画の時間は実際の描画時間ではないため、履歴には含めない
+            self.last_draw_time = draw_time
+            if succeeded:
+                self.history.append(draw_time)
+                self.backoff_count = 0
+
+        def on_timeout(self, is_interactive: bool):
+            self.timeout_count += 1
+            if not is_interactive:
+                self.backoff_count += 1
+
+        def average_draw_time(self) -> float:
+            history = self.history
+            return statistics.fmean(history) if len(history) > 0 else None
+
+        def interactive_timeout(self, timeout: float) -> float:
+            # 最近の描画の最長時間に余裕を持たせた時間 (長いタイムアウト時間を超えない)
+            # 操作中に画面の更新が止まらないよう上限を設け、上限に収まらないシーンは縮小した解像度での描画で対応する
+            history = self.history
+            if len(history) == 0:
+                return self.min_timeout
+            return min(max(max(history) * 1.25, self.min_timeout), self.max_timeout, timeout)
+
+        def retry_interval(self) -> float:
+            # 描画に時間の掛かるシーンほど、再描画が落ち着くまで長く待機する
+            history = self.history
+            if len(history) == 0:
+                return self.min_retry_interval * 2.0
+            return min(max(statistics.median(history) * 3.0, self.min_retry_interval), self.max_retry_interval)
+
+        def backoff_interval(self) -> float:
+            # 長いタイムアウト時間でもタイムアウトした場合は、失敗する毎に再試行までの時間を倍にする
+            return min(2.0 ** self.backoff_count, self.max_backoff_interval)
+
+    class ProgressiveResolution:
+        # 視点の操作中は縮小した解像度でライン描画し、操作が止まった後に段階的に元の解像度へ戻す
+        # 操作中の解像度は最も小さい解像度から始め、描画時間に余裕があれば上げる
+        scales = (0.25, 0.5, 1.0)
+        settle_interval = 0.150
+
+        def __init__(self) -> None:
+            self.view_key = None
+            self.navigation_level = 0
+            self.level = len(self.scales) - 1
+            self.is_navigating = False
+            self.timer_func = None
+
+        def begin(self, view_key: tuple) -> float:
+            self.is_navigating = view_key != self.view_key
+            if self.is_navigating:
+                self.view_key = view_key
+                self.level = self.navigation_level
+            elif self.level < len(self.scales) - 1:
+                self.level += 1
+            return self.scales[self.level]
+
+        def end(self, draw_time: float, timeout: float):
+            # 操作中の描画時間がタイムアウト時間の半分に収まるように、操作中の解像度を調整する
+            # (解像度を1段階上げると描画する画素数は4倍になる)
+            if not self.is_navigating:
+                return
+            budget = timeout * 0.5
+            if draw_time > budget and self.navigation_level > 0:
+                self.navigation_level -= 1
+            elif draw_time < budget * 0.25 and self.navigation_level < len(self.scales) - 1:
+                self.navigation_level += 1
+
+        def retry_on_timeout(self) -> bool:
+            # タイムアウトした場合は、待機状態にせずに解像度を下げて再試行する
+            if self.level == 0:
+                return False
+            self.navigation_level = self.level - 1
+            self.view_key = None
+            return True
+
+        def is_refined(self) -> bool:
+            return self.level == len(self.scales) - 1
+
+    class ResultCache:
+        # リージョン毎の直前のライン描画結果
+        # 描画条件が同一で、シーン・ノードツリーに変更がなければライン描画を行わずに再利用する
+        def __init__(self) -> None:
+            self.key = None
+            self.pixels = None
+
+        def clear(self):
+            self.key = None
+            self.pixels = None
 
     @staticmethod
     def reset_for_space(space: bpy.types.Space) -> bool:
@@ -124,7 +358,10 @@ class ViewportLineRenderManager:
         for session in dict_value.render_session_dict.values():
             if session.registered_timer_func:
                 bpy.app.timers.unregister(session.registered_timer_func)
+            __class__.__unregister_progressive_timer(session)
         dict_value.render_session_dict.clear()
+        dict_value.gpu_resources_dict.clear()
+        dict_value.result_cache_dict.clear()
         return modified
 
     @staticmethod
@@ -247,11 +484,17 @@ class ViewportLineRenderManager:
         del_keys = list(x for x in dict_value.render_session_dict if not x in regions)
         for key in del_keys:
             dict_value.render_session_dict.pop(key)
+        for key in list(x for x in dict_value.gpu_resources_dict if not x in regions):
+            dict_value.gpu_resources_dict.pop(key)
+        for key in list(x for x in dict_value.result_cache_dict if not x in regions):
+            dict_value.result_cache_dict.pop(key)
         if dict_value.render_session_dict.get(region_3d) is None:
-            session = RenderSession()
+            session = RenderSession(cls.__scene_extraction)
             dict_value.render_session_dict[region_3d] = session
             session.render_mode = cls.RenderMode.Initialize
             session.registered_timer_func = None
+            session.progressive_resolution = cls.ProgressiveResolution()
+            session.timeout_scheduler = cls.TimeoutScheduler()
 
         return dict_value.render_session_dict[region_3d]
 
@@ -266,11 +509,74 @@ class ViewportLineRenderManager:
                 ret = render_session.render_mode
         return ret      
 
+    @classmethod
+    def get_timeout_schedulers(cls, space: bpy.types.SpaceView3D) -> list[TimeoutScheduler]:
+        dict_value = cls.get(space)
+        if dict_value is None:
+            return []
+        return [x.timeout_scheduler for x in dict_value.render_session_dict.values()]
+
+    @classmethod
+    def get_culling_stats(cls, space: bpy.types.SpaceView3D) -> tuple[int, int]:
+        dict_value = cls.get(space)
+        if dict_value is None:
+            return (0, 0)
+        sessions = dict_value.render_session_dict.values()
+        return (sum(x.culled_instance_count for x in sessions), sum(x.total_instance_count for x in sessions))
+
+    @classmethod
+    def get_result_cache_stats(cls, space: bpy.types.SpaceView3D) -> tuple[int, int]:
+        dict_value = cls.get(space)
+        if dict_value is None:
+            return (0, 0)
+        return (dict_value.result_cache_hits, dict_value.result_cache_hits + dict_value.result_cache_misses)
+
+    @classmethod
+    def notify_update(cls):
+        # depsgraph の更新・フレームの変更毎に呼び出し、描画結果の再利用の判定に用いる
+        cls.__update_count += 1
+
+    @classmethod
+    def calc_result_key(cls, view_state: tuple) -> tuple:
+        # 描画結果の再利用の判定に用いるキー (シーンの変更は depsgraph の更新回数、ノードの編集は C++ 側のノードのキャッシュの世代で判定する)
+        return (cls.__update_count, PencilNodeTree.get_cpp_nodes_generation()) + view_state
+
+    @classmethod
+    def clear_scene_extraction(cls):
+        cls.__scene_extraction.clear()
+
+    @classmethod
+    def invalidate_flipbook(cls):
+        # 描画結果に影響するシーン・ノードツリーの編集(フレームの変更以外の depsgraph の更新)毎に呼び出す
+        cls.__flipbook.clear()
+
+    @classmethod
+    def set_flipbook_filling(cls, filling: bool):
+        cls.__flipbook.filling = filling
+
+    @classmethod
+    def get_flipbook_stats(cls) -> tuple[int, int]:
+        return (cls.__flipbook.frame_count, cls.__flipbook.memory_size)
+
     @classmethod
     def invalidate_objects_cache(cls):
+        cls.notify_update()
         for dict_value in cls.__settings_dict.values():
             for render_session in dict_value.render_session_dict.values():
                 render_session.objects_cache_valid = False
+
+    @classmethod
+    def invalidate_objects(cls, updates: pencil4_render_session.ObjectUpdates):
+        # 更新されたオブジェクトの情報のみを破棄し、ジオメトリ・シェーディングの変更などがあった場合はネイティブモジュールのキャッシュを破棄する
+        objects = updates.objects_to_refresh()
+        invalidates_objects_cache = updates.invalidates_objects_cache()
+        if len(objects) == 0 and not invalidates_objects_cache:
+            return
+        cls.__scene_extraction.invalidate_objects(objects)
+        if invalidates_objects_cache:
+            for dict_value in cls.__settings_dict.values():
+                for render_session in dict_value.render_session_dict.values():
+                    render_session.objects_cache_valid = False
         
 
     @classmethod
@@ -284,6 +590,51 @@ class ViewportLineRenderManager:
             render_session.render_mode = cls.RenderMode.Initialize
             region.tag_redraw()
 
+    @classmethod
+    def __draw_after_backoff(cls, space: bpy.types.SpaceView3D, region: bpy.types.Region, region_3d: bpy.types.RegionView3D):
+        render_session = cls.get_render_session(space, region_3d)
+        render_session.registered_timer_func = None
+
+        # 長いタイムアウト時間でもタイムアウトした場合、ライン描画を停止したままにせず、間隔を空けて再試行する
+        if render_session.render_mode == __class__.RenderMode.Timeout:
+            render_session.render_mode = cls.RenderMode.Initialize
+            region.tag_redraw()
+            RedrawPanel()
+
+    @staticmethod
+    def __unregister_progressive_timer(render_session: pencil4_render_session.Pencil4RenderSession):
+        progressive = render_session.progressive_resolution
+        if progressive.timer_func is not None:
+            if bpy.app.timers.is_registered(progressive.timer_func):
+                bpy.app.timers.unregister(progressive.timer_func)
+            progressive.timer_func = None
+
+    @classmethod
+    def __register_progressive_timer(cls, render_session: pencil4_render_session.Pencil4RenderSession, region: bpy.types.Region, interval: float):
+        # 視点の操作が止まった後に再描画し、解像度を上げる
+        cls.__unregister_progressive_timer(render_session)
+        progressive = render_session.progressive_resolution
+        def redraw():
+            progressive.timer_func = None
+            region.tag_redraw()
+        progressive.timer_func = redraw
+        bpy.app.timers.register(redraw, first_interval=interval)
+
+    @staticmethod
+    def __view_state_key(depsgraph: bpy.types.Depsgraph, width: int, height: int,
+                         space: bpy.types.SpaceView3D, region: bpy.types.Region, region_3d: bpy.types.RegionView3D, draw_option) -> tuple:
+        # ライン描画の結果に影響する、シーン以外の条件
+        return (depsgraph.as_pointer(),
+                width, height, region.width, region.height,
+                tuple(tuple(x) for x in region_3d.view_matrix),
+                tuple(tuple(x) for x in region_3d.window_matrix),
+                region_3d.view_perspective,
+                space.camera, space.clip_start, space.clip_end, space.shading.type,
+                draw_option.line_scale,
+                draw_option.linesize_relative_target_width,
+                draw_option.linesize_relative_target_height,
+                draw_option.linesize_absolute_scale)
+
     @staticmethod
     def camera_border(scene: bpy.types.Scene, region: bpy.types.Region, space: bpy.types.SpaceView3D, rv3d: bpy.types.RegionView3D):
         from bpy_extras.view3d_utils import location_3d_to_region_2d
@@ -304,10 +655,13 @@ class ViewportLineRenderManager:
         region_3d: bpy.types.RegionView3D = bpy.context.region_data
         render_session = cls.get_render_session(space, region_3d)
         pixels = None
+        is_new_pixels = True
         width = region.width
         height = region.height
         draw_texture_origin = None
         draw_texture_size = None
+        progressive = None
+        texture_filter = False
 
         #　ライン描画の実行
         if render_session.render_mode >= 0 and render_session.render_mode != cls.RenderMode.Wait:
@@ -321,8 +675,10 @@ class ViewportLineRenderManager:
 
                 # 描画
                 draw_option = render_session.get_draw_option(new_if_none = True)
-                draw_option.timeout = 0.100 if render_session.render_mode != cls.RenderMode.Initialize else\
-                    bpy.context.preferences.addons[__package__].preferences.viewport_render_timeout
+                scheduler = render_session.timeout_scheduler
+                scheduler.set_scene(depsgraph.scene)
+                long_timeout = bpy.context.preferences.addons[__package__].preferences.viewport_render_timeout
+                draw_option.timeout = scheduler.interactive_timeout(long_timeout) if render_session.render_mode != cls.RenderMode.Initialize else long_timeout
                 draw_option.objects_cache_valid = render_session.objects_cache_valid if render_session.render_mode != cls.RenderMode.Initialize else False
                 matrix_override_func = None
                 if region_3d.view_perspective == "CAMERA" and settings.camera_view_range == "CAMERA_AREA":
@@ -350,19 +706,88 @@ class ViewportLineRenderManager:
                     draw_option.linesize_relative_target_height = 0
                     draw_option.linesize_absolute_scale = bpy.context.preferences.system.ui_scale / bpy.context.preferences.view.ui_scale
 
-                draw_ret = render_session.draw_line_for_viewport(depsgraph, width, height, space, region_3d, matrix_override_func)
-                render_session.cleanup_frame()
-
-                if draw_ret == pencil4line_for_blender.draw_ret.success or draw_ret == pencil4line_for_blender.draw_ret.success_without_license:
+                # 縮小した解像度で描画する場合は、ラインの太さも同じ比率で縮小する
+                progressive = render_session.progressive_resolution if settings.progressive_resolution else None
+                if progressive is not None:
+                    resolution_scale = progressive.begin((tuple(tuple(x) for x in region_3d.view_matrix),
+                                                          tuple(tuple(x) for x in region_3d.window_matrix),
+                                                          region.width, region.height))
+                    if resolution_scale < 1.0:
+                        width = max(1, int(width * resolution_scale))
+                        height = max(1, int(height * resolution_scale))
+                        draw_option.line_scale *= resolution_scale
+                        texture_filter = True
+
+                # 描画結果の再利用の判定
+                dict_value = cls.get(space)
+                result_cache = dict_value.get_result_cache(region_3d)
+                view_state = cls.__view_state_key(depsgraph, width, height, space, region, region_3d, draw_option)
+                result_key = cls.calc_result_key(view_state)
+                preferences = bpy.context.preferences.addons[__package__].preferences
+                flipbook_key = (depsgraph.scene.frame_current,) + view_state if np is not None and preferences.viewport_flipbook else None
+                flipbook_pixels = None
+                if flipbook_key is not None:
+                    cls.__flipbook.validate(PencilNodeTree.get_nodes_edit_count())
+                if flipbook_key is not None and render_session.render_mode == cls.RenderMode.Normal and result_cache.key != result_key:
+                    flipbook_pixels = cls.__flipbook.get(flipbook_key)
+                if render_session.render_mode == cls.RenderMode.Normal and result_cache.key == result_key:
+                    # 前回と同一の描画結果となるため、ライン描画を省略する
+                    dict_value.result_cache_hits += 1
+                    pixels = result_cache.pixels
+                    is_new_pixels = False
+                    draw_ret = None
+                    if bpy.context.preferences.addons[__package__].preferences.record_render_stats:
+                        stats = RenderStats(depsgraph.view_layer.name, depsgraph.scene.frame_current, True)
+                        stats.result = "cached"
+                        record_render_stats(stats)
+                elif flipbook_pixels is not None:
+                    # キャッシュしたフレームの描画結果を表示する (テクスチャの転送のみを行う)
+                    dict_value.result_cache_hits += 1
+                    pixels = flipbook_pixels
+                    draw_ret = None
+                    result_cache.key = result_key
+                    result_cache.pixels = pixels
+                    if preferences.record_render_stats:
+                        stats = RenderStats(depsgraph.view_layer.name, depsgraph.scene.frame_current, True)
+                        stats.result = "flipbook"
+                        record_render_stats(stats)
+                else:
+                    dict_value.result_cache_misses += 1
+                    result_cache.clear()
+                    draw_start = time.perf_counter()
+                    draw_ret = render_session.draw_line_for_viewport(depsgraph, width, height, space, region_3d, matrix_override_func)
+                    render_session.cleanup_frame(depsgraph)
+                    draw_time = time.perf_counter() - draw_start
+                    scheduler.record(draw_time, draw_ret == pencil4line_for_blender.draw_ret.success or draw_ret == pencil4line_for_blender.draw_ret.success_without_license)
+                    if progressive is not None:
+                        progressive.end(draw_time, draw_option.timeout)
+
+                if draw_ret is None:
+                    # 描画結果を再利用した
+                    pass
+                elif draw_ret == pencil4line_for_blender.draw_ret.success or draw_ret == pencil4line_for_blender.draw_ret.success_without_license:
                     pixels = render_session.get_viewport_image_buffer()
                     render_session.render_mode = cls.RenderMode.Normal
                     render_session.objects_cache_valid = True
+                    if pixels is not None:
+                        result_cache.key = result_key
+                        result_cache.pixels = pixels
+                        # 再生中・フレーム範囲のキャッシュ中は、縮小していない描画結果をフレームのキャッシュに追加する
+                        if flipbook_key is not None and not texture_filter and (cls.__flipbook.filling or bpy.context.screen.is_animation_playing):
+                            cls.__flipbook.put(flipbook_key, pixels, preferences.viewport_flipbook_memory * 1024 * 1024, preferences.viewport_flipbook_format)
                 elif draw_ret == pencil4line_for_blender.draw_ret.timeout:
                     render_session.objects_cache_valid = False
+                    scheduler.on_timeout(render_session.render_mode != cls.RenderMode.Initialize)
                     if render_session.render_mode == cls.RenderMode.Initialize:
-                        # 長い設定時間にも関わらずタイムアウトした場合、以降のライン描画を停止する
+                        # 長い設定時間にも関わらずタイムアウトした場合、ライン描画を停止し、しばらく待ってから再試行する
                         render_session.render_mode = cls.RenderMode.Timeout
                         bpy.app.timers.register(lambda: RedrawPanel(), first_interval=0) 
+                        if render_session.registered_timer_func:
+                            bpy.app.timers.unregister(render_session.registered_timer_func)
+                        render_session.registered_timer_func = lambda: cls.__draw_after_backoff(space, region, region_3d)
+                        bpy.app.timers.register(render_session.registered_timer_func, first_interval=scheduler.backoff_interval())
+                    elif progressive is not None and progressive.retry_on_timeout():
+                        cls.__register_progressive_timer(render_session, region, 0)
                     else:
                         # 短い設定時間でタイムアウトした場合、
                         # 操作のレスポンス向上のためエリア内の全ライン描画を待機状態にする
@@ -372,6 +797,10 @@ class ViewportLineRenderManager:
                     render_session.render_mode = cls.RenderMode.Error
                     bpy.app.timers.register(lambda: RedrawPanel(), first_interval=0) 
 
+        if progressive is not None and not progressive.is_refined() and render_session.render_mode == cls.RenderMode.Normal and\
+           (progressive.timer_func is None or not bpy.app.timers.is_registered(progressive.timer_func)):
+            cls.__register_progressive_timer(render_session, region, progressive.settle_interval)
+
         if render_session.render_mode == cls.RenderMode.Wait:
             # 通常の描画でタイムアウトした場合、より長いタイムアウト時間で描画を試行するためタイマーを設定する
             if render_session.registered_timer_func:
@@ -380,7 +809,7 @@ class ViewportLineRenderManager:
             render_session.registered_timer_func = lambda: cls.__draw_timeout2(space, region, region_3d)
             bpy.app.timers.register(
                 render_session.registered_timer_func,
-                first_interval=cls.__timeout2_interval)
+                first_interval=render_session.timeout_scheduler.retry_interval())
 
         with gpu.matrix.push_pop():
             with gpu.matrix.push_pop_projection():
@@ -399,11 +828,12 @@ class ViewportLineRenderManager:
                     __class__.__draw_color(space, color)
 
                 if draw_line:
-                    pixels = gpu.types.Buffer("FLOAT", width * height * 4, pixels)
-                    tex = gpu.types.GPUTexture((width, height), data=pixels)
+                    gpu_resources = cls.get(space).get_gpu_resources(region_3d)
+                    tex = gpu_resources.get_texture(width, height, None) if not is_new_pixels else None
+                    if tex is None:
+                        tex = gpu_resources.get_texture(width, height, pixels)
                     gpu.state.blend_set("ALPHA")
-                    __class__.__draw_texture(space, tex, draw_texture_origin, draw_texture_size)
-                    del tex
+                    __class__.__draw_texture(space, tex, draw_texture_origin, draw_texture_size, texture_filter)
 
     @staticmethod
     def __create_shader(vertex_source:str,
@@ -476,6 +906,7 @@ class ViewportLineRenderManager:
             params = gpu_utils.ShaderParameters()
             params.add_constant("VEC2", "origin")
             params.add_constant("VEC2", "size")
+            params.add_constant("FLOAT", "bilinear")
             params.add_sampler("FLOAT_2D", "image")
             params.add_vert_output("VEC2", "uvInterp")
             __class__.__draw_tex_shader = __class__.__create_shader(
@@ -487,28 +918,45 @@ class ViewportLineRenderManager:
                 }
                 ''',
                 '''
+                vec4 texture_bilinear(vec2 uv)
+                {
+                    // 縮小した解像度で描画したラインを拡大して表示する
+                    ivec2 texture_size = textureSize(image, 0);
+                    vec2 p = uv * vec2(texture_size) - 0.5;
+                    vec2 f = fract(p);
+                    ivec2 i = ivec2(floor(p));
+                    ivec2 m = texture_size - 1;
+                    vec4 a = texelFetch(image, clamp(i, ivec2(0), m), 0);
+                    vec4 b = texelFetch(image, clamp(i + ivec2(1, 0), ivec2(0), m), 0);
+                    vec4 c = texelFetch(image, clamp(i + ivec2(0, 1), ivec2(0), m), 0);
+                    vec4 d = texelFetch(image, clamp(i + ivec2(1, 1), ivec2(0), m), 0);
+                    return mix(mix(a, b, f.x), mix(c, d, f.x), f.y);
+                }
                 void main()
                 {
-                    FragColor = correct_color_for_framebuffer_space(texture(image, uvInterp));
+                    vec4 color = bilinear > 0.5 ? texture_bilinear(uvInterp) : texture(image, uvInterp);
+                    FragColor = correct_color_for_framebuffer_space(color);
                 }
                 ''',
                 params
             )
         return __class__.__draw_tex_shader
     
+    __shader_batch_dict = {}
     @staticmethod
     def __get_shader_batch(shader: gpu.types.GPUShader):
-        return batch_for_shader(shader,
-            'TRIS',
-            {"pos": ((-1, -1), (1, -1), (-1, 1), (1, 1)),},
-            indices=((0, 1, 2), (2, 1, 3)))
+        # 全画面の矩形はシェーダー毎に一度だけ生成する
+        batch = __class__.__shader_batch_dict.get(shader)
+        if batch is None:
+            batch = batch_for_shader(shader,
+                'TRIS',
+                {"pos": ((-1, -1), (1, -1), (-1, 1), (1, 1)),},
+                indices=((0, 1, 2), (2, 1, 3)))
+            __class__.__shader_batch_dict[shader] = batch
+        return batch
 
     @staticmethod
     def __setup_shader_common(shader: gpu.types.GPUShader, space: bpy.types.SpaceView3D):
-        batch = batch_for_shader(shader,
-            'TRIS',
-            {"pos": ((-1, -1), (1, -1), (-1, 1), (1, 1)),},
-            indices=((0, 1, 2), (2, 1, 3)))
         shader.uniform_float("viewProjectionMatrix", gpu.matrix.get_projection_matrix())
         if bpy.context.scene.view_settings.view_transform == "Raw":
             shader.uniform_float("isSRGB", 0.0)
@@ -537,13 +985,15 @@ class ViewportLineRenderManager:
         __class__.__get_shader_batch(shader).draw(shader)
 
     @staticmethod
-    def __draw_texture(space: bpy.types.SpaceView3D, tex: gpu.types.GPUTexture, origin: Tuple[float, float] = None, size: Tuple[float, float] = None):
+    def __draw_texture(space: bpy.types.SpaceView3D, tex: gpu.types.GPUTexture, origin: Tuple[float, float] = None, size: Tuple[float, float] = None,
+                       bilinear: bool = False):
         shader = __class__.__get_draw_tex_shader()
         shader.bind()
         __class__.__setup_shader_common(shader, space)
         shader.uniform_sampler("image", tex)
         shader.uniform_float("origin", origin if origin is not None else (0.0, 0.0))
         shader.uniform_float("size", size if size is not None else (1.0, 1.0))
+        shader.uniform_float("bilinear", 1.0 if bilinear else 0.0)
         __class__.__get_shader_batch(shader).draw(shader)
 
 
@@ -610,6 +1060,64 @@ class PCL4_OT_RetryViewportLineRender(bpy.types.Operator):
         ViewportLineRenderManager.enable(context.space_data)
         return {'FINISHED'}
 
+class PCL4_OT_CacheViewportLineFrames(bpy.types.Operator):
+    bl_idname = "pcl4.cache_viewport_line_frames"
+    bl_label = "Cache Frame Range"
+    bl_options = {'REGISTER'}
+    bl_translation_context = Translation.ctxt
+
+    __timer = None
+
+    @staticmethod
+    def is_running():
+        return __class__.__timer is not None
+
+    @classmethod
+    def poll(cls, context):
+        settings = ViewportLineRenderManager.get_settings(context.space_data)
+        return np is not None and settings is not None and settings.enable and not cls.is_running() and\
+            context.preferences.addons[__package__].preferences.viewport_flipbook
+
+    def invoke(self, context, event):
+        # タイマー毎にフレームを1つ進めてビューポートを再描画し、ビューポートのライン描画結果をフレームのキャッシュに追加する
+        # (ESCで中断できるよう、モーダルオペレーターとして実行する)
+        if __class__.is_running():
+            return {'CANCELLED'}
+        scene = context.scene
+        frame_start = scene.frame_preview_start if scene.use_preview_range else scene.frame_start
+        frame_end = scene.frame_preview_end if scene.use_preview_range else scene.frame_end
+        self.frames = list(range(frame_start, frame_end + 1, scene.frame_step))
+        self.frame_index = 0
+        self.original_frame_current = scene.frame_current
+        ViewportLineRenderManager.set_flipbook_filling(True)
+        context.window_manager.modal_handler_add(self)
+        context.window_manager.progress_begin(0, len(self.frames))
+        __class__.__timer = context.window_manager.event_timer_add(0.01, window=context.window)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            return {'CANCELLED'}
+        if event.type == 'TIMER':
+            # 前回のタイマーで変更したフレームは、その後のビューポートの再描画でキャッシュに追加される
+            if self.frame_index >= len(self.frames):
+                self.cancel(context)
+                return {'FINISHED'}
+            context.scene.frame_set(self.frames[self.frame_index])
+            self.frame_index += 1
+            context.window_manager.progress_update(self.frame_index)
+            if context.area is not None:
+                context.area.tag_redraw()
+        return {'PASS_THROUGH'}
+
+    def cancel(self, context):
+        ViewportLineRenderManager.set_flipbook_filling(False)
+        context.window_manager.event_timer_remove(__class__.__timer)
+        __class__.__timer = None
+        context.window_manager.progress_end()
+        context.scene.frame_set(self.original_frame_current)
+
 class PCL4_OT_DisableViewportLineRender(bpy.types.Operator):
     bl_idname = "pcl4.disable_viewport_line_render"
     bl_label = "Off"
@@ -668,6 +1176,50 @@ class PCL4_PT_ViewportLinePreview(bpy.types.Panel):
         prop("camera_view_range", "Range")
         if settings.camera_view_range == "WHOLE_VIEWPORT":
             prop("camera_view_scale", "Line Size Adjustment")
+        layout.separator()
+        col = layout.column(align=True)
+        prop("progressive_resolution", "Reduce Resolution while Navigating")
+        if context.preferences.addons[__package__].preferences.viewport_flipbook:
+            layout.separator()
+            layout.operator(PCL4_OT_CacheViewportLineFrames.bl_idname, icon="SEQUENCE")
+            frame_count, memory_size = ViewportLineRenderManager.get_flipbook_stats()
+            row = layout.row()
+            row.label(text="Cached Frames", text_ctxt=Translation.ctxt)
+            row.label(text=f"{frame_count} ({memory_size / (1024 * 1024):.0f} MB)", translate=False)
+
+        # リージョン毎の描画時間とタイムアウト時間
+        long_timeout = context.preferences.addons[__package__].preferences.viewport_render_timeout
+        schedulers = ViewportLineRenderManager.get_timeout_schedulers(context.space_data)
+        if len(schedulers) > 0:
+            layout.separator()
+            box = layout.box()
+            for i, scheduler in enumerate(schedulers):
+                col = box.column(align=True)
+                if len(schedulers) > 1:
+                    col.label(text=f"#{i + 1}", translate=False)
+                average = scheduler.average_draw_time()
+                row = col.row()
+                row.label(text="Draw Time", text_ctxt=Translation.ctxt)
+                row.label(text=(f"{scheduler.last_draw_time * 1000.0:.0f} ms" if scheduler.last_draw_time is not None else "-") +
+                               (f" ({average * 1000.0:.0f} ms)" if average is not None else ""), translate=False)
+                row = col.row()
+                row.label(text="Interactive Timeout", text_ctxt=Translation.ctxt)
+                row.label(text=f"{scheduler.interactive_timeout(long_timeout) * 1000.0:.0f} ms", translate=False)
+                row = col.row()
+                row.label(text="Timeouts", text_ctxt=Translation.ctxt)
+                row.label(text=f"{scheduler.timeout_count}", translate=False)
+        if context.preferences.addons[__package__].preferences.frustum_culling:
+            layout.separator()
+            culled, total = ViewportLineRenderManager.get_culling_stats(context.space_data)
+            row = layout.row()
+            row.label(text="Culled Instances", text_ctxt=Translation.ctxt)
+            row.label(text=f"{culled} / {total}", translate=False)
+        if context.preferences.addons[__package__].preferences.record_render_stats:
+            layout.separator()
+            hits, total = ViewportLineRenderManager.get_result_cache_stats(context.space_data)
+            row = layout.row()
+            row.label(text="Reused Line Images", text_ctxt=Translation.ctxt)
+            row.label(text=f"{hits} / {total}", translate=False)
 
 class PCL4_PT_ViewportLineRender(bpy.types.Panel):
     bl_idname = "PCL4_PT_viewport_line_render"
@@ -695,6 +1247,8 @@ class PCL4_PT_ViewportLineRender(bpy.types.Panel):
         def prop(prop_name, label_text):
             col.prop(context.scene, prop_name, text=label_text, text_ctxt=Translation.ctxt)
         col = layout.column(align=True)
+        prop("pencil4_line_viewport_render_skip_unchanged_frames", "Skip Unchanged Frames")
+        col = layout.column(align=True)
         prop("pencil4_line_viewport_render_background_color_enable", "Background Color")
         col = col.column()
         col.enabled = context.scene.pencil4_line_viewport_render_background_color_enable
@@ -710,6 +1264,8 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
     render_keyed_only: bpy.props.BoolProperty(default=False)
 
     __timer = None
+    # アニメーションで1回のタイマーの間に連続してフレームを処理する時間
+    frame_time_budget = 0.25
 
     @staticmethod
     def is_rendering():
@@ -732,6 +1288,11 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
             else:
                 break
 
+    @staticmethod
+    def get_temp_path(frame_path: str) -> str:
+        # 出力先と同じ拡張子を持つ、レンダリング結果の受け渡し用の一時ファイル
+        return os.path.join(bpy.app.tempdir, "pcl4_viewport_render" + os.path.splitext(frame_path)[1])
+
     @staticmethod
     def get_render_result_override_image() -> bpy.types.Image:
         return next((image for image in bpy.data.images if image.get("is_pcl4_render_result", False)), None)
@@ -744,6 +1305,12 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
                     window.screen.areas[0].spaces[0].image = image
 
     def cleanup(self, context):
+        # 書き出し用のスレッドに渡したフレームを全て保存し終えてから終了する
+        if self.writer is not None:
+            self.writer.close()
+            for error in self.writer.pop_errors():
+                self.report({'ERROR'}, error)
+            self.writer = None
         output_image = __class__.get_render_result_override_image()
         if output_image is not None:
             output_image.pack()
@@ -751,6 +1318,14 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
         context.window_manager.event_timer_remove(__class__.__timer)
         __class__.__timer = None
         context.window.cursor_modal_restore()
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        if self.offscreen is not None:
+            self.offscreen.free()
+            self.offscreen = None
+        if self.animation:
+            context.window_manager.progress_end()
+            context.workspace.status_text_set(None)
         if self.animation:
             context.scene.frame_set(self.original_frame_current)
 
@@ -759,102 +1334,199 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
             self.cancel(context)
             return {'CANCELLED'}
         if event.type == 'TIMER':
-            frame_current = context.scene.frame_current
-            frame_path = context.scene.render.frame_path(frame=frame_current)
-            if context.scene.render.is_movie_format:
-                frame_path += ".tmp"
-            output_image = __class__.get_render_result_override_image()
-
-            # 必要がある場合のみレンダリングを実行する
-            if not self.animation or self.render_frames is None or frame_current in self.render_frames:
-                space: bpy.types.SpaceView3D = bpy.context.space_data
-                region: bpy.types.Region = bpy.context.region
-                region_3d: bpy.types.RegionView3D = space.region_3d
-
-                # Blenderのビューポートレンダリングを実行し、レンダリング結果を取得する
-                bpy.ops.render.opengl()
-                context.window.cursor_modal_set('WAIT')
-                render_image = next(image for image in bpy.data.images if image.type == "RENDER_RESULT")
-                render_image.save_render(frame_path)
-                if output_image is None:
-                    output_image = __class__.create_render_result_override_image(frame_path)
-                    self.image_alpha_mode = output_image.alpha_mode
-                    __class__.set_render_view_image(output_image)
-                else:
-                    if output_image.packed_file is not None:
-                        output_image.unpack(method="REMOVE")
-                    output_image.source = "FILE"
-                    output_image.alpha_mode = self.image_alpha_mode
-                    output_image.filepath = frame_path
-                display_device = context.scene.display_settings.display_device
-                if (display_device in bpy.types.ColorManagedInputColorspaceSettings.bl_rna.properties["name"].enum_items and
-                    context.scene.view_settings.view_transform != "Raw"):
-                    output_image.colorspace_settings.name = display_device
-                else:
-                    output_image.colorspace_settings.name = "Linear" if "Linear" in bpy.types.ColorManagedInputColorspaceSettings.bl_rna.properties["name"].enum_items else "Linear Rec.709"
-                    if context.scene.view_settings.view_transform == "Raw":
-                        output_image.use_view_as_render = True
-
-                # ライン描画を実行する
-                if self.session is None:
-                    self.session = RenderSession()
-                depsgraph = context.evaluated_depsgraph_get()
-                width, height = pencil4_render_session.get_render_size(depsgraph)
-                def matrix_override(camera_matrix, window_matrix):
-                    return _calc_matrix_override(width, height, region, region_3d, depsgraph, camera_matrix, window_matrix)
-                draw_ret = self.session.draw_line_for_viewport(context.evaluated_depsgraph_get(), width, height, space, region_3d, matrix_override)
-                if draw_ret != pencil4line_for_blender.draw_ret.success and draw_ret != pencil4line_for_blender.draw_ret.success_without_license:
-                    self.report({'ERROR'}, "Failed to render lines.")
-                    self.cancel(context)
-                    return {'CANCELLED'}
-                
-                # レンダリング結果にライン描画結果を合成する
-                if bpy.app.version >= (3, 1, 0):
-                    offscreen = gpu.types.GPUOffScreen(width, height, format='RGBA16F')
-                else:
-                    offscreen = gpu.types.GPUOffScreen(width, height)
-                with offscreen.bind():
-                    fb = gpu.state.active_framebuffer_get()
-                    fb.clear(color=(0.0, 0.0, 0.0, 0.0))
-                    with gpu.matrix.push_pop():
-                        with gpu.matrix.push_pop_projection():
-                            gpu.matrix.load_matrix(Matrix.Identity(4))
-                            gpu.matrix.load_projection_matrix(Matrix.Identity(4))
-                            tex = gpu.texture.from_image(output_image)
-                            tex.read()
-                            gpu.state.blend_set("NONE" if self.image_alpha_mode == "PREMUL" else "ALPHA")
-                            draw_texture_2d(tex, (-1, -1), 2, 2)
-                            del tex
-                            if self.enalbe_background_color:
-                                tex = gpu.types.GPUTexture((8, 8))
-                                tex.clear(format="FLOAT", value=self.background_color)
-                                gpu.state.blend_set("ALPHA")
-                                draw_texture_2d(tex, (-1, -1), 2, 2)
-                                del tex
-                            if len(self.session.get_viewport_image_buffer()) == width * height * 4:
-                                pixels = gpu.types.Buffer("FLOAT", width * height * 4, self.session.get_viewport_image_buffer())
-                                tex = gpu.types.GPUTexture((width, height), data=pixels)
-                                gpu.state.blend_set("ALPHA_PREMULT")
-                                draw_texture_2d(tex, (-1, -1), 2, 2)
-                                del tex
-                    buffer = fb.read_color(0, 0, width, height, 4, 0, 'FLOAT')
-                offscreen.free()
-                buffer.dimensions = width * height * 4
-                pencil4_render_images.setup_image(output_image, width, height)
-                output_image.pixels = buffer
-            
-            # レンダリング結果を保存する
+            # アニメーションの場合は、UIの応答性を保てる範囲で1回のタイマーで複数のフレームを処理する
+            start_time = time.perf_counter()
+            while True:
+                ret = self.__render_frame(context)
+                if ret is not None:
+                    return ret
+                self.frame_count += 1
+                self.__update_progress(context)
+                if not self.animation or time.perf_counter() - start_time >= __class__.frame_time_budget:
+                    break
+        return {'RUNNING_MODAL'}
+
+    def __render_frame(self, context):
+        if self.writer is not None:
+            errors = self.writer.pop_errors()
+            if len(errors) > 0:
+                self.report({'ERROR'}, errors[0])
+                self.cancel(context)
+                return {'CANCELLED'}
+
+        frame_current = context.scene.frame_current
+        frame_path = context.scene.render.frame_path(frame=frame_current)
+        if context.scene.render.is_movie_format:
+            frame_path += ".tmp"
+        output_image = __class__.get_render_result_override_image()
+
+        # 必要がある場合のみレンダリングを実行する
+        # 変化のないフレームを省略する場合、出力に影響する状態が前回レンダリングしたフレームと同じであれば前回の出力を再利用する
+        render = not self.animation or self.render_frames is None or frame_current in self.render_frames
+        if render and self.skip_unchanged_frames:
+            fingerprint = _calc_frame_fingerprint(context.evaluated_depsgraph_get(), bpy.context.space_data.region_3d)
+            if fingerprint == self.last_fingerprint and self.last_output_path is not None:
+                render = False
+            self.last_fingerprint = fingerprint
+        if render:
+            space: bpy.types.SpaceView3D = bpy.context.space_data
+            region: bpy.types.Region = bpy.context.region
+            region_3d: bpy.types.RegionView3D = space.region_3d
+
+            # Blenderのビューポートレンダリングを実行し、レンダリング結果を取得する
+            # CPUで合成する場合はレンダリング結果を一時ファイルから読み込み、出力先には合成結果のみを保存する
+            composite_on_cpu = np is not None
+            source_path = frame_path
+            if composite_on_cpu:
+                source_path = self.temp_path = __class__.get_temp_path(frame_path)
+            bpy.ops.render.opengl()
+            context.window.cursor_modal_set('WAIT')
+            render_image = next(image for image in bpy.data.images if image.type == "RENDER_RESULT")
+            render_image.save_render(source_path)
             if output_image is None:
-                self.report({'ERROR'}, "Failed to Pencil+ 4 Line Viewport Render.")
+                output_image = __class__.create_render_result_override_image(source_path)
+                self.image_alpha_mode = output_image.alpha_mode
+                __class__.set_render_view_image(output_image)
+            else:
+                if output_image.packed_file is not None:
+                    output_image.unpack(method="REMOVE")
+                output_image.source = "FILE"
+                output_image.alpha_mode = self.image_alpha_mode
+                output_image.filepath = source_path
+            display_device = context.scene.display_settings.display_device
+            if (display_device in bpy.types.ColorManagedInputColorspaceSettings.bl_rna.properties["name"].enum_items and
+                context.scene.view_settings.view_transform != "Raw"):
+                output_image.colorspace_settings.name = display_device
+            else:
+                output_image.colorspace_settings.name = "Linear" if "Linear" in bpy.types.ColorManagedInputColorspaceSettings.bl_rna.properties["name"].enum_items else "Linear Rec.709"
+                if context.scene.view_settings.view_transform == "Raw":
+                    output_image.use_view_as_render = True
+
+            # ライン描画を実行する
+            if self.session is None:
+                self.session = RenderSession()
+            depsgraph = context.evaluated_depsgraph_get()
+            width, height = pencil4_render_session.get_render_size(depsgraph)
+            def matrix_override(camera_matrix, window_matrix):
+                return _calc_matrix_override(width, height, region, region_3d, depsgraph, camera_matrix, window_matrix)
+            draw_ret = self.session.draw_line_for_viewport(context.evaluated_depsgraph_get(), width, height, space, region_3d, matrix_override)
+            if draw_ret != pencil4line_for_blender.draw_ret.success and draw_ret != pencil4line_for_blender.draw_ret.success_without_license:
+                self.report({'ERROR'}, "Failed to render lines.")
                 self.cancel(context)
                 return {'CANCELLED'}
+            
+            # レンダリング結果にライン描画結果を合成する
+            # CPUで合成できない場合(numpyが無い・読み込んだ画像の色空間が未対応)はGPUで合成する
+            pixels = self.__composite_on_cpu(output_image, width, height) if composite_on_cpu else None
+            if pixels is not None:
+                pencil4_render_images.setup_image(output_image, width, height)
+                output_image.pixels.foreach_set(pixels)
+                self.last_frame = (pixels, width, height)
+            else:
+                self.__composite_on_gpu(output_image, width, height)
+                self.last_frame = None
+            output_image.filepath_raw = frame_path
+        
+        # レンダリング結果を保存する
+        # 書き出し用のスレッドを使用できる場合は、エンコードとファイルへの書き込みをスレッドに任せる
+        if output_image is None:
+            self.report({'ERROR'}, "Failed to Pencil+ 4 Line Viewport Render.")
+            self.cancel(context)
+            return {'CANCELLED'}
+        if not render and self.skip_unchanged_frames and self.last_output_path is not None:
+            if self.writer is not None:
+                self.writer.link(self.last_output_path, frame_path)
+            else:
+                pencil4_frame_writer.link_or_copy(self.last_output_path, frame_path)
+        elif self.writer is not None and self.last_frame is not None:
+            (pixels, width, height) = self.last_frame
+            settings = context.scene.render.image_settings
+            use_alpha = settings.color_mode == "RGBA"
+            depth = int(settings.color_depth)
+            # 最初のフレームで save_render の結果と一致することを確認し、一致しない場合は以降も save_render で保存する
+            if not self.writer_verified:
+                self.writer_verified = True
+                if not _writer_matches_save_render(output_image, pixels, width, height, use_alpha, depth):
+                    self.report({'WARNING'}, "Saving frames with Blender because the fast PNG writer does not match its output.")
+                    self.writer.close()
+                    self.writer = None
+            if self.writer is not None:
+                self.writer.write(frame_path, pixels, width, height, use_alpha, depth)
+            else:
+                output_image.save_render(frame_path)
+        else:
             output_image.save_render(frame_path)
-            if not self.animation or frame_current >= context.scene.frame_end:
-                self.cleanup(context)
-                return {'FINISHED'}
-            if self.animation:
-                context.scene.frame_set(frame_current + context.scene.frame_step)
-        return {'RUNNING_MODAL'}
+        if render:
+            self.last_output_path = frame_path
+        if not self.animation or frame_current >= context.scene.frame_end:
+            self.cleanup(context)
+            return {'FINISHED'}
+        if self.animation:
+            context.scene.frame_set(frame_current + context.scene.frame_step)
+        return None
+
+    def __update_progress(self, context):
+        if not self.animation:
+            return
+        elapsed = time.perf_counter() - self.start_time
+        frames_per_minute = self.frame_count * 60.0 / max(elapsed, 1e-6)
+        eta = elapsed / self.frame_count * max(0, self.frame_total - self.frame_count)
+        context.window_manager.progress_update(self.frame_count)
+        context.workspace.status_text_set(f"Pencil+ 4 Line Viewport Render: {self.frame_count} / {self.frame_total}"
+                                          f" | {frames_per_minute:.1f} frames/min | ETA {time.strftime('%H:%M:%S', time.gmtime(eta))}")
+
+    def __composite_on_cpu(self, output_image: bpy.types.Image, width: int, height: int):
+        if len(output_image.pixels) != width * height * 4:
+            return None
+        render_pixels = _read_linear_pixels(output_image)
+        if render_pixels is None:
+            return None
+        line_pixels = self.session.get_viewport_image_buffer()
+        line_pixels = np.asarray(line_pixels, dtype=np.float32).reshape(-1, 4) if len(line_pixels) == width * height * 4 else None
+        return _composite_line_pixels(render_pixels,
+                                      self.image_alpha_mode == "PREMUL",
+                                      self.background_color if self.enalbe_background_color else None,
+                                      line_pixels).ravel()
+
+    def __composite_on_gpu(self, output_image: bpy.types.Image, width: int, height: int):
+        # オフスクリーンはレンダリングの間保持し、サイズが変わった場合のみ生成し直す
+        if self.offscreen is not None and (self.offscreen.width != width or self.offscreen.height != height):
+            self.offscreen.free()
+            self.offscreen = None
+        if self.offscreen is None:
+            if bpy.app.version >= (3, 1, 0):
+                self.offscreen = gpu.types.GPUOffScreen(width, height, format='RGBA16F')
+            else:
+                self.offscreen = gpu.types.GPUOffScreen(width, height)
+        offscreen = self.offscreen
+        with offscreen.bind():
+            fb = gpu.state.active_framebuffer_get()
+            fb.clear(color=(0.0, 0.0, 0.0, 0.0))
+            with gpu.matrix.push_pop():
+                with gpu.matrix.push_pop_projection():
+                    gpu.matrix.load_matrix(Matrix.Identity(4))
+                    gpu.matrix.load_projection_matrix(Matrix.Identity(4))
+                    tex = gpu.texture.from_image(output_image)
+                    tex.read()
+                    gpu.state.blend_set("NONE" if self.image_alpha_mode == "PREMUL" else "ALPHA")
+                    draw_texture_2d(tex, (-1, -1), 2, 2)
+                    del tex
+                    if self.enalbe_background_color:
+                        tex = gpu.types.GPUTexture((8, 8))
+                        tex.clear(format="FLOAT", value=self.background_color)
+                        gpu.state.blend_set("ALPHA")
+                        draw_texture_2d(tex, (-1, -1), 2, 2)
+                        del tex
+                    if len(self.session.get_viewport_image_buffer()) == width * height * 4:
+                        pixels = gpu.types.Buffer("FLOAT", width * height * 4, self.session.get_viewport_image_buffer())
+                        tex = gpu.types.GPUTexture((width, height), data=pixels)
+                        gpu.state.blend_set("ALPHA_PREMULT")
+                        draw_texture_2d(tex, (-1, -1), 2, 2)
+                        del tex
+            buffer = fb.read_color(0, 0, width, height, 4, 0, 'FLOAT')
+        buffer.dimensions = width * height * 4
+        pencil4_render_images.setup_image(output_image, width, height)
+        output_image.pixels = buffer
 
     def invoke(self, context, event):
         if __class__.is_rendering():
@@ -865,6 +1537,17 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
         self.render_frames = None
         self.session = None
         self.image_alpha_mode = None
+        self.temp_path = None
+        self.offscreen = None
+        self.last_frame = None
+        self.writer = None
+        self.writer_verified = False
+        self.frame_count = 0
+        self.frame_total = 1
+        self.skip_unchanged_frames = self.animation and context.scene.pencil4_line_viewport_render_skip_unchanged_frames
+        self.last_fingerprint = None
+        self.last_output_path = None
+        self.start_time = time.perf_counter()
         self.original_frame_current = context.scene.frame_current
         self.background_color = context.scene.pencil4_line_viewport_render_background_color
         self.enalbe_background_color = context.scene.pencil4_line_viewport_render_background_color_enable
@@ -873,6 +1556,10 @@ class PCL4_OT_ViewportRender(bpy.types.Operator):
         __class__.__timer = context.window_manager.event_timer_add(0.01, window=context.window)
         if self.animation:
             context.scene.frame_set(context.scene.frame_start)
+            self.frame_total = len(range(context.scene.frame_start, context.scene.frame_end + 1, context.scene.frame_step))
+            context.window_manager.progress_begin(0, self.frame_total)
+            if pencil4_frame_writer.FrameWriter.supports(context.scene):
+                self.writer = pencil4_frame_writer.FrameWriter(context.scene.render.image_settings.compression)
             if self.render_keyed_only:
                 self.render_frames = set([context.scene.frame_start])
                 for object in context.selected_objects:
@@ -905,6 +1592,142 @@ def _calc_matrix_override(width: int, height: int, region, region_3d, depsgraph,
     return camera_matrix, window_matrix
 
 
+def _writer_matches_save_render(image: bpy.types.Image, pixels, width: int, height: int, use_alpha: bool, depth: int) -> bool:
+    # save_render で一時ファイルに保存した画像を、色空間の変換・アルファの乗算を行わずに読み込んで比較する
+    path = os.path.join(bpy.app.tempdir, "pcl4_viewport_render_verify.png")
+    image.save_render(path)
+    reference = bpy.data.images.load(path, check_existing=False)
+    try:
+        reference.colorspace_settings.is_data = True
+        reference.alpha_mode = "CHANNEL_PACKED"
+        if tuple(reference.size) != (width, height):
+            return False
+        reference_pixels = np.empty(width * height * 4, dtype=np.float32)
+        reference.pixels.foreach_get(reference_pixels)
+        return pencil4_frame_writer.matches_reference(pixels, width, height, use_alpha, depth, reference_pixels)
+    finally:
+        bpy.data.images.remove(reference)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _read_linear_pixels(image: bpy.types.Image):
+    # 画像の画素を (画素数, 4) のシーンリニアの配列として取得する
+    # 8bitの画像は色空間の変換が適用されない値が返されるため、sRGBとリニア以外の色空間の場合は None を返す
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    pixels = pixels.reshape(-1, 4)
+    colorspace = image.colorspace_settings.name
+    if image.is_float or colorspace in ("Linear", "Linear Rec.709", "Non-Color", "Raw"):
+        return pixels
+    if colorspace == "sRGB":
+        rgb = pixels[:, :3]
+        pixels[:, :3] = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+        return pixels
+    return None
+
+
+def _composite_line_pixels(render_pixels, render_premultiplied: bool, background_color, line_pixels):
+    # GPUで合成する場合と同じ順序・ブレンド方法で合成し、アルファ乗算済みの結果を返す
+    # (レンダリング結果 → 背景色(アルファブレンド) → ライン(アルファ乗算済みのブレンド))
+    ret = render_pixels
+    if not render_premultiplied:
+        ret[:, :3] *= ret[:, 3:4]
+    if background_color is not None:
+        color = np.array(background_color, dtype=np.float32)
+        ret *= 1.0 - color[3]
+        ret[:, :3] += color[:3] * color[3]
+        ret[:, 3] += color[3]
+    if line_pixels is not None:
+        ret *= 1.0 - line_pixels[:, 3:4]
+        ret += line_pixels
+    return ret
+
+
+# 変化のないフレームの判定で、アニメーションされたプロパティの値を比較する
+# (オブジェクトの行列・ジオメトリは depsgraph の評価結果から直接比較する)
+def _iterate_animated_paths(id: bpy.types.ID):
+    anim = getattr(id, "animation_data", None)
+    if anim is None:
+        return
+    def action_fcurves(action, slot):
+        if action is None:
+            return ()
+        fcurves = getattr(action, "fcurves", None)
+        if fcurves is None:
+            channelbag = anim_utils.action_get_channelbag_for_slot(action, slot)
+            fcurves = channelbag.fcurves if channelbag is not None else ()
+        return fcurves
+    fcurves = itertools.chain(anim.drivers,
+                              action_fcurves(anim.action, getattr(anim, "action_slot", None)),
+                              *(action_fcurves(strip.action, getattr(strip, "action_slot", None)) for track in anim.nla_tracks for strip in track.strips))
+    for fcurve in fcurves:
+        yield (fcurve.data_path, fcurve.array_index)
+
+
+def _calc_frame_fingerprint(depsgraph: bpy.types.Depsgraph, region_3d: bpy.types.RegionView3D) -> bytes:
+    # ビューポートレンダリングとライン描画の結果に影響する状態のハッシュ
+    # 視点、表示されるインスタンスの行列とジオメトリ、アニメーション・ドライバーで変化するプロパティの値を対象とする
+    h = hashlib.blake2b(digest_size=16)
+    def update_matrix(matrix):
+        h.update(struct.pack("16d", *itertools.chain.from_iterable(matrix)))
+    update_matrix(region_3d.view_matrix)
+    update_matrix(region_3d.window_matrix)
+    h.update(region_3d.view_perspective.encode())
+
+    # アニメーション・ドライバーの値を調べるID (bpy.data 全体ではなく、描画されるオブジェクトが参照するもののみ)
+    # シーン・ワールド・ラインのノードツリーと、各オブジェクトとそのデータ・シェイプキー・マテリアル(と埋め込まれたノードツリー)
+    # (マテリアル・ワールドのノードツリーのアニメーションは、埋め込まれたノードツリーが保持する)
+    world = depsgraph.scene.world
+    animated_ids = dict.fromkeys(x for x in (depsgraph.scene, world, world and world.node_tree) if x is not None)
+    animated_ids.update(dict.fromkeys(PencilNodeTree.enumerate_trees()))
+    def add_animated_ids(obj: bpy.types.Object):
+        if obj in animated_ids:
+            return
+        animated_ids[obj] = None
+        data = obj.data
+        if data is not None:
+            animated_ids[data] = None
+            shape_keys = getattr(data, "shape_keys", None)
+            if shape_keys is not None:
+                animated_ids[shape_keys] = None
+        for slot in obj.material_slots:
+            material = slot.material
+            if material is not None:
+                animated_ids[material] = None
+                if material.node_tree is not None:
+                    animated_ids[material.node_tree] = None
+
+    object_instance: bpy.types.DepsgraphObjectInstance
+    for object_instance in depsgraph.object_instances:
+        obj = object_instance.object
+        add_animated_ids(obj.original)
+        h.update(obj.original.name_full.encode())
+        if object_instance.is_instance:
+            h.update(struct.pack(f"{len(object_instance.persistent_id)}i", *object_instance.persistent_id))
+        h.update(bytes((object_instance.show_self, object_instance.show_particles)))
+        update_matrix(object_instance.matrix_world)
+        if obj.type == "MESH":
+            mesh: bpy.types.Mesh = obj.data
+            h.update(struct.pack("4i", len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons)))
+            co = array.array("f", bytes(len(mesh.vertices) * 3 * 4))
+            mesh.vertices.foreach_get("co", co)
+            h.update(co)
+        else:
+            h.update(struct.pack("24d", *itertools.chain.from_iterable(obj.bound_box)))
+
+    for owner in animated_ids:
+        for data_path, index in _iterate_animated_paths(owner):
+            try:
+                value = owner.path_resolve(data_path)
+            except ValueError:
+                continue
+            if hasattr(value, "__len__") and not isinstance(value, str):
+                value = tuple(value)
+            h.update(f"{owner.name_full}:{data_path}[{index}]={value!r}".encode())
+    return h.digest()
+
+
 def RedrawPanel():
     bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
 
@@ -913,6 +1736,7 @@ def register_props():
     bpy.types.Screen.pencil4_line_viewport_render_settings = bpy.props.CollectionProperty(type=ViewportLineRenderSettings)
     bpy.types.Scene.pencil4_line_viewport_render_background_color = bpy.props.FloatVectorProperty(subtype="COLOR", size=4, min=0.0, max=1.0, default=[1.0, 1.0, 1.0, 1.0])
     bpy.types.Scene.pencil4_line_viewport_render_background_color_enable = bpy.props.BoolProperty(default=False)
+    bpy.types.Scene.pencil4_line_viewport_render_skip_unchanged_frames = bpy.props.BoolProperty(default=False)
     if __is_reloaded:
         bpy.app.timers.register(
                     lambda: ViewportLineRenderManager.load(),
@@ -922,6 +1746,7 @@ def register_props():
 def unregister_props():
     ViewportLineRenderManager.save()
     ViewportLineRenderManager.reset()
+    del(bpy.types.Scene.pencil4_line_viewport_render_skip_unchanged_frames)
     del(bpy.types.Scene.pencil4_line_viewport_render_background_color_enable)
     del(bpy.types.Scene.pencil4_line_viewport_render_background_color)
     del(bpy.types.Screen.pencil4_line_viewport_render_settings)
@@ -932,4 +1757,6 @@ def on_save_pre():
 
 
 def on_load_post():
+    ViewportLineRenderManager.clear_scene_extraction()
+    ViewportLineRenderManager.invalidate_flipbook()
     ViewportLineRenderManager.load()